@@ -0,0 +1,91 @@
+"""Benchmark ClinVarVariant construction on large VCV records.
+
+Heavily-submitted variants (BRCA1 and CFTR pathogenic variants have hundreds of
+submissions) produce VCV documents of several megabytes. This times, per record:
+
+    parse only          lxml parse of the document (the floor)
+    construct           ClinVarVariant(xml): one parse + the cheap attributes
+    construct + lazy    ... plus every lazily built sub-structure (LAZY_ATTRIBUTES),
+                        i.e. what construction used to cost before they were lazy
+
+By default the test fixture (VCV 12397) is inflated to --submissions clinical
+assertions, so no network is needed. Pass VCV XML files (efetch rettype=vcv output)
+or --fetch with VariationIDs to use real records instead, e.g. CFTR F508del:
+
+    python bin/benchmark_clinvar_variant.py --fetch 7105
+
+Usage:
+    python bin/benchmark_clinvar_variant.py [--submissions N] [--repeat N] [--fetch ID ...] [xml_file ...]
+"""
+
+import argparse
+import copy
+import os
+import time
+
+from lxml import etree
+
+from metapub import ClinVarFetcher, ClinVarVariant
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'clinvar_vcv_12000.xml')
+
+
+def inflated_fixture(submissions):
+    """ The fixture record with its ClinicalAssertionList grown to `submissions` entries. """
+    with open(FIXTURE, 'rb') as fh:
+        root = etree.fromstring(fh.read())
+    assertion_list = root.find('.//ClinicalAssertionList')
+    originals = list(assertion_list)
+    for i in range(submissions - len(originals)):
+        assertion_list.append(copy.deepcopy(originals[i % len(originals)]))
+    return etree.tostring(root)
+
+
+def run(label, func, xml, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(xml)
+    elapsed = (time.perf_counter() - start) * 1000 / repeat
+    print('  %-18s %9.2f ms' % (label, elapsed))
+    return elapsed
+
+
+def benchmark(name, xml, repeat):
+    variant = ClinVarVariant(xml)
+    print('%s: %.1f MB, %i clinical assertions' % (name, len(xml) / 1e6, len(variant.clinical_assertions)))
+    parse = run('parse only', etree.fromstring, xml, repeat)
+    construct = run('construct', ClinVarVariant, xml, repeat)
+    full = run('construct + lazy', lambda x: ClinVarVariant(x).to_dict(), xml, repeat)
+    print('  construct is %.1fx parse; all sub-structures add %.1fx\n'
+          % (construct / parse, (full - construct) / parse))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('xml_files', nargs='*', help='VCV XML files (efetch rettype=vcv output)')
+    parser.add_argument('--fetch', nargs='+', default=[], metavar='ID',
+                        help='ClinVar VariationIDs to fetch (needs network)')
+    parser.add_argument('--submissions', type=int, default=1000,
+                        help='clinical assertions in the inflated fixture (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='passes per measurement (default: %(default)s)')
+    args = parser.parse_args()
+
+    records = []
+    for path in args.xml_files:
+        with open(path, 'rb') as fh:
+            records.append((os.path.basename(path), fh.read()))
+    if args.fetch:
+        fetch = ClinVarFetcher()
+        for variation_id in args.fetch:
+            xml = fetch.qs.efetch(fetch._vcv_params(variation_id, 'clinvar'))
+            records.append(('VariationID %s' % variation_id, xml.encode('utf-8') if isinstance(xml, str) else xml))
+    if not records:
+        records.append(('fixture x%i submissions' % args.submissions, inflated_fixture(args.submissions)))
+
+    for name, xml in records:
+        benchmark(name, xml, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark UrlReverse DOI-method dispatch over tests/urlreverse_test_urls.txt.
+
+Compares the legacy approach (every method in DOI_METHODS, in order, for every URL)
+against hostname dispatch (try_doi_methods / try_doi_methods_many), reporting wall time,
+method calls, and how many of those calls went to network-capable methods (ones that may
+scrape a page or query DxDOI).
+
+By default network-backed methods are replaced with stand-ins that record the call and
+return None, so the numbers measure dispatch alone. Pass --network to run them for real.
+
+Usage:
+    python bin/benchmark_urlreverse_dispatch.py [--network] [--repeat N] [urls_file]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from unittest.mock import patch
+
+from metapub.urlreverse import methods
+
+
+DEFAULT_URLS_FILE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'urlreverse_test_urls.txt')
+
+
+def legacy_try_doi_methods(url):
+    for method in methods.DOI_METHODS:
+        doi = method(url)
+        if doi:
+            return {'doi': doi, 'method': method}
+    return None
+
+
+def counting(calls, network):
+    """Wrap every DOI method so calls are counted; network-backed ones are stubbed unless network=True."""
+    network_methods = set(methods.NETWORK_DOI_METHODS)
+
+    def wrap(method):
+        def wrapper(url):
+            calls[method.__name__] += 1
+            if method in network_methods and not network:
+                return None
+            return method(url)
+        wrapper.__name__ = method.__name__
+        return wrapper
+
+    wrapped = {method: wrap(method) for method in methods.DOI_METHODS}
+    return [
+        patch.object(methods, 'DOI_METHODS', [wrapped[m] for m in methods.DOI_METHODS]),
+        patch.object(methods, 'DOI_METHODS_BY_DOMAIN',
+                     {domain: wrapped[m] for domain, m in methods.DOI_METHODS_BY_DOMAIN.items()}),
+        patch.object(methods, 'NETWORK_DOI_METHODS', tuple(wrapped[m] for m in methods.NETWORK_DOI_METHODS)),
+        patch.object(methods, 'get_early_release_doi_from_link', wrapped[methods.get_early_release_doi_from_link]),
+        patch.object(methods, 'get_generic_doi_from_link', wrapped[methods.get_generic_doi_from_link]),
+        patch.object(methods, '_DOI_METHOD_ORDER', {wrapped[m]: i for i, m in enumerate(methods.DOI_METHODS)}),
+    ]
+
+
+def run(label, func, urls, repeat, network):
+    calls = Counter()
+    patches = counting(calls, network)
+    for patcher in patches:
+        patcher.start()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = func(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        for patcher in reversed(patches):
+            patcher.stop()
+
+    network_names = {m.__name__ for m in methods.NETWORK_DOI_METHODS}
+    network_calls = sum(count for name, count in calls.items() if name in network_names)
+    found = sum(1 for result in results.values() if result)
+    print('%-22s %8.2f ms/pass  %6i method calls  %5i network-capable  %3i/%i DOIs'
+          % (label, elapsed * 1000 / repeat, sum(calls.values()) // repeat,
+             network_calls // repeat, found, len(results)))
+    return {url: result and result['doi'] for url, result in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('urls_file', nargs='?', default=DEFAULT_URLS_FILE)
+    parser.add_argument('--network', action='store_true', help='run network-backed methods for real')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.urls_file) as fh:
+        urls = [line.strip() for line in fh if line.strip()]
+    repeat = 1 if args.network else args.repeat
+    print('%i urls, %i pass(es), network %s\n' % (len(urls), repeat, 'ON' if args.network else 'stubbed'))
+
+    legacy = run('legacy sequence', lambda urls: {url: legacy_try_doi_methods(url) for url in urls},
+                 urls, repeat, args.network)
+    routed = run('hostname dispatch', lambda urls: {url: methods.try_doi_methods(url) for url in urls},
+                 urls, repeat, args.network)
+    run('dispatch, regex first', methods.try_doi_methods_many, urls, repeat, args.network)
+
+    differences = [url for url in urls if legacy[url] != routed[url]]
+    print('\n%i url(s) resolved differently' % len(differences))
+    for url in differences:
+        print('  %s: %s -> %s' % (url, legacy[url], routed[url]))
+
+
+if __name__ == '__main__':
+    main()
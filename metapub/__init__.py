@@ -8,6 +8,7 @@ from .medgenfetcher import MedGenFetcher
 from .medgenconcept import MedGenConcept
 from .clinvarfetcher import ClinVarFetcher
 from .clinvarvariant import ClinVarVariant
+from .clinvarrelease import ClinVarVCVRelease
 from .crossref import CrossRefFetcher
 from .findit import FindIt
 from .dx_doi import DxDOI
@@ -4,36 +4,36 @@ from lxml_html_clean.clean import Cleaner
 from .exceptions import MetaPubError, BaseXMLError
 
 
+def _linkset_ids(linkset):
+    """ IDs linked from one elink LinkSet: the Link Ids of its first LinkSetDb ([] if none). """
+    linksetdb = linkset.find('LinkSetDb')
+    if linksetdb is None or not linksetdb.findtext('LinkName'):
+        return []
+    return [link_id.text for link_id in linksetdb.findall('Link/Id')]
+
+
 def parse_elink_response(xmlstr):
     """ return all Ids from an elink XML response
 
+    Responses with several LinkSets (one per source ID, as returned when IDs are sent as
+    separate id= parameters) are merged, keeping the first occurrence of each ID.
+
     :param xmlstr:
     :return: list of IDs, or None if XML response empty
     """
     dom = etree.fromstring(xmlstr)
-    ids = []
-
-    linkname_elem = dom.find('LinkSet/LinkSetDb/LinkName')
-    if linkname_elem is not None:
-        if linkname_elem.text:
-            linkset = dom.find('LinkSet/LinkSetDb')
-            for link in linkset.getchildren():
-                if link.find('Id') is not None:
-                    ids.append(link.find('Id').text)
-            return ids
-
-    # Medgen->Pubmed elink result with "0" in IDList
-    """ <eLinkResult><LinkSet><DbFrom>medgen</DbFrom><IdList><Id>0</Id></IdList></LinkSet></eLinkResult> """
-    idlist_elem = dom.find('LinkSet/IdList')
-    if idlist_elem is not None and len(idlist_elem.getchildren()) > 0:
-        for item in idlist_elem.getchildren():
-            if item.find('Id') is not None:
-                ids.append(link.find('Id').text)
-        if len(ids) == 1 and ids[0] == '0':
-            return []
-        else:
-            return ids
-    return None
+    ids = {}
+    found = False
+
+    for linkset in dom.findall('LinkSet'):
+        # A LinkSet with only an IdList holds the source ID(s) and no links, e.g. this
+        # Medgen->Pubmed elink result with "0" in IdList:
+        # <eLinkResult><LinkSet><DbFrom>medgen</DbFrom><IdList><Id>0</Id></IdList></LinkSet></eLinkResult>
+        if linkset.findtext('LinkSetDb/LinkName') or linkset.find('IdList/Id') is not None:
+            found = True
+        ids.update(dict.fromkeys(_linkset_ids(linkset)))
+
+    return list(ids) if found else None
 
 
 class MetaPubObject(object):
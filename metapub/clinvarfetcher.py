@@ -1,15 +1,29 @@
 """ metapub.clinvarfetcher: tools for interacting with ClinVar data """
 
-# TODO: Add logging
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from lxml import etree
 from .clinvarvariant import ClinVarVariant, IdLocations
+from .clinvarindex import ClinVarIndex, CLINVAR_INDEX_FILENAME
 from .exceptions import MetaPubError, BaseXMLError
 from .eutils_common import get_eutils_client
 from .cache_utils import get_cache_path 
 from .base import Borg, parse_elink_response
 from .ncbi_errors import diagnose_ncbi_error, NCBIServiceError
 
+log = logging.getLogger('metapub.clinvarfetcher')
+
+# VCV documents are large; keep batched efetch responses to a manageable size.
+VCV_BATCH_SIZE = 50
+
+VCV_RESULT_SET = '<ClinVarResult-Set>%s</ClinVarResult-Set>'
+
+# esearch returns at most 10,000 IDs per request.
+ESEARCH_PAGE_SIZE = 10000
+
+
 class ClinVarFetcher(Borg):
     """ ClinVarFetcher (a Borg singleton object)
 
@@ -30,6 +44,23 @@ class ClinVarFetcher(Borg):
 
         cv_ids = clinvar.ids_by_gene('FGFR3', single_gene=True)
 
+    ids_by_gene returns the first 500 IDs. To get all of them, page through the search (IDs
+    are yielded as each page arrives), or stream the variants themselves, which are fetched
+    in batches in the background while you work through the previous ones:
+
+        for cv_id in clinvar.iter_ids_by_gene('BRCA1'):
+            ...
+
+        for var in clinvar.iter_variants_by_gene('BRCA1'):
+            ...
+
+    Get a ClinVarVariant (parsed VCV record) for an ID, or for many IDs at once
+    (fetched VCV_BATCH_SIZE per request; invalid IDs map to None):
+
+        var = clinvar.variant(12000)
+
+        variants = clinvar.variants([12000, 12001, 12002])
+
     Get ClinVar accession in python dictionary format for given ID:
 
         cv_subm = clinvar.accession(65533)  # can also submit ID as string 
@@ -38,24 +69,41 @@ class ClinVarFetcher(Borg):
 
         pmids = clinvar.pmids_for_id(65533)  # can also submit ID as string
 
+    ...or for many ClinVar IDs at once (dict of ID -> pmids; 200 IDs per request):
+
+        pmids_by_id = clinvar.pmids_for_ids([65533, 65534])
+
     Get list of pubmed IDs (pmids) for hgvs string:
 
         pmids = clinvar.pmids_for_hgvs('NM_017547.3:c.1289A>G')
 
+    Local index
+    -----------
+
+    With method='local', ids_for_variant, ids_by_gene, pmids_for_id and pmids_for_hgvs are
+    answered from a local SQLite index of the ClinVar release (see metapub.clinvarindex;
+    build it with `metapub-clinvar-index download --update`). Other lookups still use
+    E-utilities. IDs from the index are ClinVar VariationIDs.
+
+        clinvar = ClinVarFetcher(method='local')
+
     For more info, see the ClinVar eutils page:
     https://www.ncbi.nlm.nih.gov/clinvar/docs/maintenance_use/
     """
 
     _cache_filename = 'clinvarfetcher.db'
 
-    def __init__(self, method='eutils', cachedir='default'):
+    def __init__(self, method='eutils', cachedir='default', index_path=None):
         """Initialize ClinVarFetcher for clinical variant data retrieval.
         
         Args:
-            method (str, optional): Service method to use. Currently only 'eutils'
-                is supported. Defaults to 'eutils'.
+            method (str, optional): Service method to use: 'eutils', or 'local' to answer
+                ID, gene, HGVS and citation lookups from the local ClinVar index.
+                Defaults to 'eutils'.
             cachedir (str, optional): Directory for caching responses. Use 'default'
                 for system cache directory. Defaults to 'default'.
+            index_path (str, optional): ClinVar index database for method='local'.
+                Defaults to clinvar_index.db in cachedir.
         
         Raises:
             NotImplementedError: If an unsupported method is specified.
@@ -68,17 +116,30 @@ class ClinVarFetcher(Borg):
         self.method = method
         self._cache_path = None
 
-        if method=='eutils':
+        if method in ('eutils', 'local'):
             self._cache_path = get_cache_path(cachedir, self._cache_filename)
             self.qs = get_eutils_client(self._cache_path) 
             self.ids_by_gene = self._eutils_ids_by_gene
             self.get_accession = self._eutils_get_accession
             self.pmids_for_id = self._eutils_pmids_for_id
+            self.pmids_for_ids = self._eutils_pmids_for_ids
             self.ids_for_variant = self._eutils_ids_for_variant
             self.pmids_for_hgvs = self._eutils_pmids_for_hgvs
             self.variant = self._eutils_get_variant_summary
+            self.variants = self._eutils_get_variants
+            self.iter_ids_by_gene = self._eutils_iter_ids_by_gene
+            self.iter_variants_by_gene = self._iter_variants_by_gene
+
+            if method == 'local':
+                self.index = ClinVarIndex(index_path or get_cache_path(cachedir, CLINVAR_INDEX_FILENAME))
+                self.ids_by_gene = self.index.ids_by_gene
+                self.pmids_for_id = self.index.pmids_for_id
+                self.pmids_for_ids = self.index.pmids_for_ids
+                self.ids_for_variant = self.index.ids_for_variant
+                self.pmids_for_hgvs = self.index.pmids_for_hgvs
+                self.iter_ids_by_gene = lambda gene, single_gene=False: iter(self.index.ids_by_gene(gene, single_gene))
         else:
-            raise NotImplementedError('coming soon: fetch from local clinvar via medgen-mysql.')
+            raise NotImplementedError("method must be 'eutils' or 'local'")
 
     def _eutils_get_accession(self, accession_id):
         """ returns python dict of info for given ClinVar accession ID.
@@ -124,9 +185,102 @@ class ClinVarFetcher(Borg):
             # empty XML document == invalid variant ID
             raise MetaPubError('Invalid ClinVar Variation ID')
 
+    def _eutils_get_variants(self, accession_ids, id_from: IdLocations = 'entrez', batch_size=VCV_BATCH_SIZE):
+        """ Batched variant(): returns ClinVarVariants for many IDs, fetching up to batch_size
+        VCV records per efetch request.
+
+        Each record is split out of the ClinVarResult-Set response and cached under the same
+        key that variant() uses for that single ID, so single and batched lookups share the
+        cache. Invalid IDs (for which variant() would raise MetaPubError) map to None.
+
+        :param: accession_ids (list of integers or strings)
+        :param: id_from (string, either 'clinvar' or 'entrez') -- see variant()
+        :param: batch_size (int) [default: VCV_BATCH_SIZE]
+        :return: dict of ID (str) -> ClinVarVariant or None
+        """
+        client = self.qs.client
+        ids = list(dict.fromkeys(str(accession_id).strip() for accession_id in accession_ids))
+        variants = dict.fromkeys(ids)
+
+        todo = []
+        for accession_id in ids:
+            if not accession_id.isdigit():
+                continue
+            cached = client.cached_response('efetch', **self._vcv_params(accession_id, id_from))
+            if cached:
+                variants[accession_id] = self._variant_or_none(cached)
+            else:
+                todo.append(accession_id)
+
+        for start in range(0, len(todo), batch_size):
+            records = self._fetch_vcv_records(todo[start:start + batch_size], id_from)
+            client.cache_responses('efetch', [(self._vcv_params(accession_id, id_from), xmlstr)
+                                              for accession_id, xmlstr in records.items()])
+            for accession_id, xmlstr in records.items():
+                variants[accession_id] = self._variant_or_none(xmlstr)
+
+        invalid = [accession_id for accession_id, variant in variants.items() if variant is None]
+        if invalid:
+            log.info('Invalid ClinVar %s IDs: %s', id_from, ', '.join(invalid))
+        return variants
+
+    @staticmethod
+    def _vcv_params(accession_id, id_from):
+        """ efetch parameters for a single-ID VCV request, as variant() sends them. """
+        params = {'db': 'clinvar', 'id': accession_id, 'rettype': 'vcv', 'retmode': 'text'}
+        if id_from == 'clinvar':
+            params['is_variationid'] = 'true'
+        return params
+
+    @staticmethod
+    def _variant_or_none(xmlstr):
+        try:
+            return ClinVarVariant(xmlstr)
+        except BaseXMLError:
+            return None
+
+    def _fetch_vcv_records(self, accession_ids, id_from):
+        """ Fetch VCV records for accession_ids in one efetch and split the ClinVarResult-Set.
+
+        Records are matched to IDs by their VariationID attribute; for ClinVar, Entrez UIDs
+        are VariationIDs too. Only if the returned VariationIDs don't cover the requested
+        Entrez UIDs are records matched by position; if some UIDs were invalid (fewer records
+        than requested), the batch is split in half and each half refetched.
+
+        :return: dict of ID -> single-record ClinVarResult-Set XML string (invalid IDs absent)
+        """
+        params = self._vcv_params(','.join(accession_ids), id_from)
+        content = self.qs.client.fetch_uncached('efetch', **params)
+        archives = etree.fromstring(content.encode('utf-8')).findall('VariationArchive')
+        by_variation_id = {archive.get('VariationID'): archive for archive in archives}
+
+        if id_from == 'clinvar' or by_variation_id.keys() >= set(accession_ids):
+            pairs = [(accession_id, by_variation_id[accession_id])
+                     for accession_id in accession_ids if accession_id in by_variation_id]
+        elif len(archives) == len(accession_ids):
+            pairs = zip(accession_ids, archives)
+        elif len(accession_ids) == 1 or not archives:
+            return {}
+        else:
+            half = len(accession_ids) // 2
+            records = self._fetch_vcv_records(accession_ids[:half], id_from)
+            records.update(self._fetch_vcv_records(accession_ids[half:], id_from))
+            return records
+
+        return {accession_id: VCV_RESULT_SET % etree.tostring(archive, encoding='unicode')
+                for accession_id, archive in pairs}
+
+    @staticmethod
+    def _gene_term(gene, single_gene):
+        term = gene + '[gene]'
+        if single_gene:
+            term += ' AND single_gene[prop]'
+        return term
+
     def _eutils_ids_by_gene(self, gene, single_gene=False):
         """
         searches ClinVar for specified gene (HUGO); returns up to 500 matching results.
+        (Use iter_ids_by_gene to get all of them.)
 
         :param: gene (string) - gene name in HUGO naming convention.
         :param: single_gene (bool) [default: False] - restrict results to single-gene accessions.
@@ -138,8 +292,8 @@ class ClinVarFetcher(Borg):
         result = self.qs.esearch(
             {
                 "db": "clinvar",
-                "term": gene + "[gene]",
-                "single_gene": single_gene,
+                "term": self._gene_term(gene, single_gene),
+                "retmax": 500,
                 "sort": "relevance",
             }
         )
@@ -150,6 +304,63 @@ class ClinVarFetcher(Borg):
             ids.append(item.text.strip())
         return ids
 
+    def _eutils_iter_ids_by_gene(self, gene, single_gene=False, page_size=ESEARCH_PAGE_SIZE):
+        """ yields every ClinVar id for specified gene, paging through esearch results
+        page_size at a time.
+
+        :param: gene (string) - gene name in HUGO naming convention.
+        :param: single_gene (bool) [default: False] - restrict results to single-gene accessions.
+        :param: page_size (int) [default: ESEARCH_PAGE_SIZE]
+        :return: generator of clinvar ids (strings)
+        """
+        term = self._gene_term(gene, single_gene)
+        retstart = 0
+        count = None
+        while count is None or retstart < count:
+            result = self.qs.esearch({'db': 'clinvar', 'term': term, 'retmax': page_size, 'retstart': retstart})
+            dom = etree.fromstring(result)
+            if count is None:
+                count = int(dom.findtext('Count') or 0)
+                log.debug('iter_ids_by_gene: %i ClinVar ids for %s', count, term)
+            ids = [item.text.strip() for item in dom.findall('IdList/Id')]
+            if not ids:
+                break
+            yield from ids
+            retstart += len(ids)
+
+    def _iter_variants_by_gene(self, gene, single_gene=False, batch_size=VCV_BATCH_SIZE, prefetch=2):
+        """ yields a ClinVarVariant for every ClinVar id for specified gene (see iter_ids_by_gene).
+
+        Variants are fetched batch_size at a time (see variants()); up to `prefetch` batches are
+        fetched in the background while earlier ones are being consumed. Invalid ids are skipped.
+
+        :param: gene (string) - gene name in HUGO naming convention.
+        :param: single_gene (bool) [default: False] - restrict results to single-gene accessions.
+        :param: batch_size (int) [default: VCV_BATCH_SIZE]
+        :param: prefetch (int) [default: 2] - batches to fetch ahead of the consumer.
+        :return: generator of ClinVarVariant objects
+        """
+        # esearch yields Entrez UIDs; the local index yields VariationIDs.
+        id_from = 'clinvar' if self.method == 'local' else 'entrez'
+        with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+            pending = deque()
+            batch = []
+            for clinvar_id in self.iter_ids_by_gene(gene, single_gene):
+                batch.append(clinvar_id)
+                if len(batch) == batch_size:
+                    pending.append(executor.submit(self.variants, batch, id_from, batch_size))
+                    batch = []
+                while len(pending) > prefetch:
+                    yield from self._valid_variants(pending.popleft())
+            if batch:
+                pending.append(executor.submit(self.variants, batch, id_from, batch_size))
+            while pending:
+                yield from self._valid_variants(pending.popleft())
+
+    @staticmethod
+    def _valid_variants(future):
+        return (variant for variant in future.result().values() if variant is not None)
+
     def _eutils_pmids_for_id(self, clinvar_id):
         """
         example:
@@ -161,6 +372,19 @@ class ClinVarFetcher(Borg):
         xmlstr = self.qs.elink({'dbfrom': 'clinvar', 'id': clinvar_id, 'db': 'pubmed'})
         return parse_elink_response(xmlstr)
 
+    def _eutils_pmids_for_ids(self, clinvar_ids, batch_size=200):
+        """ Batched pmids_for_id: looks up pubmed IDs for up to batch_size ClinVar IDs per
+        elink request.
+
+        :param: clinvar_ids (list of integers or strings)
+        :param: batch_size (int) [default: 200]
+        :return: dict of clinvar ID (str) -> list of pubmed IDs (strings)
+        """
+        clinvar_ids = list(dict.fromkeys(str(clinvar_id).strip() for clinvar_id in clinvar_ids))
+        results = self.qs.client.elink_many('clinvar', clinvar_ids, db='pubmed', batch_size=batch_size)
+        return {clinvar_id: parse_elink_response(results[clinvar_id]) or [] if clinvar_id in results else []
+                for clinvar_id in clinvar_ids}
+
     def _eutils_ids_for_variant(self, hgvs_c):
         """ returns ClinVar IDs for given HGVS c. string
 
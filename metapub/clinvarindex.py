@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+"""metapub.clinvarindex -- local SQLite index of ClinVar variants, genes, HGVS and citations.
+
+Built from the ClinVar full VCV release (see metapub.clinvarrelease), the index answers
+the ClinVarFetcher lookups that otherwise take one or more E-utilities requests each:
+
+    ids_for_variant(hgvs)    ids_by_gene(gene)    pmids_for_id(id)    pmids_for_hgvs(hgvs)
+
+IDs in the index are ClinVar VariationIDs.
+
+Build or refresh it from the command line (an update only rewrites records whose
+version or DateLastUpdated changed):
+
+    metapub-clinvar-index download                  # fetch the latest release into the cachedir
+    metapub-clinvar-index update ClinVarVCVRelease_00-latest.xml.gz
+    metapub-clinvar-index info
+
+and use it through ClinVarFetcher(method='local'), or directly:
+
+    from metapub.clinvarindex import ClinVarIndex
+
+    index = ClinVarIndex()
+    index.pmids_for_hgvs('NM_000548.4(TSC2):c.1832G>A')
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Optional
+
+import requests
+
+from .cache_utils import get_cache_path
+from .clinvarrelease import ClinVarVCVRelease, CLINVAR_VCV_RELEASE_URL
+from .config import DEFAULT_CACHE_DIR
+from .exceptions import MetaPubError
+from .utils import download_file
+
+log = logging.getLogger('metapub.clinvarindex')
+
+CLINVAR_INDEX_FILENAME = 'clinvar_index.db'
+
+# Records written per transaction during update()
+UPDATE_BATCH_SIZE = 5000
+
+re_accession = re.compile(r'^VCV0*(\d+)(?:\.\d+)?$', re.IGNORECASE)
+# NM_000548.4(TSC2):c.1832G>A -> NM_000548.4:c.1832G>A
+re_hgvs_gene = re.compile(r'\([^)]*\)(?=:)')
+
+
+def normalize_hgvs(hgvs_text):
+    """ Reduce an HGVS expression or ClinVar variation name to the form used as an index key.
+
+    Drops the gene symbol in parentheses and any trailing protein change, so that
+    'NM_000548.4(TSC2):c.1832G>A (p.Arg611Gln)' and 'NM_000548.4:c.1832G>A' match.
+    """
+    return re_hgvs_gene.sub('', hgvs_text.strip()).split(' ')[0]
+
+
+class ClinVarIndex:
+    """SQLite index of ClinVar records built from VCV release files.
+
+    Args:
+        db_path: Path to the index database. If None, clinvar_index.db in DEFAULT_CACHE_DIR.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_cache_path(DEFAULT_CACHE_DIR, CLINVAR_INDEX_FILENAME)
+        self._conn = None
+        self._ensure_database()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get database connection, creating if needed."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+        return self._conn
+
+    def _ensure_database(self):
+        """Create database tables if they don't exist."""
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS variants (
+                variation_id INTEGER PRIMARY KEY,
+                accession TEXT,
+                version INTEGER,
+                name TEXT,
+                variation_type TEXT,
+                record_type TEXT,
+                date_last_updated TEXT,
+                gene_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS hgvs (
+                expression TEXT NOT NULL,
+                variation_id INTEGER NOT NULL,
+                PRIMARY KEY (expression, variation_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS genes (
+                symbol TEXT NOT NULL COLLATE NOCASE,
+                variation_id INTEGER NOT NULL,
+                PRIMARY KEY (symbol, variation_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS citations (
+                variation_id INTEGER NOT NULL,
+                pmid INTEGER NOT NULL,
+                PRIMARY KEY (variation_id, pmid)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_variants_accession ON variants (accession)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_hgvs_variation_id ON hgvs (variation_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_genes_variation_id ON genes (variation_id)')
+        conn.commit()
+        log.debug('ClinVar index initialized at %s', self.db_path)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # -- building --------------------------------------------------------------------------
+
+    def update(self, path, prune=False):
+        """Add or refresh records from a ClinVar VCV release file (gzipped or not).
+
+        Records whose version and DateLastUpdated match the index are skipped, so re-running
+        against a newer release only rewrites what changed.
+
+        :param: path (str) -- release file, or any file of VariationArchive records
+        :param: prune (bool) -- remove indexed records not in this file (use with full releases)
+        :return: dict of counts: read, added, updated, unchanged, removed
+        """
+        conn = self._get_connection()
+        release = ClinVarVCVRelease(path)
+        stats = {'read': 0, 'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+        if prune:
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen (variation_id INTEGER PRIMARY KEY)')
+            conn.execute('DELETE FROM seen')
+
+        batch = []
+        for record in release.records():
+            stats['read'] += 1
+            variation_id = int(record['variation_id'])
+            if prune:
+                conn.execute('INSERT OR IGNORE INTO seen VALUES (?)', (variation_id,))
+
+            row = conn.execute('SELECT version, date_last_updated FROM variants WHERE variation_id = ?',
+                               (variation_id,)).fetchone()
+            version = int(record['version']) if record['version'] else None
+            if row is None:
+                stats['added'] += 1
+            elif row == (version, record['date_last_updated']):
+                stats['unchanged'] += 1
+                continue
+            else:
+                stats['updated'] += 1
+
+            batch.append(record)
+            if len(batch) >= UPDATE_BATCH_SIZE:
+                self._write_records(batch)
+                batch = []
+        self._write_records(batch)
+
+        if prune:
+            stale = [row[0] for row in conn.execute(
+                'SELECT variation_id FROM variants WHERE variation_id NOT IN (SELECT variation_id FROM seen)')]
+            with conn:
+                self._delete_records(stale)
+                conn.execute('DROP TABLE seen')
+            stats['removed'] = len(stale)
+
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             [('source', os.path.abspath(path)),
+                              ('release_date', release.release_date),
+                              ('updated', datetime.now().isoformat(timespec='seconds'))])
+        log.info('ClinVar index update from %s: %s', path, stats)
+        return stats
+
+    def _delete_records(self, variation_ids):
+        params = [(variation_id,) for variation_id in variation_ids]
+        for table in ('variants', 'hgvs', 'genes', 'citations'):
+            self._get_connection().executemany('DELETE FROM %s WHERE variation_id = ?' % table, params)
+
+    def _write_records(self, records):
+        """Replace the rows for each record (dicts as produced by clinvarrelease.vcv_record)."""
+        if not records:
+            return
+        with self._get_connection() as conn:
+            self._delete_records(int(record['variation_id']) for record in records)
+            conn.executemany('INSERT OR REPLACE INTO variants VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+                (int(r['variation_id']), r['accession'], int(r['version']) if r['version'] else None,
+                 r['name'], r['variation_type'], r['record_type'], r['date_last_updated'], len(r['genes']))
+                for r in records])
+            conn.executemany('INSERT OR IGNORE INTO hgvs VALUES (?, ?)', [
+                (expression, int(r['variation_id']))
+                for r in records
+                for expression in {normalize_hgvs(text) for text in r['hgvs'] + [r['name'] or '']} if expression])
+            conn.executemany('INSERT OR IGNORE INTO genes VALUES (?, ?)', [
+                (symbol, int(r['variation_id'])) for r in records for symbol in r['genes']])
+            conn.executemany('INSERT OR IGNORE INTO citations VALUES (?, ?)', [
+                (int(r['variation_id']), int(pmid)) for r in records for pmid in r['pmids']])
+
+    # -- lookups (same signatures and return types as ClinVarFetcher's eutils methods) -------
+
+    def ids_for_variant(self, hgvs_text):
+        """ returns ClinVar VariationIDs for given HGVS expression (or VCV accession).
+
+        :param: hgvs_text (string)
+        :return: list of ClinVar IDs (strings)
+        """
+        match = re_accession.match(hgvs_text.strip())
+        if match:
+            rows = self._get_connection().execute('SELECT variation_id FROM variants WHERE variation_id = ?',
+                                      (int(match.group(1)),))
+        else:
+            rows = self._get_connection().execute('SELECT variation_id FROM hgvs WHERE expression = ? ORDER BY variation_id',
+                                      (normalize_hgvs(hgvs_text),))
+        return [str(row[0]) for row in rows]
+
+    def ids_by_gene(self, gene, single_gene=False):
+        """ returns all ClinVar VariationIDs for specified gene (HUGO symbol, case-insensitive).
+
+        :param: gene (string)
+        :param: single_gene (bool) [default: False] - restrict results to single-gene variants.
+        :return: list of ClinVar IDs (strings)
+        """
+        sql = 'SELECT genes.variation_id FROM genes'
+        if single_gene:
+            sql += ' JOIN variants USING (variation_id) WHERE symbol = ? AND gene_count = 1'
+        else:
+            sql += ' WHERE symbol = ?'
+        rows = self._get_connection().execute(sql + ' ORDER BY genes.variation_id', (gene.strip(),))
+        return [str(row[0]) for row in rows]
+
+    def pmids_for_id(self, clinvar_id):
+        """ returns PubMed IDs cited by a ClinVar record.
+
+        :param: clinvar_id (integer or string) -- VariationID or VCV accession
+        :return: list of pubmed IDs (strings)
+        """
+        match = re_accession.match(str(clinvar_id).strip())
+        variation_id = int(match.group(1)) if match else int(clinvar_id)
+        rows = self._get_connection().execute('SELECT pmid FROM citations WHERE variation_id = ? ORDER BY pmid',
+                                  (variation_id,))
+        return [str(row[0]) for row in rows]
+
+    def pmids_for_ids(self, clinvar_ids, batch_size=None):
+        """ returns dict of ClinVar ID (str) -> PubMed IDs (see pmids_for_id).
+
+        batch_size is accepted for compatibility with ClinVarFetcher.pmids_for_ids and ignored.
+        """
+        return {str(clinvar_id).strip(): self.pmids_for_id(clinvar_id) for clinvar_id in clinvar_ids}
+
+    def pmids_for_hgvs(self, hgvs_text):
+        """ returns PubMed IDs cited by the ClinVar records for given HGVS expression.
+
+        :param: hgvs_text (string)
+        :return: list of pubmed IDs (strings)
+        """
+        rows = self._get_connection().execute('''
+            SELECT DISTINCT pmid FROM citations
+            WHERE variation_id IN (SELECT variation_id FROM hgvs WHERE expression = ?)
+            ORDER BY pmid''', (normalize_hgvs(hgvs_text),))
+        return [str(row[0]) for row in rows]
+
+    def info(self):
+        """ returns dict of record counts plus the meta entries (source, release_date, updated). """
+        conn = self._get_connection()
+        info = dict(conn.execute('SELECT key, value FROM meta'))
+        for table in ('variants', 'hgvs', 'genes', 'citations'):
+            info[table] = conn.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+        return info
+
+
+def download_release(cachedir=DEFAULT_CACHE_DIR, url=CLINVAR_VCV_RELEASE_URL):
+    """ Stream the ClinVar VCV release to cachedir; returns the local path. """
+    return download_file(url, get_cache_path(cachedir, url.rsplit('/', 1)[-1]))
+
+
+def cmd_download(args):
+    """Download the latest ClinVar VCV release."""
+    print(f"Downloading {args.url} ...")
+    path = download_release(args.cachedir, args.url)
+    print(f"Saved {path}")
+    if args.update:
+        args.release = path
+        cmd_update(args)
+
+
+def cmd_update(args):
+    """Add new and changed records from a release file to the index."""
+    index = ClinVarIndex(args.db)
+    print(f"Updating {index.db_path} from {args.release} ...")
+    stats = index.update(args.release, prune=args.prune)
+    print(f"Done. Read {stats['read']}: {stats['added']} added, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} removed.")
+
+
+def cmd_info(args):
+    """Show what the index contains."""
+    index = ClinVarIndex(args.db)
+    print(index.db_path)
+    for key, value in index.info().items():
+        print(f"  {key}: {value}")
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Build and update the local ClinVar index used by ClinVarFetcher(method='local')",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  metapub-clinvar-index download --update          # Fetch the latest release and index it
+  metapub-clinvar-index update release.xml.gz      # Index new and changed records
+  metapub-clinvar-index update release.xml.gz --prune   # ...and drop records no longer released
+  metapub-clinvar-index info
+        """
+    )
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Enable verbose logging')
+    parser.add_argument('--db', type=str, default=None,
+                        help='Index database (default: %s in the cache directory)' % CLINVAR_INDEX_FILENAME)
+
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    download_parser = subparsers.add_parser('download', help='Download the latest ClinVar VCV release')
+    download_parser.add_argument('--cachedir', type=str, default=DEFAULT_CACHE_DIR,
+                                 help='Where to save the release (default: %(default)s)')
+    download_parser.add_argument('--url', type=str, default=CLINVAR_VCV_RELEASE_URL,
+                                 help='Release URL (default: %(default)s)')
+    download_parser.add_argument('--update', action='store_true',
+                                 help='Update the index from the downloaded release')
+    download_parser.add_argument('--prune', action='store_true',
+                                 help='With --update, remove records not in the release')
+    download_parser.set_defaults(func=cmd_download)
+
+    update_parser = subparsers.add_parser('update', help='Index new and changed records from a release file')
+    update_parser.add_argument('release', help='ClinVar VCV release file (.xml or .xml.gz)')
+    update_parser.add_argument('--prune', action='store_true',
+                               help='Remove indexed records not in this file (for full releases)')
+    update_parser.set_defaults(func=cmd_update)
+
+    info_parser = subparsers.add_parser('info', help='Show index statistics')
+    info_parser.set_defaults(func=cmd_info)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s')
+    try:
+        args.func(args)
+    except (MetaPubError, OSError, requests.exceptions.RequestException) as error:
+        print(f"❌ {error}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
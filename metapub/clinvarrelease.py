@@ -0,0 +1,114 @@
+"""metapub.clinvarrelease -- stream records from the ClinVar full VCV XML release.
+
+NCBI publishes every ClinVar record as one (multi-gigabyte) gzipped XML file:
+
+    https://ftp.ncbi.nlm.nih.gov/pub/clinvar/xml/ClinVarVCVRelease_00-latest.xml.gz
+
+ClinVarVCVRelease reads it with lxml's iterparse, so each VariationArchive element
+is parsed exactly once and dropped from the document tree as soon as it has been
+handed over. Memory stays flat however large the release is.
+
+Usage:
+
+    from metapub.clinvarrelease import ClinVarVCVRelease
+
+    release = ClinVarVCVRelease('ClinVarVCVRelease_00-latest.xml.gz')
+    for variant in release:                     # ClinVarVariant objects
+        print(variant.variation_id, variant.clinical_significance)
+
+    for record in release.records():            # compact dicts; much faster
+        print(record['variation_id'], record['genes'], record['pmids'])
+"""
+
+import logging
+
+from lxml import etree
+
+from .clinvarvariant import ClinVarVariant
+from .utils import open_maybe_gzipped
+
+log = logging.getLogger('metapub.clinvarrelease')
+
+CLINVAR_VCV_RELEASE_URL = 'https://ftp.ncbi.nlm.nih.gov/pub/clinvar/xml/ClinVarVCVRelease_00-latest.xml.gz'
+
+# Where a record's own alleles live: a simple variant, or the alleles making up a haplotype.
+ALLELE_PATHS = ('ClassifiedRecord/SimpleAllele', 'ClassifiedRecord/Haplotype/SimpleAllele')
+
+
+def vcv_record(archive):
+    """ Compact summary of a VariationArchive element, for indexing.
+
+    :param: archive (lxml element)
+    :return: dict with keys variation_id, accession, version, name, variation_type,
+             record_type, date_last_updated, genes (symbols), hgvs (expressions) and
+             pmids (cited PubMed IDs)
+    """
+    genes = []
+    hgvs = []
+    for path in ALLELE_PATHS:
+        for allele in archive.iterfind(path):
+            for gene in allele.iterfind('GeneList/Gene'):
+                if gene.get('Symbol') and gene.get('Symbol') not in genes:
+                    genes.append(gene.get('Symbol'))
+            for expression in allele.iterfind('HGVSlist/HGVS/*/Expression'):
+                if expression.text and expression.text not in hgvs:
+                    hgvs.append(expression.text)
+
+    pmids = {elem.text.strip() for elem in archive.iterfind('.//Citation/ID[@Source="PubMed"]') if elem.text}
+
+    return {'variation_id': archive.get('VariationID'),
+            'accession': archive.get('Accession'),
+            'version': archive.get('Version'),
+            'name': archive.get('VariationName'),
+            'variation_type': archive.get('VariationType'),
+            'record_type': archive.get('RecordType'),
+            'date_last_updated': archive.get('DateLastUpdated'),
+            'genes': genes,
+            'hgvs': hgvs,
+            'pmids': sorted(pmids, key=int),
+            }
+
+
+class ClinVarVCVRelease(object):
+    """ Iterable over the VariationArchive records of a ClinVar VCV release file.
+
+    :param: path (str) -- release file, gzipped or not (or a smaller file in the same format,
+            such as a ClinVarResult-Set efetch response)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # ReleaseDate attribute of the root element, once reading has started
+        self.release_date = None
+
+    def __iter__(self):
+        return self.variants()
+
+    def archives(self):
+        """ Yield each VariationArchive element in the release.
+
+        Once the consumer moves on, the element is detached from the document tree, so only
+        elements the consumer still holds a reference to are kept in memory.
+        """
+        count = 0
+        with open_maybe_gzipped(self.path) as fh:
+            for _, archive in etree.iterparse(fh, events=('end',), tag='VariationArchive',
+                                              huge_tree=True, remove_blank_text=True):
+                yield archive
+                count += 1
+                parent = archive.getparent()
+                if parent is not None:
+                    self.release_date = self.release_date or parent.get('ReleaseDate')
+                    parent.remove(archive)
+        log.debug('Read %i VariationArchive records from %s', count, self.path)
+
+    def variants(self):
+        """ Yield a ClinVarVariant for each record, built from the parsed element (no re-parsing). """
+        for archive in self.archives():
+            yield ClinVarVariant(archive)
+
+    def records(self):
+        """ Yield a compact dict (see vcv_record) for each record. Each element is cleared after use. """
+        for archive in self.archives():
+            yield vcv_record(archive)
+            archive.clear()
@@ -2,6 +2,7 @@
 
 import logging
 from datetime import datetime
+from functools import cached_property
 from typing import Optional, Literal
 from dataclasses import dataclass
 
@@ -41,16 +42,26 @@ class PathogenicSummary:
 class ClinVarVariant(MetaPubObject):
 
     def __init__(self, xmlstr, *args, **kwargs):
-        # Try new VCV format first, fall back to old format for backwards compatibility
+        """ xmlstr: an efetch (rettype=vcv) response, an old-style VariationReport document, or an
+        already-parsed lxml element -- a VariationArchive or ClinVarResult-Set -- e.g. as streamed
+        from the full release by ClinVarVCVRelease. Elements are used as-is (xml is None).
+        """
         try:
-            # Parse the full XML document first to determine format
-            from lxml import etree
-            dom = etree.fromstring(xmlstr)
+            if isinstance(xmlstr, etree._Element):
+                self.xml = None
+                self.content = xmlstr
+            elif not xmlstr:
+                raise BaseXMLError('Empty XML document')
+            else:
+                # Parse once, then tell the formats apart by root element.
+                super(ClinVarVariant, self).__init__(xmlstr, None, args, kwargs)
 
-            if dom.tag == 'ClinVarResult-Set':
+            if self.content.tag == 'VariationArchive':
+                self._is_vcv_format = True
+                self.variation_archive = self.content
+            elif self.content.tag == 'ClinVarResult-Set':
                 # New VCV format
                 self._is_vcv_format = True
-                super(ClinVarVariant, self).__init__(xmlstr, None, args, kwargs)  # Parse full document
                 self.variation_archive = self.content.find('VariationArchive')
                 if self.variation_archive is None:
                     # Check if this is an empty result set (invalid ID)
@@ -62,7 +73,7 @@ class ClinVarVariant(MetaPubObject):
             else:
                 # Old format
                 self._is_vcv_format = False
-                super(ClinVarVariant, self).__init__(xmlstr, 'VariationReport', args, kwargs)
+                self.content = self.content.find('VariationReport')
                 self.variation_archive = None
         except (etree.XMLSyntaxError, BaseXMLError) as e:
             # If XML parsing fails completely, let it bubble up
@@ -103,41 +114,82 @@ class ClinVarVariant(MetaPubObject):
         self.date_last_evaluated = self._get_date_last_evaluated()
         self.number_of_submissions = self._get_number_of_submissions()
         self.number_of_submitters = self._get_number_of_submitters()
-        self.pathogenic_summary = self._get_pathogenic_summary()
 
         # VCV record metadata (new in VCV format)
         self.vcv_accession = self._get_vcv_accession()
         self.record_type = self._get_record_type()
         self.most_recent_submission = self._get_most_recent_submission()
 
-        # Associated conditions/diseases (new in VCV format)
-        self.associated_conditions = self._get_associated_conditions()
-
-        # Enhanced molecular consequences (new in VCV format)
-        self.molecular_consequences_detailed = self._get_molecular_consequences_detailed()
-
-        # Enhanced sequence details (new in VCV format)
-        self.sequence_details = self._get_sequence_details()
-
-        # Enhanced gene information (new in VCV format)
-        self.gene_dosage_info = self._get_gene_dosage_info()
-
         # Protein change summary (new in VCV format)
         self.protein_change = self._get_protein_change()
 
-        # Clinical assertions (new in VCV format)
-        self.clinical_assertions = self._get_clinical_assertions()
-
-        # Enhanced citations (new in VCV format)
-        self.citations = self._get_citations()
-
-        # Observations
-
+        # pathogenic_summary, associated_conditions, molecular_consequences_detailed,
+        # sequence_details, gene_dosage_info, clinical_assertions and citations are
+        # built on first access (see LAZY_ATTRIBUTES).
+
+    # Sub-structures that walk large parts of the record -- for heavily-submitted variants,
+    # thousands of ClinicalAssertion elements -- are computed on first access and memoized.
+    LAZY_ATTRIBUTES = ('pathogenic_summary', 'associated_conditions', 'molecular_consequences_detailed',
+                       'sequence_details', 'gene_dosage_info', 'clinical_assertions', 'citations')
+
+    @cached_property
+    def pathogenic_summary(self) -> Optional[PathogenicSummary]:
+        return self._get_pathogenic_summary()
+
+    @cached_property
+    def associated_conditions(self):
+        """ Associated conditions/diseases (new in VCV format) """
+        return self._get_associated_conditions()
+
+    @cached_property
+    def molecular_consequences_detailed(self):
+        """ Enhanced molecular consequences (new in VCV format) """
+        return self._get_molecular_consequences_detailed()
+
+    @cached_property
+    def sequence_details(self):
+        """ Enhanced sequence details (new in VCV format) """
+        return self._get_sequence_details()
+
+    @cached_property
+    def gene_dosage_info(self):
+        """ Enhanced gene information (new in VCV format) """
+        return self._get_gene_dosage_info()
+
+    @cached_property
+    def clinical_assertions(self):
+        """ Clinical assertions, with their observations (new in VCV format) """
+        return self._get_clinical_assertions()
+
+    @cached_property
+    def citations(self):
+        """ Enhanced citations (new in VCV format) """
+        return self._get_citations()
+
+    # Elements several of the _get_ methods start from, each looked up once.
+    _MEMO_KEYS = ('_simple_allele', '_germline_classification', '_clinical_assertion_list')
+
+    @cached_property
+    def _simple_allele(self):
+        return self.variation_archive.find('ClassifiedRecord/SimpleAllele') if self._is_vcv_format else None
+
+    @cached_property
+    def _germline_classification(self):
+        classifications = self.variation_archive.find('.//Classifications') if self._is_vcv_format else None
+        return classifications.find('GermlineClassification') if classifications is not None else None
+
+    @cached_property
+    def _clinical_assertion_list(self):
+        return self.variation_archive.find('.//ClinicalAssertionList') if self._is_vcv_format else None
 
     def to_dict(self):
         """ returns a dictionary composed of all extractable properties of this concept. """
+        for name in self.LAZY_ATTRIBUTES:
+            getattr(self, name)
         outd = self.__dict__.copy()
         outd.pop('content')
+        for key in self._MEMO_KEYS:
+            outd.pop(key, None)
         return outd
 
     ### HGVS string convenience properties
@@ -276,7 +328,7 @@ class ClinVarVariant(MetaPubObject):
 
         if self._is_vcv_format:
             # In VCV format: VariationArchive/ClassifiedRecord/SimpleAllele/GeneList/Gene
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 genelist = simple_allele.find('GeneList')
                 if genelist is not None:
@@ -306,7 +358,7 @@ class ClinVarVariant(MetaPubObject):
 
     def _get_allele_id(self):
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             return simple_allele.get('AlleleID') if simple_allele is not None else None
         else:
             allele_elem = self.content.find('Allele')
@@ -314,7 +366,7 @@ class ClinVarVariant(MetaPubObject):
 
     def _get_cytogenic_location(self):
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 location = simple_allele.find('Location/CytogeneticLocation')
                 return location.text if location is not None else None
@@ -326,7 +378,7 @@ class ClinVarVariant(MetaPubObject):
         seqlocs = []
 
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 for elem in simple_allele.findall('Location/SequenceLocation'):
                     seqlocs.append(dict(elem.items()))
@@ -341,7 +393,7 @@ class ClinVarVariant(MetaPubObject):
 
         if self._is_vcv_format:
             # In VCV format: VariationArchive/ClassifiedRecord/SimpleAllele/HGVSlist/HGVS
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 hgvs_list = simple_allele.find('HGVSlist')
                 if hgvs_list is not None:
@@ -375,7 +427,7 @@ class ClinVarVariant(MetaPubObject):
         xrefs = []
 
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 xref_list = simple_allele.find('XRefList')
                 if xref_list is not None:
@@ -393,7 +445,7 @@ class ClinVarVariant(MetaPubObject):
         molcons = []
 
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 molcon_list = simple_allele.find('MolecularConsequenceList')
                 if molcon_list is not None:
@@ -414,7 +466,7 @@ class ClinVarVariant(MetaPubObject):
         freqs = []
 
         if self._is_vcv_format:
-            simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+            simple_allele = self._simple_allele
             if simple_allele is not None:
                 freq_list = simple_allele.find('AlleleFrequencyList')
                 if freq_list is not None:
@@ -445,12 +497,10 @@ class ClinVarVariant(MetaPubObject):
             return None
 
         # Look in Classifications/GermlineClassification/Description
-        classifications = self.variation_archive.find('.//Classifications')
-        if classifications is not None:
-            germline_class = classifications.find('GermlineClassification')
-            if germline_class is not None:
-                desc_elem = germline_class.find('Description')
-                return (desc_elem.text).lower() if desc_elem is not None else None
+        germline_class = self._germline_classification
+        if germline_class is not None:
+            desc_elem = germline_class.find('Description')
+            return (desc_elem.text).lower() if desc_elem is not None else None
         return None
 
     def _get_review_status(self):
@@ -458,12 +508,10 @@ class ClinVarVariant(MetaPubObject):
         if not self._is_vcv_format:
             return None
 
-        classifications = self.variation_archive.find('.//Classifications')
-        if classifications is not None:
-            germline_class = classifications.find('GermlineClassification')
-            if germline_class is not None:
-                review_elem = germline_class.find('ReviewStatus')
-                return review_elem.text if review_elem is not None else None
+        germline_class = self._germline_classification
+        if germline_class is not None:
+            review_elem = germline_class.find('ReviewStatus')
+            return review_elem.text if review_elem is not None else None
         return None
 
     def _get_date_last_evaluated(self):
@@ -471,16 +519,14 @@ class ClinVarVariant(MetaPubObject):
         if not self._is_vcv_format:
             return None
 
-        classifications = self.variation_archive.find('.//Classifications')
-        if classifications is not None:
-            germline_class = classifications.find('GermlineClassification')
-            if germline_class is not None:
-                date_str = germline_class.get('DateLastEvaluated')
-                if date_str:
-                    try:
-                        return datetime.strptime(date_str, '%Y-%m-%d')
-                    except ValueError:
-                        return None
+        germline_class = self._germline_classification
+        if germline_class is not None:
+            date_str = germline_class.get('DateLastEvaluated')
+            if date_str:
+                try:
+                    return datetime.strptime(date_str, '%Y-%m-%d')
+                except ValueError:
+                    return None
         return None
 
     def _get_number_of_submissions(self):
@@ -560,7 +606,7 @@ class ClinVarVariant(MetaPubObject):
             return []
 
         consequences = []
-        simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+        simple_allele = self._simple_allele
         if simple_allele is not None:
             hgvs_list = simple_allele.find('HGVSlist')
             if hgvs_list is not None:
@@ -581,7 +627,7 @@ class ClinVarVariant(MetaPubObject):
             return []
 
         details = []
-        simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+        simple_allele = self._simple_allele
         if simple_allele is not None:
             location = simple_allele.find('Location')
             if location is not None:
@@ -621,7 +667,7 @@ class ClinVarVariant(MetaPubObject):
         counts: dict[ClinSig, int] = {}
         total = 0
         
-        assertion_list = self.variation_archive.find(".//ClinicalAssertionList")
+        assertion_list = self._clinical_assertion_list
         if assertion_list is not None:
             for assertion in assertion_list.findall('ClinicalAssertion'):
                 # TODO: ContributesToAggregateClassification doesn't seem to be inside ClinicalAssertion.
@@ -666,7 +712,7 @@ class ClinVarVariant(MetaPubObject):
             return []
 
         dosage_info = []
-        simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+        simple_allele = self._simple_allele
         if simple_allele is not None:
             gene_list = simple_allele.find('GeneList')
             if gene_list is not None:
@@ -698,7 +744,7 @@ class ClinVarVariant(MetaPubObject):
         if not self._is_vcv_format:
             return None
 
-        simple_allele = self.variation_archive.find('ClassifiedRecord/SimpleAllele')
+        simple_allele = self._simple_allele
         if simple_allele is not None:
             protein_change = simple_allele.find('ProteinChange')
             return protein_change.text if protein_change is not None else None
@@ -710,37 +756,41 @@ class ClinVarVariant(MetaPubObject):
             return []
 
         citations = []
-        classifications = self.variation_archive.find('.//Classifications')
-        if classifications is not None:
-            germline_class = classifications.find('GermlineClassification')
-            if germline_class is not None:
-                for citation in germline_class.findall('Citation'):
-                    citation_info = {
-                        'type': citation.get('Type'),
-                        'ids': []
-                    }
-
-                    for id_elem in citation.findall('ID'):
-                        citation_info['ids'].append({
-                            'source': id_elem.get('Source'),
-                            'id': id_elem.text
-                        })
-
-                    # Also check for URLs
-                    url_elem = citation.find('URL')
-                    if url_elem is not None:
-                        citation_info['url'] = url_elem.text
-
-                    citations.append(citation_info)
+        germline_class = self._germline_classification
+        if germline_class is not None:
+            for citation in germline_class.findall('Citation'):
+                citation_info = {
+                    'type': citation.get('Type'),
+                    'ids': []
+                }
+
+                for id_elem in citation.findall('ID'):
+                    citation_info['ids'].append({
+                        'source': id_elem.get('Source'),
+                        'id': id_elem.text
+                    })
+
+                # Also check for URLs
+                url_elem = citation.find('URL')
+                if url_elem is not None:
+                    citation_info['url'] = url_elem.text
+
+                citations.append(citation_info)
         return citations
 
+    @staticmethod
+    def _child_text(elem, tag):
+        """ Text of elem's first `tag` child, or None if there is no such child. """
+        child = elem.find(tag)
+        return child.text if child is not None else None
+
     def _get_clinical_assertions(self):
         """Get individual clinical assertions from submitters"""
         if not self._is_vcv_format:
             return []
 
         assertions = []
-        assertion_list = self.variation_archive.find('.//ClinicalAssertionList')
+        assertion_list = self._clinical_assertion_list
         if assertion_list is not None:
             for assertion in assertion_list.findall('ClinicalAssertion'):
                 assertion_info = {
@@ -786,9 +836,9 @@ class ClinVarVariant(MetaPubObject):
                         sample = observed.find('Sample')
                         if sample is not None:
                             obs_info['sample'] = {
-                                'origin': sample.find('Origin').text if sample.find('Origin') is not None else None,
-                                'species': sample.find('Species').text if sample.find('Species') is not None else None,
-                                'affected_status': sample.find('AffectedStatus').text if sample.find('AffectedStatus') is not None else None
+                                'origin': self._child_text(sample, 'Origin'),
+                                'species': self._child_text(sample, 'Species'),
+                                'affected_status': self._child_text(sample, 'AffectedStatus')
                             }
 
                             # Number tested
@@ -4,9 +4,13 @@ Defines command-line tools `convert pmid2doi` and `convert doi2pmid`.
 """
 
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from urllib.error import HTTPError
 
 from .pubmedfetcher import PubMedFetcher
+from .pubmedcentral import get_pmids_for_otherids, get_dois_for_otherids
 from .crossref import CrossRefFetcher
 from .exceptions import *
 from .ncbi_errors import NCBIServiceError
@@ -230,6 +234,164 @@ def doi2pmid(doi):
             raise
 
 
+@dataclass
+class StageStats:
+    """Hits and elapsed time for one stage of a bulk conversion."""
+    name: str
+    attempted: int = 0
+    found: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self):
+        return self.found / self.attempted if self.attempted else 0.0
+
+
+class BulkConversion(dict):
+    """Results of dois2pmids / pmids2dois: input ID -> converted ID (or None).
+
+    The `stages` attribute lists a StageStats per stage, in the order run; each
+    stage only attempts the IDs that earlier stages did not convert.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stages = []
+
+    def report(self):
+        """Return a one-line-per-stage summary of hit rates and timing."""
+        lines = []
+        for stage in self.stages:
+            lines.append('%-16s %6d attempted %6d found (%5.1f%%) in %.2fs' % (
+                stage.name, stage.attempted, stage.found, 100 * stage.hit_rate, stage.seconds))
+        found = sum(1 for value in self.values() if value)
+        lines.append('%-16s %6d total     %6d found' % ('TOTAL', len(self), found))
+        return '\n'.join(lines)
+
+
+def _run_stage(results, name, remaining, func):
+    """ Run func(remaining) -> {id: value} and record hits in results. Returns IDs still unconverted. """
+    stage = StageStats(name, attempted=len(remaining))
+    start = time.perf_counter()
+    if remaining:
+        for key, value in func(remaining).items():
+            if value and key in results and not results[key]:
+                results[key] = value
+                stage.found += 1
+    stage.seconds = time.perf_counter() - start
+    results.stages.append(stage)
+    log.debug('%s: %d of %d converted in %.2fs', name, stage.found, stage.attempted, stage.seconds)
+    return [key for key in remaining if not results[key]]
+
+
+def _pubmed_doi_query(dois, chunk_size=50):
+    """ Stage: look up DOIs with OR-joined [AID] queries, then cross-check each hit's DOI. """
+    found = {}
+    wanted = {doi.lower(): doi for doi in dois}
+    for start in range(0, len(dois), chunk_size):
+        chunk = dois[start:start + chunk_size]
+        query = ' OR '.join('"%s"[AID]' % doi.replace('"', '') for doi in chunk)
+        pmids = pm_fetch.pmids_for_query(query, retmax=len(chunk) * 3)
+        # pubmed sometimes gives us an article with a SIMILAR doi, so cross-check.
+        for pmid, pma in pm_fetch.articles_by_pmids(pmids).items():
+            doi = wanted.get((pma.doi or '').lower())
+            if doi and doi not in found:
+                found[doi] = pmid
+    return found
+
+
+def _crossref_citation_match(dois):
+    """ Stage: batch-fetch CrossRef works for DOIs, then match them against PubMed in bulk. """
+    works = {doi: work for doi, work in cr_fetch.articles_by_dois(dois).items() if work}
+    matches = pm_fetch.pmids_for_citations({doi: work.to_citation() for doi, work in works.items()})
+    return {doi: interpret_pmids_for_citation_results(pmids) for doi, pmids in matches.items()}
+
+
+def dois2pmids(dois, crossref=True):
+    '''Bulk doi2pmid: convert many DOIs to PMIDs, running each stage on the whole set.
+
+    Stages, from cheapest to most expensive (each only sees the DOIs the
+    previous stages could not convert):
+
+        pmc_idconv      PMC ID conversion API, 200 DOIs per request
+        pubmed_query    OR-joined PubMed [AID] queries, hits cross-checked by DOI
+        crossref        batched CrossRef DOI filter queries + batched PubMed
+                        citation match (skipped if crossref=False)
+
+    As with doi2pmid, a result may be 'AMBIGUOUS' if the citation match finds
+    more than one article.
+
+    :param dois: list of DOIs (str)
+    :param crossref: (bool) run the CrossRef stage [default: True]
+    :return: BulkConversion dict of DOI -> PMID, 'AMBIGUOUS' or None; see .stages / .report()
+    :raises: NCBIServiceError if NCBI services are down
+    '''
+    _start_engines()
+    results = BulkConversion()
+    for doi in dois:
+        results[doi.strip()] = None
+    remaining = list(results)
+
+    remaining = _run_stage(results, 'pmc_idconv', remaining, get_pmids_for_otherids)
+    remaining = _run_stage(results, 'pubmed_query', remaining, _pubmed_doi_query)
+    if crossref:
+        _run_stage(results, 'crossref', remaining, _crossref_citation_match)
+    return results
+
+
+def _pubmed_article_dois(pmids, articles):
+    """ Stage: batch-fetch PubMedArticles (kept in articles for later stages) and take their DOIs. """
+    articles.update(pm_fetch.articles_by_pmids(pmids))
+    return {pmid: articles[pmid].doi for pmid in pmids if pmid in articles and articles[pmid].doi}
+
+
+def _crossref_pma_dois(pmids, articles, workers):
+    """ Stage: search CrossRef by article metadata for the already-fetched PubMedArticles. """
+    def lookup(pmid):
+        try:
+            return pmid, PubMedArticle2doi(articles[pmid])
+        except Exception as error:
+            log.debug('CrossRef lookup failed for PMID %s: %s', pmid, error)
+            return pmid, None
+
+    # PMIDs that PubMed did not return are invalid; nothing to look up in CrossRef.
+    pmids = [pmid for pmid in pmids if pmid in articles]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(lookup, pmids))
+
+
+def pmids2dois(pmids, crossref=True, workers=4):
+    '''Bulk pmid2doi: convert many PMIDs to DOIs, running each stage on the whole set.
+
+    Stages (each only sees the PMIDs the previous stages could not convert):
+
+        pubmed_efetch   DOI from the PubMed record, 200 PMIDs per efetch
+        pmc_idconv      PMC ID conversion API, 200 PMIDs per request
+        crossref        CrossRef search by article metadata (skipped if crossref=False)
+
+    Unlike pmid2doi, invalid PMIDs do not raise; they map to None.
+
+    :param pmids: list of PMIDs (str or int)
+    :param crossref: (bool) run the CrossRef stage [default: True]
+    :param workers: (int) concurrent CrossRef lookups [default: 4]
+    :return: BulkConversion dict of PMID (str) -> DOI or None; see .stages / .report()
+    :raises: NCBIServiceError if NCBI services are down
+    '''
+    _start_engines()
+    results = BulkConversion()
+    for pmid in pmids:
+        results[str(pmid).strip()] = None
+    remaining = list(results)
+    articles = {}
+
+    remaining = _run_stage(results, 'pubmed_efetch', remaining,
+                           lambda pmids: _pubmed_article_dois(pmids, articles))
+    remaining = _run_stage(results, 'pmc_idconv', remaining, get_dois_for_otherids)
+    if crossref:
+        _run_stage(results, 'crossref', remaining, lambda pmids: _crossref_pma_dois(pmids, articles, workers))
+    return results
+
+
 def bookid2pmid(book_id):
     """Convenience interface to PubMedFetcher.pmid_for_bookID"""
     _start_engines()
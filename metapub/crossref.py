@@ -2,17 +2,36 @@
 
 import datetime 
 import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
 
-from habanero import Crossref as CREngine
 import Levenshtein
+from rapidfuzz import fuzz
+from unidecode import unidecode
+
+try:
+    # vectorized pairwise scoring; needs rapidfuzz >= 3.6 and numpy (optional).
+    import numpy  # noqa: F401
+    from rapidfuzz.process import cpdist
+except ImportError:
+    cpdist = None
 
 from .base import Borg
-from .config import DEFAULT_EMAIL
+from .config import DEFAULT_EMAIL, DEFAULT_CACHE_DIR
+from .crossref_client import get_crossref_client
 from . import cite
 from .ncbi_errors import NCBIServiceError
 
 log = logging.getLogger('metapub.crossref')
 
+# CrossRef OR-combines repeated doi: filters; keep batches small enough for a GET URL.
+DOI_BATCH_SIZE = 50
+
+# Page size for cursor-paged /works queries (CrossRef allows up to 1000).
+CURSOR_ROWS = 500
+
 # for use with Levenshtein distance string comparison of titles in CR results.
 TITLE_SIMILARITY_IDEAL_SCORE = .95   # automatically accept results over .95 threshold.
 TITLE_SIMILARITY_MIN_SCORE = .8     # throw out results that fall below .8 threshold.
@@ -24,21 +43,169 @@ def get_most_similar_work_from_crossref_results(qstring, qname, cr_results):
 
     :param qstring: (str) original query string for search
     :param qname: (str) name of query item (e.g. "title")
-    :param cr_results: (dict) crossref results as returned by habanero
+    :param cr_results: (dict) crossref results as returned by CrossRefClient.works
     :return: {'title_ld': <score>, 'work': <CrossRefWork or None>} 
     """
     bestcandidate = { qname+'_ld': 0, 'work': None, }
 
     if cr_results['message']['total-results'] > 0:
+        qstring = qstring.lower()
         for item in cr_results['message']['items']:
             this = item[qname][0].lower()
-            this_ld = Levenshtein.ratio(qstring.lower(), this.lower())
+            this_ld = Levenshtein.ratio(qstring, this)
             if this_ld > bestcandidate[qname+'_ld']:
                 bestcandidate = { qname+'_ld': this_ld, 'work': item, }
 
     return bestcandidate
 
 
+# Relative weight of each signal in the combined candidate confidence score.
+# Signals that are missing on either side are left out and the rest reweighted.
+CANDIDATE_SCORE_WEIGHTS = {'title': 0.6, 'author': 0.15, 'year': 0.1, 'container': 0.15}
+
+re_markup = re.compile(r'<[^>]+>')
+re_nonword = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_title(text):
+    """Normalize a title (or journal name) for comparison: markup removed, ASCII,
+    lowercase, punctuation collapsed to single spaces."""
+    if not text:
+        return ''
+    if '<' in text:
+        text = re_markup.sub(' ', text)
+    return re_nonword.sub(' ', unidecode(text).lower()).strip()
+
+
+# Journal and author names repeat heavily across candidates; titles rarely do.
+_normalize_name = lru_cache(maxsize=8192)(normalize_title)
+
+
+def _first(value):
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else ''
+    return value or ''
+
+
+def _item_field(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name.replace('-', '_'), None)
+
+
+def _item_author1_family(item):
+    for auth in _item_field(item, 'author') or []:
+        if auth.get('sequence') == 'first':
+            return auth.get('family') or auth.get('name') or ''
+    return ''
+
+
+def _item_year(item):
+    issued = _item_field(item, 'issued')
+    try:
+        return int(issued['date-parts'][0][0])
+    except (TypeError, KeyError, IndexError, ValueError):
+        return None
+
+
+def _pma_author1_family(pma):
+    # author1_last_fm is "Lastname INITS"; drop the initials.
+    author = getattr(pma, 'author1_last_fm', None) or ''
+    return author.rsplit(' ', 1)[0] if ' ' in author else author
+
+
+def _pairwise_ratio(left, right):
+    """Similarity (0..1) of left[i] vs right[i] for all i, vectorized where rapidfuzz allows."""
+    if not left:
+        return []
+    if cpdist is not None:
+        return [score / 100.0 for score in cpdist(left, right, scorer=fuzz.ratio, workers=-1)]
+    return [fuzz.ratio(a, b) / 100.0 for a, b in zip(left, right)]
+
+
+@dataclass
+class CandidateScore:
+    """A CrossRef candidate for one article, with its per-signal and combined scores.
+
+    Signal scores are in 0..1, or None if the signal was missing on either side.
+    """
+    work: Any
+    confidence: float
+    title: Optional[float] = None
+    author: Optional[float] = None
+    year: Optional[float] = None
+    container: Optional[float] = None
+
+
+def _year_score(year, candidate_year):
+    if not year or candidate_year is None:
+        return None
+    try:
+        diff = abs(int(year) - candidate_year)
+    except ValueError:
+        return None
+    # print and online publication years are often one apart
+    return 1.0 if diff == 0 else 0.5 if diff == 1 else 0.0
+
+
+def rank_crossref_candidates(pmas, candidates, weights=None):
+    """Score CrossRef candidates for many articles at once.
+
+    Title, first-author surname and journal similarities are computed for all
+    (article, candidate) pairs in single vectorized rapidfuzz calls over
+    normalized strings, and combined with publication year agreement into one
+    weighted confidence score (see CANDIDATE_SCORE_WEIGHTS).
+
+    :param pmas: list of PubMedArticle (or objects with title, journal, year, author1_last_fm)
+    :param candidates: list (parallel to pmas) of lists of CrossRef items -- dicts as
+                       returned by the works API, or CrossRefWork objects
+    :param weights: (dict) optional override of CANDIDATE_SCORE_WEIGHTS
+    :return: list (parallel to pmas) of lists of CandidateScore, best first
+    """
+    weights = dict(CANDIDATE_SCORE_WEIGHTS, **(weights or {}))
+
+    pairs = []
+    titles, cand_titles = [], []
+    authors, cand_authors = [], []
+    journals, cand_journals = [], []
+    for index, (pma, items) in enumerate(zip(pmas, candidates)):
+        title = normalize_title(pma.title)
+        author = _normalize_name(_pma_author1_family(pma))
+        journal = _normalize_name(pma.journal)
+        for item in items or []:
+            pairs.append((index, item))
+            titles.append(title)
+            cand_titles.append(normalize_title(_first(_item_field(item, 'title'))))
+            authors.append(author)
+            cand_authors.append(_normalize_name(_item_author1_family(item)))
+            # PubMed journal names are usually ISO abbreviations; compare against both forms.
+            journals.append(journal)
+            cand_journals.append((_normalize_name(_first(_item_field(item, 'container-title'))),
+                                  _normalize_name(_first(_item_field(item, 'short-container-title')))))
+
+    title_scores = _pairwise_ratio(titles, cand_titles)
+    author_scores = _pairwise_ratio(authors, cand_authors)
+    container_scores = [max(full, short) for full, short in zip(
+        _pairwise_ratio(journals, [full for full, _ in cand_journals]),
+        _pairwise_ratio(journals, [short for _, short in cand_journals]))]
+
+    ranked = [[] for _ in pmas]
+    for n, (index, item) in enumerate(pairs):
+        signals = {'title': title_scores[n] if titles[n] and cand_titles[n] else None,
+                   'author': author_scores[n] if authors[n] and cand_authors[n] else None,
+                   'year': _year_score(getattr(pmas[index], 'year', None), _item_year(item)),
+                   'container': container_scores[n] if journals[n] and any(cand_journals[n]) else None}
+        total = weighted = 0.0
+        for name, score in signals.items():
+            if score is not None:
+                total += weights[name]
+                weighted += weights[name] * score
+        confidence = weighted / total if total else 0.0
+        ranked[index].append(CandidateScore(work=item, confidence=confidence, **signals))
+
+    for scores in ranked:
+        scores.sort(key=lambda candidate: candidate.confidence, reverse=True)
+    return ranked
+
+
 class CrossRefWork(object):
     "Represents one 'work' from CrossRef search results."
 
@@ -214,7 +381,19 @@ class CrossRefFetcher(Borg):
     """Valid field queries for this route are: affiliation, degree, event-acronym, bibliographic, container-title, publisher-name, author, event-theme, standards-body-acronym, chair, event-location, translator, funder-name, event-name, publisher-location, title, standards-body-name, contributor, editor, event-sponsor"""
 
     def __init__(self, **kwargs):
-        self.cr = CREngine(mailto=kwargs.get('email', DEFAULT_EMAIL))
+        """
+        Keyword args:
+            email (str): contact address for CrossRef's polite pool [default: config.DEFAULT_EMAIL]
+            cachedir (str): directory for the shared CrossRef response cache
+                [default: config.DEFAULT_CACHE_DIR]; None disables caching.
+
+        Note: self.cr is a metapub.crossref_client.CrossRefClient, no longer a
+        habanero.Crossref. Its works() accepts habanero-style arguments and returns
+        the same JSON, but habanero's other methods (members, journals, ...) are gone.
+        """
+        # Shared (pooled, rate-limited, cached) client; see metapub.crossref_client.
+        self.cr = get_crossref_client(cachedir=kwargs.get('cachedir', DEFAULT_CACHE_DIR),
+                                      mailto=kwargs.get('email', DEFAULT_EMAIL))
         self.log = logging.getLogger('metapub.crossref.CrossRefFetcher')
 
     def article_by_doi(self, doi):
@@ -303,14 +482,124 @@ class CrossRefFetcher(Borg):
     def article_by_title(self, title, **kwargs):
         """Use CrossRef to find a work by its title. Returns first item in the list.
 
-        Keywords are passed unmodified to crossref.works() [habanero].
+        Keywords are passed to CrossRefClient.works() along with the title query
+        (habanero-style, e.g. filter={'from-pub-date': '2010'}).
         
         :param title: str
         :rtype: CrossRefWork or None (if no results)
         """
-        res = self.cr.works(query_bibliographic=title, limit=1)
+        res = self.cr.works(**dict({'query_bibliographic': title, 'limit': 1}, **kwargs))
         if res['message']['total-results'] > 0:
             item = res['message']['items'][0]
             return CrossRefWork(**item)
         return None
 
+    def articles_by_dois(self, dois, batch_size=DOI_BATCH_SIZE):
+        """Fetch many works at once using /works?filter=doi:...,doi:... queries.
+
+        DOIs are matched case-insensitively; DOIs CrossRef does not know map to None,
+        as do the DOIs of a request that fails (the error is logged, not raised).
+        DOIs containing a comma can't go in a filter query and are fetched one by one.
+
+        :param dois: list of DOIs
+        :param batch_size: (int) DOIs per request [default: DOI_BATCH_SIZE]
+        :return: dict of DOI (as supplied) -> CrossRefWork or None
+        """
+        wanted = {}
+        for doi in dois:
+            wanted.setdefault(doi.strip().lower(), []).append(doi)
+        keys = [key for key in wanted if ',' not in key]
+
+        results = {doi: None for doi in dois}
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            try:
+                res = self.cr.works(filter=[('doi', doi) for doi in chunk], limit=len(chunk))
+            except Exception as error:
+                self.log.warning('articles_by_dois: lookup of %i DOIs failed: %s', len(chunk), error)
+                continue
+            self.log.debug('articles_by_dois: %i of %i DOIs found', len(res['message']['items']), len(chunk))
+            for item in res['message']['items']:
+                for doi in wanted.get(item.get('DOI', '').lower(), []):
+                    results[doi] = CrossRefWork(**item)
+
+        for key in wanted:
+            if ',' in key:
+                try:
+                    work = self.article_by_doi(key)
+                except Exception as error:
+                    self.log.debug('articles_by_dois: lookup of DOI %s failed: %s', key, error)
+                    continue
+                for doi in wanted[key]:
+                    results[doi] = work
+        return results
+
+    def iter_works(self, query=None, filter=None, rows=CURSOR_ROWS, max_results=None, **kwargs):
+        """Stream all works matching a query and/or filter, using CrossRef's deep-paging cursor.
+
+        Works are yielded lazily one page at a time, so memory stays bounded
+        regardless of the size of the result set. Cursor pages are not cached.
+
+        Keywords are passed to the works query (e.g. query_author='...', select=[...], sort=...).
+
+            for work in fetch.iter_works(filter={'issn': '1476-4687', 'from_pub_date': '2020'}):
+                print(work.doi)
+
+        :param query: (str) free-text query
+        :param filter: (str, dict or list of (key, value) pairs) CrossRef filters
+        :param rows: (int) works per page (max 1000) [default: CURSOR_ROWS]
+        :param max_results: (int) stop after this many works [default: no limit]
+        :rtype: generator of CrossRefWork
+        """
+        cursor = '*'
+        count = 0
+        while cursor:
+            res = self.cr.works(query=query, filter=filter, limit=rows, cursor=cursor,
+                                use_cache=False, **kwargs)
+            items = res['message'].get('items', [])
+            for item in items:
+                yield CrossRefWork(**item)
+                count += 1
+                if max_results is not None and count >= max_results:
+                    return
+            if len(items) < rows:
+                return
+            cursor = res['message'].get('next-cursor')
+
+    def articles_by_pmas(self, pmas, min_score=TITLE_SIMILARITY_MIN_SCORE, limit=5):
+        """Bulk article_by_pma: find the best CrossRef work for each of many PubMedArticles.
+
+        Makes one Title/Journal works query per article (through the shared
+        CrossRef cache), then ranks all candidates together with
+        rank_crossref_candidates, using the combined title/author/year/journal
+        confidence rather than title similarity alone.
+
+        :param pmas: list of PubMedArticle objects
+        :param min_score: (float) minimum combined confidence to accept a match
+        :param limit: (int) candidates to consider per article
+        :return: list (parallel to pmas) of CrossRefWork or None; an article whose
+            query fails (the error is logged, not raised) maps to None
+        """
+        candidates = []
+        for pma in pmas:
+            if not pma.title:
+                candidates.append([])
+                continue
+            try:
+                res = self.cr.works(query_bibliographic=pma.title, query_container_title=pma.journal, limit=limit)
+            except Exception as error:
+                self.log.warning('articles_by_pmas: lookup for PMID %s failed: %s', pma.pmid, error)
+                candidates.append([])
+                continue
+            candidates.append(res['message']['items'])
+
+        works = []
+        for pma, ranked in zip(pmas, rank_crossref_candidates(pmas, candidates)):
+            best = ranked[0] if ranked else None
+            if best is not None and best.confidence >= min_score:
+                self.log.debug('PMID %s: best candidate %s with confidence %f', pma.pmid,
+                               best.work.get('DOI'), best.confidence)
+                works.append(CrossRefWork(**best.work))
+            else:
+                works.append(None)
+        return works
@@ -0,0 +1,236 @@
+"""Lightweight CrossRef REST API client with caching and rate limiting.
+
+Shared by CrossRefFetcher and the FindIt dances (get_crossref_pdf_links), so
+that every CrossRef request made by metapub:
+
+- goes through one pooled requests.Session,
+- identifies itself for CrossRef's "polite pool" (mailto parameter and a
+  User-Agent carrying the contact address),
+- is paced by a rate limiter that follows the X-Rate-Limit-Limit /
+  X-Rate-Limit-Interval headers CrossRef sends back (and backs off on 429),
+- is answered from a persistent SQLite cache when the same (normalized)
+  query has been made before.
+
+Usage:
+
+    from metapub.crossref_client import get_crossref_client
+
+    client = get_crossref_client()
+    work = client.work('10.1038/ng.379')                      # message dict
+    res = client.works(query_bibliographic='...', limit=5)    # habanero-style result
+"""
+
+import json
+import logging
+import re
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache_utils import get_cache_path
+from .config import DEFAULT_CACHE_DIR, DEFAULT_EMAIL
+from .ncbi_client import RateLimiter, SimpleCache
+
+log = logging.getLogger('metapub.crossref_client')
+
+CROSSREF_API_URL = 'https://api.crossref.org'
+CACHE_FILENAME = 'crossref-cache.db'
+
+# Starting rate before CrossRef tells us its current limit via response headers.
+DEFAULT_REQUESTS_PER_SECOND = 10
+
+# (cachedir, mailto) -> CrossRefClient; all of them pace requests with one rate limiter.
+CROSSREF_CLIENTS = {}
+_client_lock = Lock()
+_rate_limiter = None
+
+re_whitespace = re.compile(r'\s+')
+re_interval = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$')
+_INTERVAL_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, None: 1}
+
+
+class CrossRefRateLimiter(RateLimiter):
+    """RateLimiter that adopts the limit CrossRef advertises in its response headers.
+
+    CrossRef reports its current per-client limit as X-Rate-Limit-Limit requests
+    per X-Rate-Limit-Interval (e.g. "50" per "1s"); the advertised rate is never
+    exceeded, and a 429 response halves the rate until the next header update.
+    """
+
+    def update_from_headers(self, headers):
+        """Adjust the rate from X-Rate-Limit-* headers, if present and sensible."""
+        limit = headers.get('X-Rate-Limit-Limit')
+        match = re_interval.match(headers.get('X-Rate-Limit-Interval') or '')
+        if not limit or not match:
+            return
+        try:
+            limit = float(limit)
+        except ValueError:
+            return
+        seconds = float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+        if limit <= 0 or seconds <= 0:
+            return
+        with self.lock:
+            self.requests_per_second = limit / seconds
+            self.min_interval = seconds / limit
+
+    def back_off(self):
+        """Halve the current rate (used after a 429 Too Many Requests)."""
+        with self.lock:
+            self.min_interval = max(self.min_interval * 2, 0.1)
+            self.requests_per_second = 1.0 / self.min_interval
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return re_whitespace.sub(' ', value).strip().lower()
+    return value
+
+
+def _normalize_filter(filter):
+    """ Render a filter (str, dict or list of (key, value) pairs) as CrossRef's "key:value,..." form. """
+    if filter is None or isinstance(filter, str):
+        return filter
+    items = filter.items() if isinstance(filter, dict) else filter
+    return ','.join('%s:%s' % (key.replace('_', '-'), value) for key, value in items)
+
+
+def _works_params(params):
+    """ Translate habanero-style keyword arguments to CrossRef query parameters.
+
+    query_container_title -> query.container-title; limit -> rows; filter dicts rendered.
+    """
+    out = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if key.startswith('query_'):
+            key = 'query.' + key[len('query_'):].replace('_', '-')
+        elif key == 'limit':
+            key = 'rows'
+        elif key == 'filter':
+            value = _normalize_filter(value)
+        elif key == 'select' and isinstance(value, (list, tuple)):
+            value = ','.join(value)
+        out[key] = value
+    return out
+
+
+class CrossRefClient:
+    """CrossRef REST client with a pooled session, polite-pool headers, rate limiting and cache.
+
+    Args:
+        mailto (str): contact address for CrossRef's polite pool
+        cache_path (Optional[str]): path to SQLite cache file. If None, no caching
+        requests_per_second (float): starting rate (adjusted from CrossRef's headers)
+        timeout (float): default request timeout in seconds
+        retries (int): times to retry after a 429 response
+        rate_limiter (Optional[CrossRefRateLimiter]): limiter to share with other clients
+    """
+
+    def __init__(self, mailto: str = DEFAULT_EMAIL, cache_path: Optional[str] = None,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 timeout: float = 30, retries: int = 2,
+                 rate_limiter: Optional[CrossRefRateLimiter] = None):
+        self.mailto = mailto
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limiter = rate_limiter or CrossRefRateLimiter(requests_per_second)
+        self.cache = SimpleCache(cache_path) if cache_path else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': f'metapub (https://github.com/metapub/metapub; mailto:{mailto})',
+        })
+
+    def _cache_key_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        # Queries that differ only in case or whitespace share a cache entry.
+        return {key: _normalize_value(value) for key, value in params.items()}
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """GET a CrossRef API path and return the decoded JSON response.
+
+        Successful (200) responses are cached under the path plus normalized
+        parameters. Cursor-paged requests should pass use_cache=False.
+
+        Raises:
+            requests.exceptions.HTTPError: for non-200 responses (e.g. 404 for unknown DOIs)
+            requests.exceptions.RequestException: for network errors
+        """
+        params = dict(params or {})
+        url = f'{CROSSREF_API_URL}/{path.lstrip("/")}'
+        key_params = self._cache_key_params(params)
+
+        if self.cache and use_cache:
+            cached = self.cache.get(url, key_params)
+            if cached:
+                return json.loads(cached)
+
+        if self.mailto:
+            params['mailto'] = self.mailto
+
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait_if_needed()
+            log.debug('CrossRef request %s %s', url, params)
+            response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code != 429 or attempt == self.retries:
+                break
+            self.rate_limiter.back_off()
+            try:
+                delay = float(response.headers.get('Retry-After', 1))
+            except ValueError:
+                delay = 1.0
+            log.info('CrossRef rate limit hit; retrying in %.1fs', delay)
+            time.sleep(delay)
+
+        response.raise_for_status()
+        data = response.json()
+        if self.cache and use_cache:
+            self.cache.set(url, key_params, json.dumps(data))
+        return data
+
+    def work(self, doi: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Return the CrossRef 'message' record for one DOI (DOIs are case-insensitive)."""
+        doi = doi.strip().lower()
+        return self.get_json('works/' + requests.utils.quote(doi, safe='/'), timeout=timeout)['message']
+
+    def works(self, ids: Optional[str] = None, timeout: Optional[float] = None,
+              use_cache: bool = True, **params) -> Dict[str, Any]:
+        """habanero.Crossref.works-compatible query.
+
+        With ids (a single DOI), returns the /works/{doi} response. Otherwise
+        searches /works with habanero-style keyword arguments, e.g.
+        query_bibliographic='...', query_author='...', filter={...}, limit=5.
+        """
+        if ids:
+            return {'message': self.work(ids, timeout=timeout)}
+        return self.get_json('works', _works_params(params), timeout=timeout, use_cache=use_cache)
+
+
+def get_crossref_client(cachedir=DEFAULT_CACHE_DIR, mailto=DEFAULT_EMAIL):
+    """Return the CrossRefClient for this cache directory and contact address (created on first use).
+
+    Clients are shared per (cachedir, mailto). Every client in the process paces its
+    requests with the same rate limiter, since CrossRef's limit applies to all of them.
+
+    :param cachedir: cache directory for crossref-cache.db (None disables caching)
+    :param mailto: contact address for CrossRef's polite pool
+    """
+    global _rate_limiter
+    key = (cachedir, mailto)
+    with _client_lock:
+        client = CROSSREF_CLIENTS.get(key)
+        if client is None:
+            if _rate_limiter is None:
+                _rate_limiter = CrossRefRateLimiter(DEFAULT_REQUESTS_PER_SECOND)
+            client = CrossRefClient(mailto=mailto, cache_path=get_cache_path(cachedir, CACHE_FILENAME),
+                                    rate_limiter=_rate_limiter)
+            CROSSREF_CLIENTS[key] = client
+    return client
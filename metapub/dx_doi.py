@@ -1,4 +1,8 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from urllib.parse import urljoin
+
 import requests
 import certifi
 from requests.adapters import HTTPAdapter
@@ -10,11 +14,24 @@ from .base import Borg
 from .config import DEFAULT_CACHE_DIR
 from .exceptions import BadDOI, DxDOIError
 from .text_mining import find_doi_in_string
+from .utils import HostLimiter
 
 DX_DOI_URL = 'http://dx.doi.org/%s'
+DOI_RESOLVER_URL = 'https://doi.org/%s'
+DOI_HANDLE_API_URL = 'https://doi.org/api/handles/%s'
 CACHE_FILENAME = 'dx_doi-cache.db'
 
+# resolve_many defaults: threads overall, and simultaneous requests to any one host.
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+MAX_REDIRECTS = 10
+
+# Final-hop statuses that still locate the article: paywalls, bot blocks and
+# rate limits are all served by the publisher after the DOI redirect.
+ACCEPTED_ERROR_STATUS_CODES = (402, 403, 408, 429)
+
 DX_DOI_CACHE = None
+_session_lock = Lock()
 
 def _get_dx_doi_cache(cachedir=DEFAULT_CACHE_DIR):
     global DX_DOI_CACHE
@@ -32,6 +49,9 @@ class DxDOI(Borg):
 
         resolve (doi, *args): uses supplied doi to get link to publisher.
 
+        resolve_many (dois, *args): resolves many dois concurrently over a
+                                    shared session; returns dict of doi -> url.
+
         check_doi (doi, *args): returns doi if supplied DOI is good,
                                 raises BadDOI if not good.
     """
@@ -42,8 +62,17 @@ class DxDOI(Borg):
         self.retries = retries
         cachedir = kwargs.get('cachedir', DEFAULT_CACHE_DIR)
         self._cache = _get_dx_doi_cache(cachedir)
+        if not hasattr(self, '_session'):
+            self._session = None
+
+    def _get_session(self):
+        """ Returns the shared pooled session (created on first use). """
+        with _session_lock:
+            if self._session is None:
+                self._session = self._create_session(pool_maxsize=DEFAULT_WORKERS * 2)
+            return self._session
 
-    def _create_session(self):
+    def _create_session(self, pool_maxsize=10):
         session = requests.Session()
         retry_strategy = Retry(
             total=self.retries,  # Total number of retries
@@ -52,7 +81,7 @@ class DxDOI(Borg):
             allowed_methods=["HEAD", "GET", "OPTIONS"],
             raise_on_status=False,
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=32, pool_maxsize=pool_maxsize)
         session.mount("https://", adapter)
         session.mount("http://", adapter)
         session.headers.update({
@@ -83,25 +112,77 @@ class DxDOI(Borg):
         return doi
 
     def _query_api(self, doi):
-        session = self._create_session()
+        session = self._get_session()
         response = None
         try:
             response = session.get(DX_DOI_URL % doi, allow_redirects=True, verify=certifi.where(), timeout=5)
             response.raise_for_status()
             if response.status_code in [200, 202, 301, 302, 307, 308, 402, 403]:
                 self._log.info(f'URL is accessible: {response.url} (Status code: {response.status_code})')
-                self._cache[doi] = response.url
                 return response.url
         except requests.exceptions.RequestException as e:
-            if response is not None and response.status_code in [402, 403, 408, 429]:
+            if response is not None and response.status_code in ACCEPTED_ERROR_STATUS_CODES:
                 self._log.info(f'URL returned status code {response.status_code}: {response.url}')
-                self._cache[doi] = response.url
                 return response.url
             elif isinstance(e, requests.exceptions.ConnectionError):
                 self._log.error(f'Connection error for URL: {DX_DOI_URL % doi}')
             raise DxDOIError(f'Error processing DOI {doi}: {str(e)}')
-        finally:
-            session.close()
+
+    def _query_head(self, doi, limiter, timeout=10):
+        """ Follows the DOI's redirect chain hop by hop with HEAD requests (no
+        page bodies downloaded), holding a per-host slot for each hop.
+
+        :return: url (str) of the final hop
+        :raises DxDOIError: on unknown DOI, error status or too many redirects
+        """
+        session = self._get_session()
+        url = DOI_RESOLVER_URL % doi
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                with limiter.slot(url):
+                    response = session.head(url, allow_redirects=False, verify=certifi.where(), timeout=timeout)
+                    if response.status_code in (405, 501):
+                        # Some publishers refuse HEAD; GET the headers without reading the body.
+                        response = session.get(url, allow_redirects=False, stream=True,
+                                               verify=certifi.where(), timeout=timeout)
+                        response.close()
+                if not response.is_redirect:
+                    break
+                url = urljoin(url, response.headers['Location'])
+            else:
+                raise DxDOIError(f'Error processing DOI {doi}: too many redirects')
+        except requests.exceptions.RequestException as e:
+            raise DxDOIError(f'Error processing DOI {doi}: {str(e)}')
+
+        if response.status_code < 400 or response.status_code in ACCEPTED_ERROR_STATUS_CODES:
+            return url
+        raise DxDOIError(f'Error processing DOI {doi}: {response.status_code} for url {url}')
+
+    def _query_handle(self, doi, limiter, timeout=10):
+        """ Reads the DOI's registered URL from the doi.org handle API, without
+        contacting the publisher. (This is the first hop of the redirect chain;
+        publishers may redirect further from there.)
+
+        :return: url (str)
+        :raises DxDOIError: on unknown DOI or unusable response
+        """
+        session = self._get_session()
+        url = DOI_HANDLE_API_URL % doi
+        try:
+            with limiter.slot(url):
+                response = session.get(url, params={'type': 'URL'}, headers={'Accept': 'application/json'},
+                                       verify=certifi.where(), timeout=timeout)
+            if response.status_code == 404:
+                raise DxDOIError(f'Error processing DOI {doi}: DOI not found')
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise DxDOIError(f'Error processing DOI {doi}: {str(e)}')
+
+        for value in data.get('values', []):
+            if value.get('type') == 'URL':
+                return value.get('data', {}).get('value')
+        raise DxDOIError(f'Error processing DOI {doi}: no URL registered')
 
     def resolve(self, doi, check_doi=True, whitespace=False, skip_cache=False):
         """ Takes a doi (string), returns a url to article page on journal website.
@@ -144,17 +225,95 @@ class DxDOI(Borg):
                         cache_key=cache_key, doi=doi))
         return url
 
-    def _make_cache_key(self, inp):
+    def resolve_many(self, dois, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, method='head',
+                     check_doi=True, whitespace=False, skip_cache=False):
+        """ Takes a list of dois, returns a dict of doi -> url (or None if the doi
+        could not be resolved).
+
+        Cached dois are answered from the cache; the rest are resolved concurrently
+        on the shared session, with at most `per_host` simultaneous requests to any
+        one host, and the new results are written to the cache in one batch.
+
+        method='head' (default) follows the redirect chain with HEAD requests,
+        arriving at the same landing page as resolve() without downloading it.
+        method='handle' asks the doi.org handle API for the registered URL and
+        never touches the publisher; this is faster, but the URL may be one
+        redirect short of the landing page (e.g. linkinghub.elsevier.com), so
+        these results are cached apart from resolve()'s and never answer it.
+
+        :param dois: iterable of str
+        :param workers: (int) number of concurrent requests
+        :param per_host: (int) max concurrent requests to a single host
+        :param method: (str) 'head' or 'handle'
+        :param check_doi: (bool)
+        :param whitespace: (bool)
+        :param skip_cache: (bool)
+        :return: dict of doi -> url or None
+        """
+        if method == 'head':
+            query = self._query_head
+        elif method == 'handle':
+            query = self._query_handle
+        else:
+            raise ValueError('method must be "head" or "handle", not %r' % method)
+
+        results = {}
+        pending = []
+        seen = set()
+        for doi in dois:
+            if doi in seen:
+                continue
+            seen.add(doi)
+            try:
+                if doi is None or doi.strip() == '':
+                    raise BadDOI('DOI cannot be None or empty string')
+                if check_doi:
+                    self.check_doi(doi, whitespace=whitespace)
+            except BadDOI as error:
+                self._log.info(str(error))
+                results[doi] = None
+                continue
+            url = None if skip_cache else self._query_cache(doi, method)
+            if url is None:
+                pending.append(doi)
+            else:
+                results[doi] = url
+
+        limiter = HostLimiter(per_host)
+
+        def resolve_one(doi):
+            try:
+                return query(doi.strip(), limiter)
+            except DxDOIError as error:
+                self._log.info(str(error))
+                return None
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                resolved = dict(zip(pending, executor.map(resolve_one, pending)))
+            results.update(resolved)
+            if self._cache:
+                self._cache.update((self._make_cache_key(doi, method), url)
+                                   for doi, url in resolved.items() if url)
+                self._log.info('cached results for %i dois', sum(1 for url in resolved.values() if url))
+
+        return results
+
+    def _make_cache_key(self, inp, method='head'):
+        # handle API results may stop short of the landing page; keep them apart.
+        if method == 'handle':
+            return 'handle:' + inp.strip()
         return inp.strip()
 
-    def _query_cache(self, key):
+    def _query_cache(self, key, method='head'):
         """ Return results for a cache lookup, if found.
 
         :param key: (str)
+        :param method: (str) 'head' for landing pages (as from resolve), 'handle' for handle API URLs
         :return: val (str) or None
         """
         if self._cache:
-            cache_key = self._make_cache_key(key)
+            cache_key = self._make_cache_key(key, method)
             try:
                 val = self._cache[cache_key]
                 self._log.debug('cache hit for key {cache_key} ({key}) '.format(
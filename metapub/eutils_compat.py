@@ -24,13 +24,16 @@ class EutilsRequestError(Exception):
 class QueryService:
     """Drop-in replacement for eutils.QueryService."""
 
-    def __init__(self, cache=None, api_key=None, email="", tool="metapub"):
+    def __init__(self, cache=None, api_key=None, email="", tool="metapub", circuit_breaker=None,
+                 rate_limiter=None):
         # Use NCBIClient with built-in caching
         self.client = NCBIClient(
             api_key=api_key,
             cache_path=cache,
             email=email,
-            tool=tool
+            tool=tool,
+            circuit_breaker=circuit_breaker,
+            rate_limiter=rate_limiter
         )
         # Expose cache for compatibility with tests
         self._cache = self.client.cache
@@ -156,6 +159,24 @@ class QueryService:
             else:
                 raise EutilsRequestError(f"Request failed: {str(e)}") from e
 
+    def ecitmatch(self, params: dict) -> str:
+        """Compatibility method for ecitmatch."""
+        try:
+            bdata = params.get('bdata')
+            if not bdata:
+                raise EutilsRequestError("Missing required parameter: bdata")
+
+            return self.client.ecitmatch(
+                bdata=bdata,
+                db=params.get('db', 'pubmed'),
+                retmode=params.get('retmode', 'xml')
+            )
+        except Exception as e:
+            if isinstance(e, (MetaPubError, EutilsRequestError)):
+                raise EutilsRequestError(str(e)) from e
+            else:
+                raise EutilsRequestError(f"Request failed: {str(e)}") from e
+
     def einfo(self, params: dict = None) -> str:
         """Compatibility method for einfo."""
         try:
@@ -3,3 +3,5 @@ __path__ = extend_path(__path__, __name__)
 
 from .findit import FindIt
 
+from .offline import OfflineURLBuilder, find_urls_offline
+from .timing import add_timing_hook, remove_timing_hook, get_timing_stats, reset_timing_stats
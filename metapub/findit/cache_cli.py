@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""CLI tool for bulk management of the FindIt result cache.
+
+Commands:
+    preload   run FindIt concurrently over a file of PMIDs to warm the cache
+    export    dump the cache to JSONL (optionally gzipped) or Parquet
+    import    merge a JSONL/Parquet dump into the cache (best entry per PMID wins)
+"""
+
+import sys
+import argparse
+import logging
+
+from ..config import DEFAULT_CACHE_DIR
+from ..exceptions import MetaPubError
+from .cache_tools import (findit_cache_path, read_pmid_list, preload_pmids,
+                          export_cache, import_cache)
+
+
+def setup_logging(verbose=False):
+    """Configure logging based on verbosity level."""
+    level = logging.DEBUG if verbose else logging.INFO
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s'
+    )
+
+
+def cmd_preload(args):
+    """Preload FindIt results for a list of PMIDs."""
+    pmids = read_pmid_list(args.pmid_file)
+    print(f"Preloading {len(pmids)} PMIDs into {findit_cache_path(args.cachedir)} "
+          f"with {args.workers} workers...")
+
+    def progress(pmid, url, reason):
+        if args.verbose:
+            print(f"{pmid}\t{url or ''}\t{reason or ''}")
+
+    stats = preload_pmids(pmids, cachedir=args.cachedir, workers=args.workers,
+                          verify=args.verify, retry_errors=args.retry_errors,
+                          callback=progress)
+    print(f"Done. {stats['total']} PMIDs: {stats['url']} with URL, "
+          f"{stats['noformat']} NOFORMAT, {stats['error']} errors, {stats['other']} other.")
+
+
+def cmd_export(args):
+    """Export the FindIt cache to a file."""
+    count = export_cache(findit_cache_path(args.cachedir), args.output, fmt=args.format)
+    print(f"Exported {count} entries to {args.output}")
+
+
+def cmd_import(args):
+    """Merge one or more exported files into the FindIt cache."""
+    cache_path = findit_cache_path(args.cachedir)
+    for path in args.inputs:
+        stats = import_cache(cache_path, path, fmt=args.format)
+        print(f"{path}: read {stats['read']}, written {stats['written']}, "
+              f"kept existing {stats['kept']}")
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Bulk preload, export and merge the FindIt result cache",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  metapub-findit-cache preload pmids.txt --workers 8     # Warm the cache
+  metapub-findit-cache export findit.jsonl.gz            # Dump to gzipped JSONL
+  metapub-findit-cache export findit.parquet             # Dump to Parquet (needs pyarrow)
+  metapub-findit-cache import worker1.jsonl.gz worker2.jsonl.gz
+        """
+    )
+
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Enable verbose logging')
+    parser.add_argument('--cachedir', type=str, default=DEFAULT_CACHE_DIR,
+                       help='FindIt cache directory (default: %(default)s)')
+
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    preload_parser = subparsers.add_parser('preload', help='Run FindIt over a file of PMIDs')
+    preload_parser.add_argument('pmid_file', help='File with one PMID per line')
+    preload_parser.add_argument('--workers', type=int, default=4,
+                               help='Concurrent lookups (default: %(default)s)')
+    preload_parser.add_argument('--verify', action='store_true',
+                               help='Verify PDF URLs (slower; verified entries win merges)')
+    preload_parser.add_argument('--retry-errors', action='store_true',
+                               help='Re-run PMIDs whose cached result was an error')
+    preload_parser.set_defaults(func=cmd_preload)
+
+    export_parser = subparsers.add_parser('export', help='Export the cache to JSONL or Parquet')
+    export_parser.add_argument('output', help='Output file (.jsonl, .jsonl.gz or .parquet)')
+    export_parser.add_argument('--format', choices=['jsonl', 'parquet'],
+                              help='Output format (default: from file extension)')
+    export_parser.set_defaults(func=cmd_export)
+
+    import_parser = subparsers.add_parser('import', help='Merge exported files into the cache')
+    import_parser.add_argument('inputs', nargs='+', help='Files to merge (.jsonl, .jsonl.gz or .parquet)')
+    import_parser.add_argument('--format', choices=['jsonl', 'parquet'],
+                              help='Input format (default: from file extension)')
+    import_parser.set_defaults(func=cmd_import)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    setup_logging(args.verbose)
+    try:
+        args.func(args)
+    except MetaPubError as error:
+        print(f"❌ {error}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
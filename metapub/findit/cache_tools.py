@@ -0,0 +1,277 @@
+"""Bulk tools for the FindIt result cache (findit.db).
+
+FindIt stores one entry per PMID, keyed by int(pmid), with a JSON value of
+{url, reason, verify, timestamp}. This module lets you:
+
+    preload_pmids()   run FindIt over a list of PMIDs concurrently to warm the cache
+    export_cache()    write cache entries to compact JSONL (optionally .gz) or Parquet
+    import_cache()    merge entries from JSONL/Parquet into a cache
+
+Merging keeps the "best" entry per PMID: a verified entry beats an unverified
+one, and otherwise the newer timestamp wins. That makes it safe to ship
+pre-warmed caches to workers and to fold worker caches back together.
+
+Parquet support requires the optional `pyarrow` package.
+
+See also the `metapub-findit-cache` command line tool (metapub.findit.cache_cli).
+"""
+
+import gzip
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from ..cache_utils import get_cache_path
+from ..config import DEFAULT_CACHE_DIR
+from ..exceptions import MetaPubError
+
+from .findit import FindIt, CACHE_FILENAME
+
+log = logging.getLogger('metapub.findit.cache_tools')
+
+# Columns of an exported cache entry, in output order.
+ENTRY_FIELDS = ('pmid', 'url', 'reason', 'verify', 'timestamp')
+
+re_pmid = re.compile(r'^\d+$')
+
+
+def findit_cache_path(cachedir=DEFAULT_CACHE_DIR):
+    """Return the path of findit.db inside cachedir (creating the directory if needed)."""
+    return get_cache_path(cachedir, CACHE_FILENAME)
+
+
+def read_pmid_list(path):
+    """Read PMIDs (one per line) from a file, skipping blanks, junk and duplicates."""
+    seen = set()
+    pmids = []
+    with open(path, 'r') as fh:
+        for line in fh:
+            pmid = line.strip()
+            if re_pmid.match(pmid) and pmid not in seen:
+                seen.add(pmid)
+                pmids.append(pmid)
+    return pmids
+
+
+def _findit_entry(pmid, cachedir, verify, retry_errors):
+    try:
+        src = FindIt(pmid=pmid, cachedir=cachedir, verify=verify, retry_errors=retry_errors)
+        return pmid, src.url, src.reason
+    except Exception as error:
+        return pmid, None, 'ERROR: %s' % error
+
+
+def preload_pmids(pmids, cachedir=DEFAULT_CACHE_DIR, workers=4, verify=False,
+                  retry_errors=False, callback=None):
+    """Run FindIt over pmids concurrently so that results land in the FindIt cache.
+
+    PubMed requests still go through the shared NCBI rate limiter, so more
+    workers mostly help with publisher-side latency (especially with verify=True).
+
+    :param pmids: iterable of PMIDs
+    :param cachedir: FindIt cache directory (must not be None)
+    :param workers: number of concurrent FindIt lookups
+    :param verify: verify PDF URLs (slower, but verified entries win merges)
+    :param retry_errors: re-run PMIDs whose cached result was an error
+    :param callback: optional function(pmid, url, reason) called as each lookup finishes
+    :return: dict of counts: total, url, noformat, error, other
+    """
+    if cachedir is None:
+        raise MetaPubError('preload_pmids needs a cachedir to preload into.')
+
+    stats = {'total': 0, 'url': 0, 'noformat': 0, 'error': 0, 'other': 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda pmid: _findit_entry(pmid, cachedir, verify, retry_errors), pmids)
+        for pmid, url, reason in results:
+            stats['total'] += 1
+            if url:
+                stats['url'] += 1
+            elif reason and reason.startswith('NOFORMAT'):
+                stats['noformat'] += 1
+            elif reason and reason.startswith(('ERROR', 'TXERROR')):
+                stats['error'] += 1
+            else:
+                stats['other'] += 1
+            if callback:
+                callback(pmid, url, reason)
+    return stats
+
+
+def _entry_rank(entry):
+    """Merge ordering: verified beats unverified, then newest wins."""
+    return (bool(entry.get('verify')), entry.get('timestamp') or 0)
+
+
+def _decode_value(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _connect(cache_path):
+    conn = sqlite3.connect(cache_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache (
+            key BLOB PRIMARY KEY,
+            value BLOB,
+            created INTEGER,
+            value_compressed BOOL DEFAULT 0
+        )
+    """)
+    return conn
+
+
+def iter_cache_entries(cache_path):
+    """Yield cache entries as dicts with ENTRY_FIELDS keys (pmid as int)."""
+    conn = _connect(cache_path)
+    try:
+        for key, value in conn.execute('SELECT key, value FROM cache'):
+            data = _decode_value(value)
+            if not isinstance(data, dict):
+                continue
+            try:
+                pmid = int(key)
+            except (TypeError, ValueError):
+                continue
+            entry = {name: data.get(name) for name in ENTRY_FIELDS}
+            entry['pmid'] = pmid
+            entry['verify'] = bool(entry['verify'])
+            yield entry
+    finally:
+        conn.close()
+
+
+def _guess_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'parquet' if path.endswith('.parquet') else 'jsonl'
+
+
+def _open_text(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise MetaPubError('Parquet support requires the pyarrow package (pip install pyarrow).')
+    return pyarrow
+
+
+def export_cache(cache_path, out_path, fmt=None):
+    """Export FindIt cache entries to JSONL (one compact object per line) or Parquet.
+
+    :param cache_path: path to findit.db
+    :param out_path: output file; '.gz' compresses JSONL, '.parquet' selects Parquet
+    :param fmt: 'jsonl' or 'parquet' (default: guessed from out_path)
+    :return: number of entries written
+    """
+    fmt = _guess_format(out_path, fmt)
+    entries = iter_cache_entries(cache_path)
+
+    if fmt == 'parquet':
+        pa = _require_pyarrow()
+        rows = list(entries)
+        table = pa.table({name: [row[name] for row in rows] for name in ENTRY_FIELDS})
+        pa.parquet.write_table(table, out_path)
+        return len(rows)
+
+    count = 0
+    with _open_text(out_path, 'w') as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry, separators=(',', ':')))
+            fh.write('\n')
+            count += 1
+    return count
+
+
+def _read_entries(in_path, fmt=None):
+    fmt = _guess_format(in_path, fmt)
+    if fmt == 'parquet':
+        pa = _require_pyarrow()
+        for row in pa.parquet.read_table(in_path).to_pylist():
+            yield row
+        return
+
+    with _open_text(in_path, 'r') as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def merge_entries(cache_path, entries, batch_size=5000):
+    """Merge entries into a FindIt cache, keeping the best entry per PMID.
+
+    An incoming entry replaces the cached one only if it ranks higher
+    (verified beats unverified; otherwise newer timestamp wins).
+
+    :param cache_path: path to findit.db (created if missing)
+    :param entries: iterable of dicts with at least pmid and timestamp
+    :param batch_size: entries per transaction
+    :return: dict of counts: read, written, kept (existing entry was better)
+    """
+    stats = {'read': 0, 'written': 0, 'kept': 0}
+    conn = _connect(cache_path)
+
+    def flush(batch):
+        existing = {}
+        keys = list(batch)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for key, value in conn.execute(
+                    'SELECT key, value FROM cache WHERE key IN (%s)' % placeholders, chunk):
+                existing[key] = _decode_value(value)
+
+        rows = []
+        for key, entry in batch.items():
+            current = existing.get(key)
+            if isinstance(current, dict) and _entry_rank(current) >= _entry_rank(entry):
+                stats['kept'] += 1
+                continue
+            value = {'url': entry.get('url'), 'reason': entry.get('reason'),
+                     'verify': bool(entry.get('verify')), 'timestamp': entry.get('timestamp')}
+            rows.append((key, json.dumps(value).encode('utf-8'), int(entry.get('timestamp') or 0), 0))
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO cache (key, value, created, value_compressed) '
+                             'VALUES (?, ?, ?, ?)', rows)
+        stats['written'] += len(rows)
+
+    try:
+        batch = {}
+        for entry in entries:
+            stats['read'] += 1
+            key = int(entry['pmid'])
+            # Duplicates within the input are merged by the same rule.
+            if key in batch and _entry_rank(batch[key]) >= _entry_rank(entry):
+                continue
+            batch[key] = entry
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = {}
+        if batch:
+            flush(batch)
+    finally:
+        conn.close()
+    return stats
+
+
+def import_cache(cache_path, in_path, fmt=None):
+    """Merge a JSONL/Parquet export into a FindIt cache (see merge_entries).
+
+    :param cache_path: path to findit.db (created if missing)
+    :param in_path: input file; '.gz' for gzipped JSONL, '.parquet' for Parquet
+    :param fmt: 'jsonl' or 'parquet' (default: guessed from in_path)
+    :return: dict of counts: read, written, kept
+    """
+    return merge_entries(cache_path, _read_entries(in_path, fmt))
@@ -12,7 +12,7 @@ from .generic import (
     the_doi_2step, standardize_journal_name, verify_pdf_url, rectify_pma_for_vip_links,
     the_doi_slide, the_pmid_pogo, the_vip_shake, the_vip_nonstandard_shake,
     the_pii_polka, the_pii_prance, the_pii_shuffle, the_pmc_twist, the_bmc_boogie, OK_STATUS_CODES,
-    detect_paywall_from_html, PAYWALL_TERMS, unified_uri_get
+    detect_paywall_from_html, PAYWALL_TERMS, unified_uri_get, race_pdf_urls, RACE_MAX_WORKERS
 )
 
 # Backward compatibility aliases
@@ -63,7 +63,7 @@ from .rsc import the_rsc_reaction
 # SAGE now uses the_doi_slide generic function
 # Sciendo now uses the_doi_slide generic function
 from .scielo import the_scielo_chula
-from .sciencedirect import the_sciencedirect_disco
+from .sciencedirect import the_sciencedirect_disco, sciencedirect_pdf_candidates
 from .scirp import the_scirp_timewarp
 # Spandidos now uses the_doi_slide generic function
 # Springer now uses the_doi_slide generic function
@@ -75,3 +75,11 @@ from .wjgnet import the_wjgnet_wave
 from .wolterskluwer import the_wolterskluwer_volta
 # World Scientific now uses the_doi_slide generic function
 
+
+# Candidate URL generators for dances that can have their fallbacks verified
+# concurrently (see race_pdf_urls and PublisherHandler.race_pdf_url).
+# Maps dance function name -> generator(pma, request_timeout, max_redirects)
+# yielding candidate PDF URLs in priority order.
+CANDIDATE_GENERATORS = {
+    'the_sciencedirect_disco': sciencedirect_pdf_candidates,
+}
@@ -5,6 +5,8 @@ but provide general framework functionality like DOI resolution, VIP-based URLs,
 PII-based URLs, etc.
 """
 
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlsplit, urljoin
 from urllib3.exceptions import InsecureRequestWarning
 from datetime import datetime
@@ -13,6 +15,7 @@ import ssl
 import certifi
 import warnings
 
+from ...crossref_client import get_crossref_client
 from ...dx_doi import DxDOI, DX_DOI_URL
 from ...pubmedarticle import square_voliss_data_for_pma
 from ...exceptions import AccessDenied, NoPDFLink, BadDOI, DxDOIError
@@ -21,12 +24,16 @@ from ...utils import remove_chars
 
 from ..journals import simple_formats_pmid
 from ..registry import JournalRegistry
+from ..timing import timed_span
 import logging
 
 log = logging.getLogger('metapub.findit.dances')
 
 OK_STATUS_CODES = (200, 301, 302, 307)
 
+# Maximum concurrent verifications per race_pdf_urls call
+RACE_MAX_WORKERS = 4
+
 # Publishers known to block automated access with Cloudflare/bot protection
 BLOCKED_PUBLISHERS = {
     'aip',           # American Institute of Physics - Cloudflare
@@ -39,11 +46,13 @@ BLOCKED_PUBLISHERS = {
 }
 
 
+@timed_span('crossref')
 def get_crossref_pdf_links(doi):
     """Retrieve PDF links for a DOI from CrossRef API.
 
     This function provides a workaround for publishers that block direct access
-    but provide PDF URLs through CrossRef metadata.
+    but provide PDF URLs through CrossRef metadata. Requests go through the
+    shared, cached and rate-limited client in metapub.crossref_client.
 
     Args:
         doi (str): DOI to look up
@@ -57,21 +66,8 @@ def get_crossref_pdf_links(doi):
     if not doi:
         return []
 
-    url = f'https://api.crossref.org/works/{doi}'
-    headers = {'User-Agent': 'metapub/1.0 (mailto:support@metapub.org)'}
-
     try:
-        session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=0)
-        adapter.max_retries.redirect = 3
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-        response = session.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            raise NoPDFLink(f'TXERROR: CrossRef API returned {response.status_code} for DOI {doi}')
-
-        data = response.json()
-        work = data.get('message', {})
+        work = get_crossref_client().work(doi, timeout=10)
 
         # Extract PDF links from CrossRef link metadata
         pdf_links = []
@@ -85,6 +81,8 @@ def get_crossref_pdf_links(doi):
 
         return pdf_links
 
+    except requests.HTTPError as e:
+        raise NoPDFLink(f'TXERROR: CrossRef API returned {e.response.status_code} for DOI {doi}')
     except requests.RequestException as e:
         raise NoPDFLink(f'TXERROR: CrossRef API request failed - {str(e)}')
     except (KeyError, ValueError) as e:
@@ -161,6 +159,7 @@ def _start_dx_doi_engine():
         dx_doi_engine = DxDOI()
 
 
+@timed_span('dxdoi')
 def the_doi_2step(doi):
     '''Given a doi, uses DxDOI lookup engine to source the publisher's
             article URL for this doi.
@@ -189,6 +188,7 @@ def standardize_journal_name(journal_name):
     return remove_chars(journal_name, '.')
 
 
+@timed_span('verify_pdf_url')
 def verify_pdf_url(pdfurl, publisher_name='', referrer=None, request_timeout=15, max_redirects=3):
     """
     Enhanced PDF URL verification with robust handling for various publisher quirks.
@@ -297,6 +297,70 @@ def verify_pdf_url(pdfurl, publisher_name='', referrer=None, request_timeout=15,
         raise NoPDFLink('TXERROR: %i status returned from %s url (%s)' % (status_code, publisher_name, pdfurl))
 
 
+def race_pdf_urls(candidates, publisher_name='', referrer=None, request_timeout=10,
+                  max_redirects=3, max_workers=RACE_MAX_WORKERS):
+    """Verify candidate PDF URLs concurrently; the first valid one in priority order wins.
+
+    Candidates are submitted for verification as soon as the iterable yields
+    them, so a candidate generator that needs network access of its own (e.g.
+    a CrossRef or dx.doi.org lookup) runs while earlier candidates are being
+    verified. Once the winner is known, queued verifications are cancelled and
+    any still in flight are abandoned (they finish within request_timeout in
+    the background).
+
+    Args:
+        candidates: iterable of URLs, highest priority first
+        publisher_name: Publisher name for error messages (default: '')
+        referrer: Optional referrer URL for requests (default: None)
+        request_timeout: HTTP request timeout in seconds per verification
+        max_redirects: Maximum number of redirects to follow
+        max_workers: Maximum concurrent verifications (default: RACE_MAX_WORKERS)
+
+    Returns:
+        The highest-priority URL that verified as a PDF
+
+    Raises:
+        NoPDFLink/AccessDenied: the error from the highest-priority candidate if
+            none verified, or NoPDFLink('MISSING: ...') if there were no candidates.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = []
+
+    def first_valid(block):
+        # Walk candidates in priority order; a pending higher-priority candidate
+        # means the winner can't be decided yet (unless we're willing to wait).
+        first_error = None
+        for future in futures:
+            if not block and not future.done():
+                return None, None
+            try:
+                return future.result(), None
+            except NoPDFLink as error:
+                first_error = first_error or error
+        return None, first_error
+
+    try:
+        for pdfurl in candidates:
+            # copy_context keeps the worker's timing spans attached to this lookup
+            futures.append(executor.submit(contextvars.copy_context().run, verify_pdf_url,
+                                           pdfurl, publisher_name, referrer,
+                                           request_timeout, max_redirects))
+            url, _ = first_valid(block=False)
+            if url:
+                return url
+
+        url, error = first_valid(block=True)
+        if url:
+            return url
+        if error:
+            raise error
+        raise NoPDFLink('MISSING: no candidate PDF URLs for %s' % (publisher_name or 'publisher'))
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
 def rectify_pma_for_vip_links(pma):
     '''takes a PubMedArticle object and "squares" the volume/issue/page info (sometimes there
     are weird characters in it, or sometimes the issue number is packed into the volume field,
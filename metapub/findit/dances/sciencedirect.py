@@ -101,3 +101,43 @@ def the_sciencedirect_disco(pma, verify=True, request_timeout=10, max_redirects=
 
         # If all strategies fail
         raise NoPDFLink(f'MISSING: ScienceDirect article could not be accessed via DOI fallback - Journal: {pma.journal}')
+
+
+def sciencedirect_pdf_candidates(pma, request_timeout=10, max_redirects=3):
+    '''Yield candidate ScienceDirect PDF URLs in the order the_sciencedirect_disco tries them.
+
+    Used by race_pdf_urls so the fallbacks can be verified concurrently:
+    PII-based URLs (primary, then alternate) if a PII is present; otherwise
+    CrossRef PDF links, then PII-based URLs from the dx.doi.org resolution.
+
+    :param: pma (PubMedArticle object)
+    :return: generator of url strings
+    :raises: NoPDFLink if neither PII nor DOI is available
+    '''
+    if not pma.pii and not pma.doi:
+        raise NoPDFLink('MISSING: PII or DOI required for ScienceDirect access')
+
+    if pma.pii:
+        yield from _pii_pdf_urls(pma.pii)
+        return
+
+    try:
+        yield from get_crossref_pdf_links(pma.doi)
+    except NoPDFLink:
+        pass
+
+    try:
+        resolved_url = the_doi_2step(pma.doi)
+    except NoPDFLink:
+        return
+    if 'sciencedirect.com' in resolved_url or 'elsevier.com' in resolved_url:
+        pii_match = re.search(r'/pii/([A-Z0-9\-]+)', resolved_url)
+        if pii_match:
+            yield from _pii_pdf_urls(pii_match.group(1))
+
+
+def _pii_pdf_urls(pii):
+    '''Return the primary and alternate ScienceDirect PDF URLs for a PII.'''
+    clean_pii = remove_chars(pii, '-()[]{}')
+    return [f'https://www.sciencedirect.com/science/article/pii/{clean_pii}/pdfft?isDTMRedir=true&download=true',
+            f'https://www.sciencedirect.com/science/article/pii/{clean_pii}/pdfft']
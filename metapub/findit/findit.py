@@ -16,6 +16,7 @@ from ..convert import doi2pmid
 from ..cache_utils import get_cache_path, SQLiteCache, datetime_to_timestamp
 
 from .logic import find_article_from_pma
+from .timing import collect_timings, timed
 from .dances import the_sciencedirect_disco, the_doi_2step, the_wolterskluwer_volta
 
 log = logging.getLogger('metapub.findit')
@@ -96,6 +97,7 @@ class FindIt(object):
         source.pmid
         source.doi
         source.doi_score
+        source.timings
 
         The "doi_score" is an indication of where the DOI for this PMID ended up
         coming from. If it was supplied by the user or by PubMed, doi_score will be 100.
@@ -103,6 +105,10 @@ class FindIt(object):
         If CrossRef came into play during the process to find a DOI that was missing
         for the PubMedArticle object, the doi_score will come from CrossRef (0 to 100).
 
+        "timings" maps each stage of the lookup (e.g. pubmed_fetch, crossref, dxdoi,
+        registry_lookup, dance, verify_pdf_url) to the seconds spent in it. See
+        metapub.findit.timing for aggregate histograms and metrics hooks.
+
         Network Timeout Configuration (v0.11+):
         =======================================
         
@@ -137,6 +143,9 @@ class FindIt(object):
                 tmpdir (str): Temporary directory for downloads. Defaults to '/tmp'.
                 request_timeout (int): Timeout in seconds for HTTP requests. Defaults to 10.
                 max_redirects (int): Maximum number of redirects to follow. Defaults to 3.
+                race_candidates (bool): For publishers with several fallback URLs
+                    (e.g. ScienceDirect), verify the candidates concurrently and take
+                    the first valid PDF in priority order. Defaults to False.
 
         Raises:
             MetaPubError: If neither pmid nor doi is provided.
@@ -164,6 +173,7 @@ class FindIt(object):
         self.tmpdir = kwargs.get('tmpdir', '/tmp')
         self.doi_score = None
         self.pma = None
+        self.timings = {}
 
         self.verify = kwargs.get('verify', True)
         retry_errors = kwargs.get('retry_errors', False)
@@ -171,6 +181,7 @@ class FindIt(object):
         # Network timeout and redirect settings
         self.request_timeout = kwargs.get('request_timeout', 10)
         self.max_redirects = kwargs.get('max_redirects', 3)
+        self.race_candidates = kwargs.get('race_candidates', False)
 
         # Store cachedir for registry system
         self._cachedir = cachedir
@@ -186,22 +197,24 @@ class FindIt(object):
         else:
             self._log.setLevel(logging.INFO)
 
-        if self.pmid:
-            self._load_pma_from_pmid()
-        elif self.doi:
-            self._load_pma_from_doi()
-        else:
+        if not (self.pmid or self.doi):
             raise MetaPubError(
                 'Supply either a pmid or a doi to instantiate. e.g. FindIt(pmid=1234567)')
 
-        try:
-            if self._cache:
-                self.url, self.reason = self.load_from_cache(verify=self.verify, retry_errors=retry_errors)
+        with collect_timings() as self.timings, timed('findit'):
+            if self.pmid:
+                self._load_pma_from_pmid()
             else:
-                self.url, self.reason = self.load(verify=self.verify)
+                self._load_pma_from_doi()
+
+            try:
+                if self._cache:
+                    self.url, self.reason = self.load_from_cache(verify=self.verify, retry_errors=retry_errors)
+                else:
+                    self.url, self.reason = self.load(verify=self.verify)
 
-        except requests.exceptions.ConnectionError as error:
-            self.reason = 'TXERROR: %r' % error
+            except requests.exceptions.ConnectionError as error:
+                self.reason = 'TXERROR: %r' % error
 
     def load(self, verify=True):
         """Find full-text PDF URL for the loaded article.
@@ -225,7 +238,8 @@ class FindIt(object):
         """
         return find_article_from_pma(self.pma, use_nih=self.use_nih, verify=verify, 
                                    cachedir=self._cachedir, request_timeout=self.request_timeout,
-                                   max_redirects=self.max_redirects)
+                                   max_redirects=self.max_redirects,
+                                   race_candidates=self.race_candidates)
 
     def load_from_cache(self, verify=True, retry_errors=False):
         """Load article URL from cache, with fallback to fresh lookup.
@@ -256,7 +270,8 @@ class FindIt(object):
         if retry_errors:
             retry_reasons.extend(['PAYWALL', 'TODO', 'CANTDO', 'TXERROR'])
 
-        cache_result = self._query_cache(self.pmid)
+        with timed('cache_lookup'):
+            cache_result = self._query_cache(self.pmid)
 
         if cache_result:
             url = cache_result['url']
@@ -294,7 +309,8 @@ class FindIt(object):
             self.doi_score (100 if doi found in self.pma, else crossref score)
         """
 
-        self.pma = pm_fetch.article_by_pmid(self.pmid)
+        with timed('pubmed_fetch'):
+            self.pma = pm_fetch.article_by_pmid(self.pmid)
 
         if self.pma.doi:
             self.doi = self.pma.doi
@@ -305,7 +321,8 @@ class FindIt(object):
         if self.pma.doi == None:
             if self.use_crossref:
                 self._log.debug('Using CrossRef to find DOI for PMID %s', self.pmid)
-                work = self.crfetch.article_by_pma(self.pma)
+                with timed('crossref'):
+                    work = self.crfetch.article_by_pma(self.pma)
                 if work:
                     self.doi = work.doi
                     self.doi_score = work.score
@@ -324,9 +341,11 @@ class FindIt(object):
             self.pma  (if pmid was found)
             self.doi_score (10.0 if doi found in self.pma, else crossref score)
         """
-        self.pmid = doi2pmid(self.doi)
+        with timed('doi2pmid'):
+            self.pmid = doi2pmid(self.doi)
         if self.pmid:
-            self.pma = pm_fetch.article_by_pmid(self.pmid)
+            with timed('pubmed_fetch'):
+                self.pma = pm_fetch.article_by_pmid(self.pmid)
             self.doi_score = 100
         else:
             raise MetaPubError('Could not get a pmid for doi %s' % self.doi)
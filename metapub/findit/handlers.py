@@ -8,6 +8,7 @@ import logging
 from typing import Optional, Tuple, Dict, Any
 from ..exceptions import MetaPubError
 from .registry import standardize_journal_name
+from .timing import timed, timed_span, timing_labels
 
 log = logging.getLogger('metapub.findit.handlers')
 
@@ -73,8 +74,9 @@ class PublisherHandler:
 
             log.debug("Calling dance function: %s for journal: %s (PMID: %s, Publisher: %s)",
                      self.dance_function, pma.journal, pma.pmid, self.name)
-            result = dance_func(pma, verify=verify, request_timeout=request_timeout, 
-                              max_redirects=max_redirects)
+            with timing_labels(publisher=self.name, dance=self.dance_function), timed('dance'):
+                result = dance_func(pma, verify=verify, request_timeout=request_timeout, 
+                                  max_redirects=max_redirects)
 
             # Normalize return value to always be (url, reason) tuple
             if isinstance(result, tuple):
@@ -88,17 +90,55 @@ class PublisherHandler:
         #     have control over the dance functions and (2) lack of dance function is a major
         #     breaking error that we should fix, not simply log.
         except Exception as e:
-            # Check if this is a normal access denial (not a real error)
-            error_msg = str(e)
-            if error_msg.startswith('DENIED:') or error_msg.startswith('PAYWALL'):
-                # This is normal operation - publisher denied access or requires subscription
-                log.debug("Dance function %s: %s", self.dance_function, error_msg)
-                return None, error_msg
-            else:
-                # This is an unexpected error that should be logged with full context
-                log.error("Dance function %s failed for PMID %s, journal '%s', publisher '%s': %s", 
-                         self.dance_function, pma.pmid, pma.journal, self.name, e)
-                return None, f"TXERROR: {e}"
+            return None, self._reason_for_error(pma, e)
+
+    def race_pdf_url(self, pma, request_timeout: int = 10, max_redirects: int = 3,
+                     max_workers: int = 4) -> Tuple[Optional[str], Optional[str]]:
+        """Get a verified PDF URL by checking the dance's candidate URLs concurrently.
+
+        Dances listed in dances.CANDIDATE_GENERATORS yield their fallback URLs in
+        priority order; these are verified in parallel and the first valid PDF in
+        priority order wins. Other dances are run normally with verify=True.
+
+        Args:
+            pma: PubMedArticle object
+            request_timeout: HTTP request timeout in seconds
+            max_redirects: Maximum number of redirects to follow
+            max_workers: Maximum concurrent verifications
+
+        Returns:
+            Tuple of (url, reason)
+        """
+        from . import dances
+        candidates = dances.CANDIDATE_GENERATORS.get(self.dance_function)
+        if candidates is None:
+            return self.get_pdf_url(pma, verify=True, request_timeout=request_timeout,
+                                    max_redirects=max_redirects)
+        try:
+            log.debug("Racing candidate URLs from %s for journal: %s (PMID: %s, Publisher: %s)",
+                     self.dance_function, pma.journal, pma.pmid, self.name)
+            with timing_labels(publisher=self.name, dance=self.dance_function), timed('dance'):
+                url = dances.race_pdf_urls(candidates(pma, request_timeout=request_timeout,
+                                                      max_redirects=max_redirects),
+                                           self.name, request_timeout=request_timeout,
+                                           max_redirects=max_redirects, max_workers=max_workers)
+            return url, None
+        except Exception as e:
+            return None, self._reason_for_error(pma, e)
+
+    def _reason_for_error(self, pma, e: Exception) -> str:
+        """Convert an exception raised while dancing into a FindIt reason string."""
+        # Check if this is a normal access denial (not a real error)
+        error_msg = str(e)
+        if error_msg.startswith('DENIED:') or error_msg.startswith('PAYWALL'):
+            # This is normal operation - publisher denied access or requires subscription
+            log.debug("Dance function %s: %s", self.dance_function, error_msg)
+            return error_msg
+        else:
+            # This is an unexpected error that should be logged with full context
+            log.error("Dance function %s failed for PMID %s, journal '%s', publisher '%s': %s", 
+                     self.dance_function, pma.pmid, pma.journal, self.name, e)
+            return f"TXERROR: {e}"
 
 
 class PaywallHandler(PublisherHandler):
@@ -160,8 +200,9 @@ class RegistryBackedLookupSystem:
         handler = HandlerFactory.create_handler(publisher_data)
         return handler
 
+    @timed_span('find_pdf_url')
     def find_pdf_url(self, pma, verify: bool = True, request_timeout: int = 10,
-                    max_redirects: int = 3) -> Tuple[Optional[str], Optional[str]]:
+                    max_redirects: int = 3, race_candidates: bool = False) -> Tuple[Optional[str], Optional[str]]:
         """Find PDF URL for a PubMed article using the registry system.
 
         Args:
@@ -169,14 +210,20 @@ class RegistryBackedLookupSystem:
             verify: Whether to verify URLs
             request_timeout: HTTP request timeout in seconds
             max_redirects: Maximum number of redirects to follow
+            race_candidates: Verify the dance's candidate URLs concurrently
+                (only applies when verify is True; see PublisherHandler.race_pdf_url)
 
         Returns:
             Tuple of (url, reason)
         """
         journal_name = standardize_journal_name(pma.journal)
-        handler = self.get_handler_for_journal(journal_name)
+        with timed('registry_lookup'):
+            handler = self.get_handler_for_journal(journal_name)
 
-        if handler:
+        if handler and verify and race_candidates:
+            return handler.race_pdf_url(pma, request_timeout=request_timeout,
+                                        max_redirects=max_redirects)
+        elif handler:
             return handler.get_pdf_url(pma, verify=verify, request_timeout=request_timeout,
                                      max_redirects=max_redirects)
         else:
@@ -10,6 +10,7 @@ from .dances import *
 from .registry import JournalRegistry, standardize_journal_name
 from .handlers import RegistryBackedLookupSystem
 from .journals import simple_formats_pmid
+from .timing import timed_span
 
 log = logging.getLogger('metapub.findit.logic')
 
@@ -81,8 +82,9 @@ def _get_lookup_system(cachedir=None):
         using any FindIt functionality.
 """
 
+@timed_span('find_article_from_pma')
 def find_article_from_pma(pma, verify=True, use_nih=False, cachedir=None, 
-                        request_timeout=10, max_redirects=3):
+                        request_timeout=10, max_redirects=3, race_candidates=False):
     """ The real workhorse of FindIt.
 
         Based on the contents of the supplied PubMedArticle object, this function
@@ -113,6 +115,8 @@ def find_article_from_pma(pma, verify=True, use_nih=False, cachedir=None,
         :param cachedir: (str) cache directory for registry database
         :param request_timeout: (int) HTTP request timeout in seconds, default: 10
         :param max_redirects: (int) maximum redirects to follow, default: 3
+        :param race_candidates: (bool) verify candidate URLs concurrently for dances
+                                that support it, default: False
         :return: (url, reason)
     """
     reason = ''
@@ -162,7 +166,8 @@ def find_article_from_pma(pma, verify=True, use_nih=False, cachedir=None,
     lookup_system = _get_lookup_system(cachedir=cachedir)
     url, reason = lookup_system.find_pdf_url(pma, verify=verify, 
                                             request_timeout=request_timeout, 
-                                            max_redirects=max_redirects)
+                                            max_redirects=max_redirects,
+                                            race_candidates=race_candidates)
     return (url, reason)
 
 
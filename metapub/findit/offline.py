@@ -0,0 +1,296 @@
+"""Offline URL construction for FindIt.
+
+Many FindIt dances can build a PDF link purely from article metadata when
+verify=False (the_doi_slide, the_vip_shake, the_pii_prance, the_bmc_boogie,
+...), but FindIt itself always fetches the PubMedArticle first and each dance
+opens its own JournalRegistry connection. For bulk work that is far too slow.
+
+OfflineURLBuilder loads the journal registry into memory once and then builds
+candidate URLs for already-parsed article records with zero I/O:
+
+    from metapub.findit.offline import OfflineURLBuilder
+
+    builder = OfflineURLBuilder()
+    for result in builder.build_many(records):
+        print(result.pmid, result.url, result.reason)
+
+Records may be dicts, namedtuples / objects (including PubMedArticle), or a
+pandas DataFrame (rows are read with itertuples). Recognized fields are:
+pmid, doi, pii, pmc, journal, volume, issue, first_page and pages.
+
+Journals whose dance needs network access to produce a link (e.g. page
+scraping or DOI resolution) are flagged with network_required=True and a
+"NETWORK:" reason instead of a URL.
+"""
+
+import json
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..exceptions import NoPDFLink
+from ..pubmedarticle import square_voliss_data_for_pma
+
+from .dances.generic import EUROPEPMC_PDF_URL
+from .journals import simple_formats_pmid
+from .registry import JournalRegistry, standardize_journal_name
+
+log = logging.getLogger('metapub.findit.offline')
+
+RECORD_FIELDS = ('pmid', 'doi', 'pii', 'pmc', 'journal', 'volume', 'issue', 'first_page', 'pages')
+
+BMC_DEFAULT_FORMAT = 'http://www.biomedcentral.com/content/pdf/{aid}.pdf'
+
+
+@dataclass
+class OfflineResult:
+    """Candidate PDF links for one article record, built without network access."""
+    pmid: Optional[str]
+    urls: List[str] = field(default_factory=list)
+    dance: Optional[str] = None
+    reason: Optional[str] = None
+    network_required: bool = False
+
+    @property
+    def url(self) -> Optional[str]:
+        """Best candidate URL (the one FindIt would return with verify=False), or None."""
+        return self.urls[0] if self.urls else None
+
+
+class OfflineArticle(object):
+    """Minimal stand-in for PubMedArticle carrying only what URL templates need."""
+
+    __slots__ = RECORD_FIELDS + ('history',)
+
+    def __init__(self, **kwargs):
+        for name in RECORD_FIELDS:
+            value = kwargs.get(name)
+            setattr(self, name, None if value is None or value == '' else str(value))
+        if self.first_page is None and self.pages:
+            self.first_page = self.pages.split('-')[0]
+        if self.pmc and self.pmc.upper().startswith('PMC'):
+            self.pmc = self.pmc[3:]
+        self.history = {}
+
+    @classmethod
+    def from_record(cls, record):
+        """Build an OfflineArticle from a mapping, a namedtuple/row or a PubMedArticle."""
+        if isinstance(record, cls):
+            return record
+        if isinstance(record, Mapping):
+            return cls(**{name: record.get(name) for name in RECORD_FIELDS})
+        return cls(**{name: getattr(record, name, None) for name in RECORD_FIELDS})
+
+
+def _pii_template_url(article, info):
+    journal_params = info['format_params'] or {}
+    if 'template' not in journal_params:
+        raise NoPDFLink('NOFORMAT: no URL template for journal %s' % article.journal)
+    return journal_params['template'].format(a=article)
+
+
+def _vip_nonstandard_url(article, info):
+    _rectify_vip(article)
+    return _pii_template_url(article, info)
+
+
+def _rectify_vip(article):
+    square_voliss_data_for_pma(article)
+    if not (article.volume and article.first_page and article.issue):
+        raise NoPDFLink('MISSING: vip (volume, issue, and/or first_page missing from PubMedArticle)')
+
+
+def _vip_url(article, info):
+    _rectify_vip(article)
+    host = (info['format_params'] or {}).get('host', '')
+    return info['format_template'].format(host=host, volume=article.volume,
+                                          issue=article.issue, first_page=article.first_page)
+
+
+def _doi_url(article, info):
+    if not article.doi:
+        raise NoPDFLink('MISSING: DOI required for DOI-based publishers - attempted: none')
+    return info['format_template'].format(doi=article.doi)
+
+
+def _nature_url(article, info):
+    if article.doi and article.doi.startswith('10.1038/'):
+        return 'https://www.nature.com/articles/%s.pdf' % article.doi.split('10.1038/', 1)[1]
+    raise NoPDFLink('MISSING: Nature DOI (10.1038/*) required for offline URL construction')
+
+
+# Dances whose verify=False output depends only on article metadata and the
+# registry. Anything else is reported as requiring network access.
+# (For BLOCKED_PUBLISHERS, the_doi_slide would consult CrossRef first; offline
+# we return the registry template URL it falls back to.)
+OFFLINE_DANCES = {
+    'the_doi_slide': _doi_url,
+    'the_vip_shake': _vip_url,
+    'the_vip_nonstandard_shake': _vip_nonstandard_url,
+    'the_vip_shake_nonstandard': _vip_nonstandard_url,
+    'the_pii_prance': _pii_template_url,
+    'the_pii_polka': _pii_template_url,
+    'the_pii_shuffle': _pii_template_url,
+    'the_nature_ballet': _nature_url,
+}
+
+
+class OfflineURLBuilder(object):
+    """Builds FindIt candidate URLs from article metadata without any network access.
+
+    The journal registry is read into memory once on construction, so building
+    a URL is a dictionary lookup plus a string format.
+    """
+
+    def __init__(self, registry=None):
+        """
+        Args:
+            registry: JournalRegistry to load from. Defaults to the shipped registry.
+        """
+        own_registry = registry is None
+        if own_registry:
+            registry = JournalRegistry()
+        try:
+            self._journals = self._load_journals(registry)
+            bmc_config = registry.get_publisher_config('Bmc')
+        finally:
+            if own_registry:
+                registry.close()
+
+        self._bmc_format = BMC_DEFAULT_FORMAT
+        if bmc_config and bmc_config.get('format_template'):
+            self._bmc_format = bmc_config['format_template']
+        self._journal_keys = {}
+        log.debug('OfflineURLBuilder loaded %d journal names', len(self._journals))
+
+    @staticmethod
+    def _load_journals(registry) -> Dict[str, Dict[str, Any]]:
+        """Return a dict of lowercase journal name/alias -> publisher info."""
+        rows = registry._get_connection().execute('''
+            SELECT j.name, j.aliases, j.format_params, p.name, p.dance_function, p.format_template
+            FROM journals j
+            JOIN publishers p ON j.publisher_id = p.id
+            WHERE j.is_active = 1 AND p.is_active = 1
+            ORDER BY j.id
+        ''').fetchall()
+
+        journals = {}
+        aliased = []
+        for name, aliases, format_params, publisher, dance_function, format_template in rows:
+            try:
+                params = json.loads(format_params) if format_params else None
+            except (json.JSONDecodeError, TypeError):
+                params = None
+            info = {'name': publisher,
+                    'dance_function': dance_function,
+                    'format_template': format_template,
+                    'format_params': params}
+            journals.setdefault(name.lower(), info)
+            if aliases:
+                aliased.append((aliases, info))
+
+        # Exact journal names take precedence over aliases (as in get_publisher_for_journal).
+        for aliases, info in aliased:
+            try:
+                for alias in json.loads(aliases):
+                    journals.setdefault(alias.lower(), info)
+            except (json.JSONDecodeError, TypeError, AttributeError):
+                continue
+        return journals
+
+    def _journal_key(self, journal):
+        key = self._journal_keys.get(journal)
+        if key is None:
+            key = standardize_journal_name(journal)
+            self._journal_keys[journal] = key
+        return key
+
+    def build(self, record) -> OfflineResult:
+        """Build candidate URLs for a single article record.
+
+        Follows the same order as find_article_from_pma: PubMed Central first,
+        then PMID-based formats, BMC journals, and finally the registry dance
+        for the journal.
+
+        :param record: dict, namedtuple/object or PubMedArticle
+        :return: OfflineResult
+        """
+        article = OfflineArticle.from_record(record)
+        result = OfflineResult(pmid=article.pmid)
+
+        if article.pmc:
+            result.urls.append(EUROPEPMC_PDF_URL.format(a=article))
+            result.dance = 'the_pmc_twist'
+
+        if not article.journal:
+            if not result.urls:
+                result.reason = 'MISSING: journal name required for offline URL construction'
+            return result
+
+        jrnl = self._journal_key(article.journal)
+        try:
+            dance, url = self._publisher_url(article, jrnl)
+        except NoPDFLink as error:
+            if not result.urls:
+                result.reason = str(error)
+                result.network_required = result.reason.startswith('NETWORK')
+            return result
+        except Exception as error:
+            if not result.urls:
+                result.reason = 'TXERROR: %s' % error
+            return result
+
+        result.urls.append(url)
+        if result.dance is None:
+            result.dance = dance
+        return result
+
+    def _publisher_url(self, article, jrnl):
+        """Return (dance name, url) for the publisher of this article's journal."""
+        if jrnl in simple_formats_pmid:
+            return 'the_pmid_pogo', simple_formats_pmid[jrnl].format(pmid=article.pmid)
+
+        if jrnl.find('BMC') == 0:
+            return 'the_bmc_boogie', self._bmc_url(article)
+
+        info = self._journals.get(jrnl.lower())
+        if info is None:
+            raise NoPDFLink("NOFORMAT: No handler found for journal '%s'." % jrnl)
+
+        dance = info['dance_function']
+        if dance == 'paywall_handler':
+            raise NoPDFLink('PAYWALL')
+        if dance == 'the_bmc_boogie':
+            return dance, self._bmc_url(article)
+        builder = OFFLINE_DANCES.get(dance)
+        if builder is None:
+            raise NoPDFLink('NETWORK: %s requires network access for journal %s' % (dance, jrnl))
+        return dance, builder(article, info)
+
+    def _bmc_url(self, article):
+        baseid = article.doi if article.doi else article.pii
+        if not baseid:
+            raise NoPDFLink('MISSING: doi needed for BMC article')
+        return self._bmc_format.format(aid=baseid.split('/')[1])
+
+    def build_many(self, records: Iterable) -> Iterator[OfflineResult]:
+        """Lazily build candidate URLs for many records.
+
+        :param records: iterable of records, or a pandas DataFrame
+        :return: generator of OfflineResult, one per record, in input order
+        """
+        if hasattr(records, 'itertuples'):
+            records = records.itertuples(index=False)
+        for record in records:
+            yield self.build(record)
+
+
+def find_urls_offline(records: Iterable, registry=None) -> Iterator[OfflineResult]:
+    """Convenience wrapper: build candidate URLs for records with zero network access.
+
+    :param records: iterable of dicts / objects, or a pandas DataFrame
+    :param registry: optional JournalRegistry (defaults to the shipped registry)
+    :return: generator of OfflineResult
+    """
+    return OfflineURLBuilder(registry=registry).build_many(records)
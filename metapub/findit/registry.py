@@ -5,12 +5,15 @@ that can efficiently handle thousands of journals with lazy loading and caching.
 """
 
 import sqlite3
+import heapq
 import logging
 import os
 import json
 import re
 import yaml
-from typing import Optional, Dict, Tuple, List
+from functools import lru_cache
+from typing import Optional, Dict, Tuple, List, Pattern
+from urllib.parse import urlparse
 from ..config import DEFAULT_CACHE_DIR
 from ..cache_utils import get_cache_path
 
@@ -18,6 +21,61 @@ log = logging.getLogger('metapub.findit.registry')
 
 REGISTRY_DB_FILENAME = 'journal_registry.db'
 
+# Regex replacements for escaped template placeholders (see _compile_url_template)
+URL_TEMPLATE_PLACEHOLDERS = {
+    r'\{doi\}': r'[^\s]+',              # DOIs can contain slashes
+    r'\{host\}': r'[^/\s]+',            # Host names
+    r'\{volume\}': r'\d+',              # Volume numbers
+    r'\{issue\}': r'\d+',               # Issue numbers  
+    r'\{first_page\}': r'\d+',          # Page numbers
+    r'\{pii\}': r'[A-Za-z0-9\-().]+',  # PIIs can have various formats including dots
+    r'\{aid\}': r'[^/\s]+',             # Article IDs
+    r'\{pmid\}': r'\d+',                # PubMed IDs
+    r'\{ja\}': r'[^/\s]+',              # Journal abbreviations
+    r'\{a\.volume\}': r'\d+',           # Article volume
+    r'\{a\.issue\}': r'\d+',            # Article issue
+    r'\{a\.first_page\}': r'\d+',       # Article first page
+    r'\{a\.pii\}': r'[A-Za-z0-9\-().]+' # Article PII with dots
+}
+
+
+@lru_cache(maxsize=None)
+def _compile_url_template(template: str) -> Optional[Pattern]:
+    """Compile a URL template like 'https://{host}/doi/pdf/{doi}' into a regex.
+
+    Returns None if the template does not produce a valid regex.
+    """
+    # Escape special regex characters except our placeholders
+    pattern = re.escape(template)
+
+    # Replace escaped placeholders with regex patterns
+    for placeholder, regex in URL_TEMPLATE_PLACEHOLDERS.items():
+        pattern = pattern.replace(placeholder, regex)
+
+    # Make pattern case-insensitive and allow http/https
+    pattern = pattern.replace('http://', r'https?://')
+
+    try:
+        return re.compile(pattern + r'/?$', re.IGNORECASE)
+    except re.error:
+        return None
+
+
+def _template_hostname(template: str) -> Optional[str]:
+    """Return the literal lowercase hostname of a URL template.
+
+    Returns None when the hostname is (or contains) a placeholder, or the
+    template has no hostname at all (e.g. '{url}/pdf').
+    """
+    try:
+        netloc = urlparse(template).netloc
+    except ValueError:
+        return None
+    if not netloc or '{' in netloc:
+        return None
+    return netloc.split('@')[-1].split(':')[0].lower()
+
+
 class JournalRegistry:
     """Database-backed journal registry with lazy loading and caching."""
     
@@ -40,6 +98,7 @@ class JournalRegistry:
         
         self.db_path = db_path
         self._conn = None
+        self._url_pattern_index = None
         self._ensure_database()
         
     def _get_connection(self) -> sqlite3.Connection:
@@ -295,6 +354,7 @@ class JournalRegistry:
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (name, dance_function, format_template, base_url, config_data, notes, is_active))
         conn.commit()
+        self._reset_url_pattern_index()
         return cursor.lastrowid
     
     def add_journal(self, name: str, publisher_id: int, 
@@ -368,13 +428,47 @@ class JournalRegistry:
     def get_publisher_by_url_pattern(self, url: str) -> Optional[Dict]:
         """Find publisher by matching URL pattern.
         
+        Publisher templates are compiled once into a hostname-keyed index
+        (see _build_url_pattern_index), so each lookup only tries the
+        templates registered for the URL's hostname plus the few templates
+        whose hostname is itself a placeholder (e.g. http://{host}/content/...).
+        
         Args:
             url: URL to match against publisher templates
             
         Returns:
             Dictionary with publisher info or None if no match found
         """
+        if not url:
+            return None
+
+        if self._url_pattern_index is None:
+            self._url_pattern_index = self._build_url_pattern_index()
+        by_host, wildcard = self._url_pattern_index
+
+        try:
+            hostname = (urlparse(url).hostname or '').lower()
+        except ValueError:
+            # malformed URL (e.g. "http://[bad/x"); only wildcard-host templates can apply
+            hostname = ''
+        # Both lists are in registry order; merging them lazily keeps that order,
+        # so the first match is the same one a linear scan would find.
+        candidates = heapq.merge(by_host.get(hostname, []), wildcard, key=lambda entry: entry[0])
+
+        for _, regex, result in candidates:
+            if regex.match(url):
+                return dict(result)
+
+        return None
+
+    def _build_url_pattern_index(self) -> Tuple[Dict[str, List[Tuple]], List[Tuple]]:
+        """Compile all active publisher URL templates into a hostname-keyed index.
         
+        Returns:
+            Tuple of (dict mapping lowercase hostname to candidate entries,
+            list of entries whose hostname is a placeholder). Each entry is a
+            tuple of (registry order, compiled regex, publisher info dict).
+        """
         conn = self._get_connection()
         
         # Get all publishers with their format templates and config data
@@ -384,37 +478,66 @@ class JournalRegistry:
             WHERE is_active = 1 AND (format_template IS NOT NULL OR config_data IS NOT NULL)
         ''')
         
+        by_host = {}
+        wildcard = []
+        order = 0
+        
+        def add_entry(template, result):
+            nonlocal order
+            regex = _compile_url_template(template)
+            if regex is None:
+                return
+            entry = (order, regex, result)
+            order += 1
+            host = _template_hostname(template)
+            if host is None:
+                wildcard.append(entry)
+            else:
+                by_host.setdefault(host, []).append(entry)
+        
         for row in cursor.fetchall():
             name, dance_function, format_template, config_data = row
             
             # Check format_template
-            if format_template and self._url_matches_template(url, format_template):
-                return {
+            if format_template:
+                add_entry(format_template, {
                     'name': name,
                     'dance_function': dance_function,
                     'format_template': format_template,
                     'match_type': 'format_template'
-                }
+                })
             
             # Check templates in config_data
             if config_data:
                 try:
                     config = json.loads(config_data)
                     url_patterns = config.get('url_patterns', {})
-                    
-                    for pattern_name, template in url_patterns.items():
-                        if template and self._url_matches_template(url, template):
-                            return {
-                                'name': name,
-                                'dance_function': dance_function,
-                                'format_template': template,
-                                'match_type': pattern_name,
-                                'config_data': config
-                            }
-                except (json.JSONDecodeError, TypeError):
+                except (json.JSONDecodeError, TypeError, AttributeError):
                     continue
-        
-        return None
+                
+                for pattern_name, template in url_patterns.items():
+                    if not template:
+                        continue
+                    # Secondary/legacy template lists carry their own metadata and
+                    # aren't matchable; as in the original linear scan, one ends the
+                    # publisher's url_patterns (later templates are never tried).
+                    if not isinstance(template, str):
+                        break
+                    add_entry(template, {
+                        'name': name,
+                        'dance_function': dance_function,
+                        'format_template': template,
+                        'match_type': pattern_name,
+                        'config_data': config
+                    })
+        
+        log.debug('Compiled URL pattern index: %d hostnames, %d wildcard templates',
+                  len(by_host), len(wildcard))
+        return by_host, wildcard
+    
+    def _reset_url_pattern_index(self):
+        """Drop the compiled URL pattern index so it is rebuilt on next lookup."""
+        self._url_pattern_index = None
     
     def _url_matches_template(self, url: str, template: str) -> bool:
         """Check if URL matches a template pattern.
@@ -426,41 +549,8 @@ class JournalRegistry:
         Returns:
             True if URL matches template pattern
         """
-        
-        # Convert template to regex pattern
-        # Replace common placeholders with regex patterns
-        pattern = template
-        
-        # Escape special regex characters except our placeholders
-        pattern = re.escape(pattern)
-        
-        # Replace escaped placeholders with regex patterns
-        replacements = {
-            r'\{doi\}': r'[^\s]+',              # DOIs can contain slashes
-            r'\{host\}': r'[^/\s]+',            # Host names
-            r'\{volume\}': r'\d+',              # Volume numbers
-            r'\{issue\}': r'\d+',               # Issue numbers  
-            r'\{first_page\}': r'\d+',          # Page numbers
-            r'\{pii\}': r'[A-Za-z0-9\-().]+',  # PIIs can have various formats including dots
-            r'\{aid\}': r'[^/\s]+',             # Article IDs
-            r'\{pmid\}': r'\d+',                # PubMed IDs
-            r'\{ja\}': r'[^/\s]+',              # Journal abbreviations
-            r'\{a\.volume\}': r'\d+',           # Article volume
-            r'\{a\.issue\}': r'\d+',            # Article issue
-            r'\{a\.first_page\}': r'\d+',       # Article first page
-            r'\{a\.pii\}': r'[A-Za-z0-9\-().]+' # Article PII with dots
-        }
-        
-        for placeholder, regex in replacements.items():
-            pattern = pattern.replace(placeholder, regex)
-        
-        # Make pattern case-insensitive and allow http/https
-        pattern = pattern.replace('http://', r'https?://')
-        
-        try:
-            return bool(re.match(pattern + r'/?$', url, re.IGNORECASE))
-        except re.error:
-            return False
+        regex = _compile_url_template(template)
+        return bool(regex and regex.match(url))
 
     def get_stats(self) -> Dict[str, int]:
         """Get registry statistics."""
@@ -0,0 +1,188 @@
+"""Per-stage timing instrumentation for FindIt lookups.
+
+Each FindIt lookup records how long it spent in each stage (PubMed efetch,
+CrossRef, DxDOI resolution, registry lookup, dance, PDF verification...) in
+its `timings` dict:
+
+    src = FindIt(pmid=26111251)
+    src.timings    # {'pubmed_fetch': 0.41, 'registry_lookup': 0.002, 'verify_pdf_url': 1.7, ...}
+
+Every span is also added to process-wide histograms, keyed by stage and by the
+dance function (or publisher) that was running:
+
+    from metapub.findit.timing import get_timing_stats
+    get_timing_stats()['verify_pdf_url']['the_doi_slide']['p50']
+
+To export spans to a metrics system, register a hook. It is called with
+(stage, seconds, labels) after every span; labels may include 'publisher' and
+'dance'. Exceptions raised by hooks are logged and ignored.
+
+    from metapub.findit.timing import add_timing_hook
+    add_timing_hook(lambda stage, seconds, labels: statsd.timing(stage, seconds * 1000))
+
+Spans inside worker threads (e.g. race_pdf_urls) are attributed to the lookup
+that started them as long as the work is submitted with contextvars.copy_context().
+"""
+
+import bisect
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger('metapub.findit.timing')
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is unbounded.
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_timings = contextvars.ContextVar('findit_timings', default=None)
+_current_labels = contextvars.ContextVar('findit_timing_labels', default={})
+
+_stats = {}
+_stats_lock = threading.Lock()
+_hooks = []
+
+
+class LookupTimings(dict):
+    """Stage name -> total seconds for one lookup. Safe to update from worker threads."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self[stage] = self.get(stage, 0.0) + seconds
+
+
+class TimingHistogram(object):
+    """Fixed-bucket latency histogram with count, total, min and max."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q):
+        """Approximate quantile: the upper bound of the bucket containing it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else None,
+                'min': self.min,
+                'max': self.max,
+                'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95),
+                'p99': self.quantile(0.99),
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts)),
+                }
+
+
+@contextmanager
+def collect_timings():
+    """Collect the spans recorded in this context into a new LookupTimings dict."""
+    timings = LookupTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timing_labels(**labels):
+    """Attach labels (e.g. publisher, dance) to all spans recorded in this context."""
+    token = _current_labels.set(dict(_current_labels.get(), **labels))
+    try:
+        yield
+    finally:
+        _current_labels.reset(token)
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as a span named `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, time.perf_counter() - start)
+
+
+def timed_span(stage):
+    """Decorator form of timed()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_timing(stage, seconds):
+    """Record a span: add it to the current lookup, the histograms, and the hooks."""
+    labels = _current_labels.get()
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+    key = labels.get('dance') or labels.get('publisher') or ''
+    with _stats_lock:
+        histogram = _stats.setdefault(stage, {}).get(key)
+        if histogram is None:
+            histogram = _stats[stage][key] = TimingHistogram()
+        histogram.add(seconds)
+
+    for hook in list(_hooks):
+        try:
+            hook(stage, seconds, labels)
+        except Exception as error:
+            log.warning('Timing hook %r failed: %s', hook, error)
+
+
+def add_timing_hook(hook):
+    """Register hook(stage, seconds, labels) to be called after every span."""
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def remove_timing_hook(hook):
+    """Unregister a hook added with add_timing_hook."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def get_timing_stats():
+    """Return aggregate histograms as {stage: {dance or publisher: histogram dict}}."""
+    with _stats_lock:
+        return {stage: {key: histogram.to_dict() for key, histogram in by_key.items()}
+                for stage, by_key in _stats.items()}
+
+
+def reset_timing_stats():
+    """Clear all aggregate histograms."""
+    with _stats_lock:
+        _stats.clear()
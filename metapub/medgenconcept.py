@@ -37,6 +37,20 @@ class MedGenConcept(MetaPubObject):
         self.definitions = self._get_definitions()
         self.uid = self._get_medgen_uid()
 
+    @classmethod
+    def from_dict(cls, values):
+        """ Build a MedGenConcept from already-extracted values rather than esummary XML
+        (used by the local MedGen index). Keys are those of to_dict() plus 'definitions';
+        missing keys are left as None. xml, content and meta are None.
+        """
+        concept = cls.__new__(cls)
+        concept.xml = concept.content = concept.meta = None
+        for key in ('CUI', 'title', 'definition', 'semantic_id', 'semantic_type', 'modes_of_inheritance',
+                    'associated_genes', 'names', 'OMIM', 'cytogenic', 'chromosome', 'definitions'):
+            setattr(concept, key, values.get(key))
+        concept.uid = values.get('medgen_uid')
+        return concept
+
     def to_dict(self):
         """ returns a dictionary composed of all extractable properties of this concept. """
         return {'CUI': self.CUI, 'title': self.title, 'definition': self.definition,
@@ -1,22 +1,32 @@
 """metapub.MedGenFetcher -- tools to deal with NCBI's E-utilities interface to the MedGen db"""
 
+import logging
+
 from lxml import etree
 
 from .eutils_common import get_eutils_client
 from .cache_utils import get_cache_path 
 from .exceptions import MetaPubError
 from .medgenconcept import MedGenConcept
+from .medgenindex import MedGenIndex, MEDGEN_INDEX_FILENAME
 from .base import Borg, parse_elink_response
 from .config import DEFAULT_EMAIL
 from .ncbi_errors import diagnose_ncbi_error, NCBIServiceError
 
+log = logging.getLogger('metapub.medgenfetcher')
+
+# UIDs per esummary request / CUIs per esearch request in the batched lookups.
+MEDGEN_BATCH_SIZE = 200
+
+ESUMMARY_RESULT = '<eSummaryResult><DocumentSummarySet status="OK">%s</DocumentSummarySet></eSummaryResult>'
+
 
 class MedGenFetcher(Borg):
     """ MedGenFetcher (a Borg singleton object)
 
     An interaction layer for querying to return MedGenConcept objects.
     
-    Currently available methods: eutils
+    Currently available methods: eutils, local
 
     Basic Usage:
 
@@ -37,18 +47,43 @@ class MedGenFetcher(Borg):
     To get a medgen UID given a known Concept ID (cui):
 
         uid = fetch.uid_for_cui(known_cui)
+
+    To get MedGenConcepts for many UIDs or CUIs at once (dicts keyed by the supplied IDs;
+    invalid IDs map to None):
+
+        concepts = fetch.concepts_by_uids([uid1, uid2, ...])
+        concepts = fetch.concepts_by_cuis([cui1, cui2, ...])
+
+    To get pubmed IDs linked to many medgen UIDs (200 UIDs per request):
+
+        pmids_by_uid = fetch.pubmeds_for_uids([uid1, uid2, ...])
+
+    Local index
+    -----------
+
+    With method='local', uids_by_term, uid_for_cui, concept_by_cui and pubmeds_for_cui are
+    answered from a local SQLite store of the MedGen dump files (see metapub.medgenindex;
+    build it with `metapub-medgen-index download --load`), and fetch.index offers
+    CUI <-> OMIM <-> gene joins. Other lookups still use E-utilities. Local uids_by_term
+    matches exact names and source IDs only.
+
+        fetch = MedGenFetcher(method='local')
+        fetch.index.gene_ids_for_cui('C1845167')
     """
 
     _cache_filename = 'medgenfetcher.db'
 
-    def __init__(self, method='eutils', cachedir='default'):
+    def __init__(self, method='eutils', cachedir='default', index_path=None):
         """Initialize MedGenFetcher for medical genetics concept retrieval.
         
         Args:
-            method (str, optional): Service method to use. Currently only 'eutils'
-                is supported. Defaults to 'eutils'.
+            method (str, optional): Service method to use: 'eutils', or 'local' to answer
+                term, CUI and citation lookups from the local MedGen index.
+                Defaults to 'eutils'.
             cachedir (str, optional): Directory for caching responses. Use 'default'
                 for system cache directory. Defaults to 'default'.
+            index_path (str, optional): MedGen index database for method='local'.
+                Defaults to medgen_index.db in cachedir.
         
         Raises:
             NotImplementedError: If an unsupported method is specified.
@@ -61,17 +96,27 @@ class MedGenFetcher(Borg):
         self.method = method
         self._cache_path = None
 
-        if method == 'eutils':
+        if method in ('eutils', 'local'):
             self._cache_path = get_cache_path(cachedir, self._cache_filename)
             self.qs = get_eutils_client(self._cache_path)
             self.uids_by_term = self._eutils_uids_by_term
             self.concept_by_uid = self._eutils_concept_by_uid
             self.concept_by_cui = self._eutils_concept_by_cui
+            self.concepts_by_uids = self._eutils_concepts_by_uids
+            self.concepts_by_cuis = self._eutils_concepts_by_cuis
             self.uid_for_cui = self._eutils_uid_for_cui
             self.pubmeds_for_uid = self._eutils_pubmeds_for_uid
+            self.pubmeds_for_uids = self._eutils_pubmeds_for_uids
             self.pubmeds_for_cui = self._eutils_pubmeds_for_cui
+
+            if method == 'local':
+                self.index = MedGenIndex(index_path or get_cache_path(cachedir, MEDGEN_INDEX_FILENAME))
+                self.uids_by_term = self.index.uids_by_term
+                self.uid_for_cui = self.index.uid_for_cui
+                self.concept_by_cui = self.index.concept_by_cui
+                self.pubmeds_for_cui = self.index.pubmeds_for_cui
         else:
-            raise NotImplementedError('coming soon: fetch from local medgen via medgen-mysql.')
+            raise NotImplementedError("method must be 'eutils' or 'local'")
 
     def _eutils_uids_by_term(self, term):
         """ Wraps results of an medgen efetch term lookup, returning IDs of related MedGenConcepts.
@@ -174,6 +219,86 @@ class MedGenFetcher(Borg):
         uid = self._eutils_uid_for_cui(cui)
         return self._eutils_concept_by_uid(uid)
 
+    def _eutils_concepts_by_uids(self, uids, batch_size=MEDGEN_BATCH_SIZE):
+        """ Batched concept_by_uid: returns MedGenConcepts for many medgen uids, fetching up to
+        batch_size summaries per esummary request.
+
+        Each DocumentSummary is cached under the same key concept_by_uid uses for its uid, so
+        single and batched lookups share the cache.
+
+        :param uids: list of medgen uids (str or int)
+        :param batch_size: (int) [default: MEDGEN_BATCH_SIZE]
+        :return: dict mapping each uid (str) to a MedGenConcept, or None if invalid
+        :rtype: dict
+        """
+        client = self.qs.client
+        uids = list(dict.fromkeys(str(uid).strip() for uid in uids))
+        concepts = dict.fromkeys(uids)
+
+        todo = []
+        for uid in uids:
+            cached = client.cached_response('esummary', db='medgen', id=uid, retmode='xml')
+            if cached:
+                concepts[uid] = self._concept_or_none(cached)
+            elif uid.isdigit():
+                todo.append(uid)
+
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            content = client.fetch_uncached('esummary', db='medgen', id=','.join(batch), retmode='xml')
+            summaries = {}
+            for docsum in etree.fromstring(content.encode('utf-8')).iterfind('DocumentSummarySet/DocumentSummary'):
+                if docsum.get('uid') in concepts and docsum.find('error') is None:
+                    summaries[docsum.get('uid')] = ESUMMARY_RESULT % etree.tostring(docsum, encoding='unicode')
+            client.cache_responses('esummary', [({'db': 'medgen', 'id': uid, 'retmode': 'xml'}, xmlstr)
+                                                for uid, xmlstr in summaries.items()])
+            for uid, xmlstr in summaries.items():
+                concepts[uid] = self._concept_or_none(xmlstr)
+
+        invalid = [uid for uid, concept in concepts.items() if concept is None]
+        if invalid:
+            log.info('No MedGen concept for uids: %s', ', '.join(invalid))
+        return concepts
+
+    @staticmethod
+    def _concept_or_none(xmlstr):
+        try:
+            return MedGenConcept(xmlstr)
+        except MetaPubError:
+            return None
+
+    def _eutils_concepts_by_cuis(self, cuis, batch_size=MEDGEN_BATCH_SIZE):
+        """ Batched concept_by_cui: returns MedGenConcepts for many CUIs.
+
+        CUIs are looked up batch_size at a time in one esearch (OR-joined), and the resulting
+        uids fetched with concepts_by_uids; each concept is matched back to its CUI by its
+        ConceptId. CUIs the batch search doesn't resolve fall back to uid_for_cui.
+
+        :param cuis: list of Concept ids (CUIs)
+        :param batch_size: (int) [default: MEDGEN_BATCH_SIZE]
+        :return: dict mapping each CUI to a MedGenConcept, or None if invalid
+        :rtype: dict
+        """
+        cuis = list(dict.fromkeys(cui.strip() for cui in cuis))
+        concepts = dict.fromkeys(cuis)
+        valid = [cui for cui in cuis if cui.startswith('C')]
+
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            result = self.qs.esearch({'db': 'medgen', 'term': ' OR '.join(batch), 'retmax': 10000})
+            uids = [item.text.strip() for item in etree.fromstring(result).findall('IdList/Id')]
+            for concept in self._eutils_concepts_by_uids(uids, batch_size).values():
+                if concept is not None and concept.CUI in concepts and concepts[concept.CUI] is None:
+                    concepts[concept.CUI] = concept
+
+        for cui in valid:
+            if concepts[cui] is None:
+                try:
+                    concepts[cui] = self._eutils_concept_by_uid(self._eutils_uid_for_cui(cui))
+                except MetaPubError:
+                    log.info('No MedGen concept for CUI %s', cui)
+        return concepts
+
     def _eutils_pubmeds_for_uid(self, uid):
         """ Returns list of pubmed IDs linked to this Medgen UID.
 
@@ -185,6 +310,19 @@ class MedGenFetcher(Borg):
         ids = parse_elink_response(response)
         return ids
 
+    def _eutils_pubmeds_for_uids(self, uids, batch_size=200):
+        """ Batched pubmeds_for_uid: looks up pubmed IDs for up to batch_size Medgen UIDs per
+        elink request.
+
+        :param uids: list of Medgen UIDs (str or int)
+        :param batch_size: (int) UIDs per elink request [default: 200]
+        :return: dict mapping each UID (str) to a list of pubmed IDs (strings) or empty list
+        :rtype: dict
+        """
+        uids = list(dict.fromkeys(str(uid).strip() for uid in uids))
+        results = self.qs.client.elink_many('medgen', uids, db='pubmed', batch_size=batch_size)
+        return {uid: parse_elink_response(results[uid]) or [] if uid in results else [] for uid in uids}
+
     def _eutils_pubmeds_for_cui(self, cui):
         """ Given a ConceptID (cui), return a list of related pubmed article IDs.
 
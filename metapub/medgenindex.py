@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+"""metapub.medgenindex -- local SQLite store of the MedGen flat files.
+
+NCBI publishes MedGen as pipe-delimited dump files (https://ftp.ncbi.nlm.nih.gov/pub/medgen/):
+concept names (NAMES, MGCONSO), semantic types (MGSTY), definitions (MGDEF), relationships
+(MGREL), cross-references to OMIM/HPO/Orphanet (MedGenIDMappings), HPO phenotypes of OMIM
+diseases (MedGen_HPO_OMIM_Mapping) and PubMed links (medgen_pubmed_lnk), plus NCBI Gene's
+mim2gene_medgen. MedGenIndex loads them into indexed tables so that concept lookups and
+CUI <-> OMIM <-> gene joins are local queries instead of E-utilities requests.
+
+Build it from the command line:
+
+    metapub-medgen-index download --load           # fetch the dump files into the cachedir and load them
+    metapub-medgen-index load /path/to/medgen/     # (re)load files already on disk
+    metapub-medgen-index info
+
+and use it through MedGenFetcher(method='local'), or directly:
+
+    from metapub.medgenindex import MedGenIndex
+
+    index = MedGenIndex()
+    concept = index.concept_by_cui('C1845167')
+    index.gene_ids_for_cui('C1845167')
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+from collections import namedtuple
+from datetime import datetime
+from typing import Optional
+
+import requests
+
+from .cache_utils import get_cache_path
+from .config import DEFAULT_CACHE_DIR
+from .exceptions import MetaPubError
+from .medgenconcept import MedGenConcept
+from .utils import download_file, open_maybe_gzipped
+
+log = logging.getLogger('metapub.medgenindex')
+
+MEDGEN_INDEX_FILENAME = 'medgen_index.db'
+MEDGEN_FTP_URL = 'https://ftp.ncbi.nlm.nih.gov/pub/medgen/'
+MIM2GENE_URL = 'https://ftp.ncbi.nlm.nih.gov/gene/DATA/mim2gene_medgen'
+
+re_cui = re.compile(r'^CN?\d+$')
+
+# How each dump file maps onto a table: which (0-based) fields of each line become its columns.
+MedGenFile = namedtuple('MedGenFile', 'filename url table columns fields delimiter')
+
+MEDGEN_FILES = [
+    MedGenFile('NAMES.RRF.gz', MEDGEN_FTP_URL + 'NAMES.RRF.gz', 'concepts',
+               ('cui', 'name', 'source', 'suppress'), (0, 1, 2, 3), '|'),
+    MedGenFile('MGCONSO.RRF.gz', MEDGEN_FTP_URL + 'MGCONSO.RRF.gz', 'names',
+               ('cui', 'ts', 'ispref', 'scui', 'sdui', 'sab', 'tty', 'code', 'name', 'suppress'),
+               (0, 1, 3, 6, 7, 8, 9, 10, 11, 12), '|'),
+    MedGenFile('MGSTY.RRF.gz', MEDGEN_FTP_URL + 'MGSTY.RRF.gz', 'semantic_types',
+               ('cui', 'tui', 'sty'), (0, 1, 3), '|'),
+    MedGenFile('MGDEF.RRF.gz', MEDGEN_FTP_URL + 'MGDEF.RRF.gz', 'definitions',
+               ('cui', 'definition', 'source', 'suppress'), (0, 1, 2, 3), '|'),
+    MedGenFile('MGREL.RRF.gz', MEDGEN_FTP_URL + 'MGREL.RRF.gz', 'relations',
+               ('cui1', 'rel', 'cui2', 'rela', 'sab'), (0, 3, 4, 6, 8), '|'),
+    MedGenFile('MedGenIDMappings.txt.gz', MEDGEN_FTP_URL + 'MedGenIDMappings.txt.gz', 'xrefs',
+               ('cui', 'pref_name', 'source_id', 'source'), (0, 1, 2, 3), '|'),
+    MedGenFile('MedGen_HPO_OMIM_Mapping.txt.gz', MEDGEN_FTP_URL + 'MedGen_HPO_OMIM_Mapping.txt.gz', 'hpo_omim',
+               ('omim_cui', 'mim', 'relationship', 'hpo_cui', 'hpo_id'), (0, 1, 3, 4, 5), '|'),
+    MedGenFile('medgen_pubmed_lnk.txt.gz', MEDGEN_FTP_URL + 'medgen_pubmed_lnk.txt.gz', 'pubmed',
+               ('uid', 'cui', 'pmid'), (0, 1, 3), '|'),
+    MedGenFile('mim2gene_medgen', MIM2GENE_URL, 'mim2gene',
+               ('mim', 'gene_id', 'type', 'source', 'cui'), (0, 1, 2, 3, 4), '\t'),
+]
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS concepts (cui TEXT PRIMARY KEY, name TEXT, source TEXT, suppress TEXT)',
+    '''CREATE TABLE IF NOT EXISTS names (cui TEXT NOT NULL, ts TEXT, ispref TEXT, scui TEXT, sdui TEXT,
+                                         sab TEXT, tty TEXT, code TEXT, name TEXT COLLATE NOCASE, suppress TEXT)''',
+    'CREATE TABLE IF NOT EXISTS semantic_types (cui TEXT NOT NULL, tui TEXT, sty TEXT)',
+    'CREATE TABLE IF NOT EXISTS definitions (cui TEXT NOT NULL, definition TEXT, source TEXT, suppress TEXT)',
+    'CREATE TABLE IF NOT EXISTS relations (cui1 TEXT NOT NULL, rel TEXT, cui2 TEXT NOT NULL, rela TEXT, sab TEXT)',
+    'CREATE TABLE IF NOT EXISTS xrefs (cui TEXT NOT NULL, pref_name TEXT, source_id TEXT, source TEXT)',
+    'CREATE TABLE IF NOT EXISTS hpo_omim (omim_cui TEXT, mim TEXT, relationship TEXT, hpo_cui TEXT, hpo_id TEXT)',
+    'CREATE TABLE IF NOT EXISTS pubmed (uid INTEGER, cui TEXT NOT NULL, pmid INTEGER)',
+    'CREATE TABLE IF NOT EXISTS mim2gene (mim TEXT, gene_id TEXT, type TEXT, source TEXT, cui TEXT)',
+    # MedGen UIDs are only published alongside the PubMed links; collected here after loading them.
+    'CREATE TABLE IF NOT EXISTS uids (cui TEXT PRIMARY KEY, uid INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE INDEX IF NOT EXISTS idx_names_cui ON names (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_names_name ON names (name)',
+    'CREATE INDEX IF NOT EXISTS idx_semantic_types_cui ON semantic_types (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_definitions_cui ON definitions (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_relations_cui1 ON relations (cui1, rela)',
+    'CREATE INDEX IF NOT EXISTS idx_relations_cui2 ON relations (cui2, rela)',
+    'CREATE INDEX IF NOT EXISTS idx_xrefs_cui ON xrefs (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_xrefs_source_id ON xrefs (source_id, source)',
+    'CREATE INDEX IF NOT EXISTS idx_hpo_omim_omim_cui ON hpo_omim (omim_cui)',
+    'CREATE INDEX IF NOT EXISTS idx_pubmed_cui ON pubmed (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_mim2gene_cui ON mim2gene (cui)',
+    'CREATE INDEX IF NOT EXISTS idx_mim2gene_gene_id ON mim2gene (gene_id)',
+    'CREATE INDEX IF NOT EXISTS idx_uids_uid ON uids (uid)',
+]
+
+
+def _read_rows(path, fields, delimiter):
+    """ Yield the selected fields of each data line of a MedGen dump file (header lines start with #). """
+    width = max(fields) + 1
+    with open_maybe_gzipped(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            if line.startswith('#'):
+                continue
+            values = line.rstrip('\r\n').split(delimiter)
+            if len(values) < width:
+                continue
+            yield tuple(values[i] or None for i in fields)
+
+
+class MedGenIndex:
+    """SQLite store of the MedGen dump files.
+
+    Args:
+        db_path: Path to the index database. If None, medgen_index.db in DEFAULT_CACHE_DIR.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_cache_path(DEFAULT_CACHE_DIR, MEDGEN_INDEX_FILENAME)
+        self._conn = None
+        self._ensure_database()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get database connection, creating if needed."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+        return self._conn
+
+    def _ensure_database(self):
+        """Create database tables if they don't exist."""
+        conn = self._get_connection()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        log.debug('MedGen index initialized at %s', self.db_path)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # -- loading ---------------------------------------------------------------------------
+
+    def load(self, directory):
+        """Load every MedGen dump file found in directory (gzipped or not), replacing the
+        contents of its table. Files that aren't there are skipped, so a single table can be
+        refreshed by loading a directory holding just that file.
+
+        :param: directory (str)
+        :return: dict of filename -> rows loaded
+        """
+        conn = self._get_connection()
+        loaded = {}
+        for spec in MEDGEN_FILES:
+            names = [spec.filename, spec.filename[:-3]] if spec.filename.endswith('.gz') else [spec.filename]
+            path = next((os.path.join(directory, name) for name in names
+                         if os.path.exists(os.path.join(directory, name))), None)
+            if path is None:
+                log.info('%s not found in %s; skipping', spec.filename, directory)
+                continue
+
+            insert = 'INSERT %s INTO %s (%s) VALUES (%s)' % (
+                'OR REPLACE' if spec.table == 'concepts' else '',
+                spec.table, ', '.join(spec.columns), ', '.join('?' * len(spec.columns)))
+            with conn:
+                conn.execute('DELETE FROM %s' % spec.table)
+                cursor = conn.executemany(insert, _read_rows(path, spec.fields, spec.delimiter))
+                if spec.table == 'pubmed':
+                    conn.execute('DELETE FROM uids')
+                    conn.execute('INSERT OR IGNORE INTO uids SELECT cui, uid FROM pubmed WHERE uid IS NOT NULL')
+                conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             ('loaded:' + spec.filename, datetime.now().isoformat(timespec='seconds')))
+            loaded[spec.filename] = cursor.rowcount
+            log.info('Loaded %i rows from %s', cursor.rowcount, path)
+        return loaded
+
+    # -- MedGenFetcher lookups (same signatures and return types as the eutils methods) ------
+
+    def uids_by_term(self, term):
+        """ Returns medgen uids of concepts with a name (case-insensitive), CUI or source ID
+        (e.g. 'HP:0001263' or an OMIM number) equal to term. No full-text search.
+
+        :param term: (str)
+        :return uids: list of medgen uids (strings)
+        """
+        term = term.strip()
+        rows = self._get_connection().execute('''
+            SELECT DISTINCT uid FROM uids WHERE cui IN (
+                SELECT cui FROM names WHERE name = ?1
+                UNION SELECT cui FROM xrefs WHERE source_id = ?1
+                UNION SELECT ?1)
+            ORDER BY uid''', (term,))
+        return [str(row[0]) for row in rows]
+
+    def uid_for_cui(self, cui):
+        """ Given a ConceptID (cui), return a medgen ID.
+
+        :param cui: (str)
+        :return uid: (str)
+        :raises: MetaPubError if the CUI is invalid or has no known uid
+        """
+        self._check_cui(cui)
+        row = self._get_connection().execute('SELECT uid FROM uids WHERE cui = ?', (cui,)).fetchone()
+        if row is None:
+            raise MetaPubError('Invalid CUID: did not return MedGen id.')
+        return str(row[0])
+
+    def concept_by_cui(self, cui):
+        """ Returns MedGenConcept for CUI, built from the local tables.
+
+        Fields the dump files don't carry (cytogenic, chromosome, gene symbols) are None.
+
+        :param cui: (string) Concept id (CUI)
+        :return: MedGenConcept
+        :raises: MetaPubError if the CUI is invalid or unknown
+        """
+        self._check_cui(cui)
+        conn = self._get_connection()
+        names = [{'name': name, 'SDUI': sdui, 'SCUI': scui, 'CODE': code, 'SAB': sab, 'TTY': tty,
+                  'type': 'preferred' if ispref == 'Y' and ts == 'P' else 'syn'}
+                 for name, sdui, scui, code, sab, tty, ispref, ts in conn.execute(
+                     'SELECT name, sdui, scui, code, sab, tty, ispref, ts FROM names WHERE cui = ?', (cui,))]
+        title = conn.execute('SELECT name FROM concepts WHERE cui = ?', (cui,)).fetchone()
+        if title is None and not names:
+            raise MetaPubError('Invalid CUID: did not return MedGen id.')
+
+        definitions = [row[0] for row in conn.execute(
+            "SELECT definition FROM definitions WHERE cui = ? AND IFNULL(suppress, 'N') != 'Y'", (cui,))]
+        semantic = conn.execute('SELECT tui, sty FROM semantic_types WHERE cui = ?', (cui,)).fetchone() or (None, None)
+        uid = conn.execute('SELECT uid FROM uids WHERE cui = ?', (cui,)).fetchone()
+        genes = [{'gene_id': gene_id, 'hgnc': None, 'chromosome': None, 'cytogen_loc': None}
+                 for gene_id in self.gene_ids_for_cui(cui)]
+
+        return MedGenConcept.from_dict({
+            'CUI': cui,
+            'title': title[0] if title else next((n['name'] for n in names if n['type'] == 'preferred'), None),
+            'definition': definitions[0] if definitions else None,
+            'definitions': definitions,
+            'semantic_id': semantic[0],
+            'semantic_type': semantic[1],
+            'names': names,
+            'OMIM': self.omims_for_cui(cui),
+            'associated_genes': genes or None,
+            'modes_of_inheritance': self.modes_of_inheritance(cui),
+            'medgen_uid': str(uid[0]) if uid else None,
+        })
+
+    def pubmeds_for_cui(self, cui):
+        """ Given a ConceptID (cui), return a list of related pubmed article IDs.
+
+        :param cui: (str) Medgen Concept ID (CUI)
+        :return: list of pubmed IDs (strings) or empty list
+        """
+        rows = self._get_connection().execute('SELECT DISTINCT pmid FROM pubmed WHERE cui = ? ORDER BY pmid',
+                                              (cui.strip(),))
+        return [str(row[0]) for row in rows]
+
+    # -- joins -----------------------------------------------------------------------------
+
+    def omims_for_cui(self, cui):
+        """ Returns OMIM numbers (strings) for a CUI, from MedGenIDMappings and MGCONSO. """
+        rows = self._get_connection().execute('''
+            SELECT source_id FROM xrefs WHERE cui = ?1 AND source = 'OMIM'
+            UNION SELECT code FROM names WHERE cui = ?1 AND sab = 'OMIM' AND code IS NOT NULL''', (cui,))
+        return sorted(row[0] for row in rows)
+
+    def cuis_for_omim(self, mim):
+        """ Returns CUIs (strings) cross-referenced to an OMIM number. """
+        rows = self._get_connection().execute('''
+            SELECT cui FROM xrefs WHERE source_id = ?1 AND source = 'OMIM'
+            UNION SELECT cui FROM mim2gene WHERE mim = ?1 AND cui IS NOT NULL''', (str(mim),))
+        return sorted(row[0] for row in rows)
+
+    def gene_ids_for_cui(self, cui):
+        """ Returns NCBI Gene IDs (strings) associated with a CUI, via mim2gene_medgen. """
+        rows = self._get_connection().execute(
+            "SELECT DISTINCT gene_id FROM mim2gene WHERE cui = ? AND gene_id IS NOT NULL AND gene_id != '-'", (cui,))
+        return sorted((row[0] for row in rows), key=int)
+
+    def cuis_for_gene_id(self, gene_id):
+        """ Returns CUIs (strings) associated with an NCBI Gene ID, via mim2gene_medgen. """
+        rows = self._get_connection().execute(
+            "SELECT DISTINCT cui FROM mim2gene WHERE gene_id = ? AND cui IS NOT NULL AND cui != '-'", (str(gene_id),))
+        return sorted(row[0] for row in rows)
+
+    def clinical_features(self, cui):
+        """ Returns HPO phenotypes of an OMIM disease concept as a list of (hpo_cui, hpo_id). """
+        rows = self._get_connection().execute(
+            'SELECT DISTINCT hpo_cui, hpo_id FROM hpo_omim WHERE omim_cui = ? ORDER BY hpo_id', (cui,))
+        return rows.fetchall()
+
+    def modes_of_inheritance(self, cui):
+        """ Returns modes of inheritance for a CUI from MGREL, as dicts shaped like
+        MedGenConcept.modes_of_inheritance.
+        """
+        # MGREL rows read "CUI2 <RELA> CUI1", as in the UMLS MRREL file.
+        rows = self._get_connection().execute('''
+            SELECT mode.cui, mode.name, sty.tui, sty.sty FROM (
+                SELECT cui1 AS cui FROM relations WHERE cui2 = ?1 AND rela = 'has_inheritance_type'
+                UNION SELECT cui2 FROM relations WHERE cui1 = ?1 AND rela = 'inheritance_type_of') modes
+            JOIN concepts mode USING (cui)
+            LEFT JOIN semantic_types sty USING (cui)''', (cui,))
+        return [{'CUI': mode_cui, 'TUI': tui, 'medgen_uid': None, 'name': name, 'semantic_type': sty}
+                for mode_cui, name, tui, sty in rows]
+
+    def info(self):
+        """ returns dict of row counts per table plus the meta entries. """
+        conn = self._get_connection()
+        info = dict(conn.execute('SELECT key, value FROM meta'))
+        for spec in MEDGEN_FILES:
+            info[spec.table] = conn.execute('SELECT COUNT(*) FROM %s' % spec.table).fetchone()[0]
+        info['uids'] = conn.execute('SELECT COUNT(*) FROM uids').fetchone()[0]
+        return info
+
+    @staticmethod
+    def _check_cui(cui):
+        if not cui.startswith('C'):
+            raise MetaPubError('Invalid CUID: must start with C (e.g. C0000039)')
+
+
+def download_medgen_files(cachedir=DEFAULT_CACHE_DIR):
+    """ Download the MedGen dump files into <cachedir>/medgen; returns that directory. """
+    directory = os.path.dirname(get_cache_path(cachedir, os.path.join('medgen', MEDGEN_FILES[0].filename)))
+    for spec in MEDGEN_FILES:
+        log.info('Downloading %s', spec.url)
+        download_file(spec.url, os.path.join(directory, spec.filename))
+    return directory
+
+
+def cmd_download(args):
+    """Download the MedGen dump files."""
+    directory = download_medgen_files(args.cachedir)
+    print(f"Saved MedGen files to {directory}")
+    if args.load:
+        args.directory = directory
+        cmd_load(args)
+
+
+def cmd_load(args):
+    """Load MedGen dump files into the index."""
+    index = MedGenIndex(args.db)
+    print(f"Loading {args.directory} into {index.db_path} ...")
+    for filename, count in index.load(args.directory).items():
+        print(f"  {filename}: {count} rows")
+
+
+def cmd_info(args):
+    """Show what the index contains."""
+    index = MedGenIndex(args.db)
+    print(index.db_path)
+    for key, value in index.info().items():
+        print(f"  {key}: {value}")
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Build the local MedGen index used by MedGenFetcher(method='local')",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  metapub-medgen-index download --load         # Fetch the MedGen dump files and load them
+  metapub-medgen-index load ~/medgen/          # Load (or refresh) files already on disk
+  metapub-medgen-index info
+        """
+    )
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Enable verbose logging')
+    parser.add_argument('--db', type=str, default=None,
+                        help='Index database (default: %s in the cache directory)' % MEDGEN_INDEX_FILENAME)
+
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    download_parser = subparsers.add_parser('download', help='Download the MedGen dump files')
+    download_parser.add_argument('--cachedir', type=str, default=DEFAULT_CACHE_DIR,
+                                 help='Files are saved to <cachedir>/medgen (default: %(default)s)')
+    download_parser.add_argument('--load', action='store_true',
+                                 help='Load the downloaded files into the index')
+    download_parser.set_defaults(func=cmd_download)
+
+    load_parser = subparsers.add_parser('load', help='Load MedGen dump files from a directory')
+    load_parser.add_argument('directory', help='Directory holding the dump files (.gz or not)')
+    load_parser.set_defaults(func=cmd_load)
+
+    info_parser = subparsers.add_parser('info', help='Show index statistics')
+    info_parser.set_defaults(func=cmd_info)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s')
+    try:
+        args.func(args)
+    except (MetaPubError, OSError, requests.exceptions.RequestException) as error:
+        print(f"❌ {error}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,12 +8,12 @@ import sqlite3
 import hashlib
 import logging
 import requests
-from threading import Lock
+from threading import Lock, local
 from urllib.parse import urlencode
 from typing import Dict, List, Optional, Union
 
 from .exceptions import MetaPubError
-from .ncbi_errors import diagnose_ncbi_error, NCBIServiceError
+from .ncbi_errors import diagnose_ncbi_error, get_circuit_breaker, NCBIServiceError
 
 try:
     from lxml import etree
@@ -49,6 +49,7 @@ class RateLimiter:
         self.min_interval = 1.0 / requests_per_second
         self.last_request_time = 0
         self.lock = Lock()
+        self._local = local()
     
     def wait_if_needed(self):
         """Block execution if minimum interval hasn't elapsed since last request.
@@ -66,6 +67,20 @@ class RateLimiter:
                 sleep_time = self.min_interval - time_since_last
                 time.sleep(sleep_time)
             self.last_request_time = time.time()
+            self._local.granted_at = self.last_request_time
+
+    def granted_at(self) -> Optional[float]:
+        """When the calling thread's last wait_if_needed() let it go (None if it never called).
+
+        Lets callers time a request without the time spent queueing for its slot.
+        """
+        return getattr(self._local, 'granted_at', None)
+
+    def back_off(self, seconds: float):
+        """Hold back the next request until `seconds` from now (e.g. after an HTTP 429)."""
+        with self.lock:
+            self.last_request_time = max(self.last_request_time,
+                                         time.time() + seconds - self.min_interval)
 
 
 class SimpleCache:
@@ -85,7 +100,7 @@ class SimpleCache:
     - Compatible with existing cache schema
     - Supports both binary and text data
     - JSON serialization for complex objects
-    - Dictionary-style access (__getitem__, __setitem__, __contains__)
+    - Dictionary-style access (__getitem__, __setitem__, __contains__, update)
     
     Args:
         cache_path (str): Path to SQLite database file for cache storage
@@ -248,6 +263,35 @@ class SimpleCache:
                     (key, stored_value, now, 0)
                 )
     
+    def update(self, items):
+        """Dictionary-style bulk setting, written in a single transaction.
+
+        Args:
+            items: mapping or iterable of (key, value) pairs; values are
+                stored as by __setitem__
+        """
+        if hasattr(items, 'items'):
+            items = items.items()
+        now = int(time.time())
+        rows = []
+        for key, value in items:
+            if isinstance(key, str):
+                key = key.encode('utf-8')
+            if isinstance(value, str):
+                stored_value = value.encode('utf-8')
+            else:
+                import json
+                stored_value = json.dumps(value).encode('utf-8')
+            rows.append((key, stored_value, now, 0))
+        if not rows:
+            return
+        with self.lock:
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, created, value_compressed) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+
     def __contains__(self, key):
         """Dictionary-style 'in' operator for compatibility."""
         try:
@@ -276,6 +320,11 @@ class NCBIClient:
         requests_per_second (int): Maximum requests per second (capped by NCBI limits)
         tool (str): Tool identifier for NCBI logging
         email (str): Email address for NCBI contact (recommended)
+        circuit_breaker (Optional[CircuitBreaker]): Consulted before every request;
+            defaults to the breaker shared by all clients (ncbi_errors.get_circuit_breaker).
+            False sends every request regardless (e.g. for health probes).
+        rate_limiter (Optional[RateLimiter]): Paces requests; defaults to a new one at
+            the NCBI rate for this api_key
     
     Attributes:
         BASE_URL (str): Base URL for NCBI E-utilities
@@ -285,22 +334,33 @@ class NCBIClient:
         rate_limiter (RateLimiter): Rate limiting handler
         cache (Optional[SimpleCache]): Response cache if enabled
         session (requests.Session): HTTP session for requests
+        circuit_breaker (Optional[CircuitBreaker]): Stops requests while NCBI is failing
     """
     
     BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+    # Endpoints that return plain text rather than XML.
+    TEXT_ENDPOINTS = ('ecitmatch.cgi',)
     
     def __init__(self, api_key: Optional[str] = None, cache_path: Optional[str] = None, 
-                 requests_per_second: int = 10, tool: str = "metapub", email: str = ""):
+                 requests_per_second: int = 10, tool: str = "metapub", email: str = "",
+                 circuit_breaker=None, rate_limiter: Optional[RateLimiter] = None):
         self.api_key = api_key
         self.tool = tool
         self.email = email
         
         # Setup rate limiting
         rps = 10 if api_key else 3  # NCBI limits: 10/sec with key, 3/sec without
-        self.rate_limiter = RateLimiter(min(requests_per_second, rps))
+        self.rate_limiter = rate_limiter or RateLimiter(min(requests_per_second, rps))
         
         # Setup caching
         self.cache = SimpleCache(cache_path) if cache_path else None
+
+        # Refuse requests while NCBI is known to be down
+        if circuit_breaker is False:
+            self.circuit_breaker = None
+        else:
+            self.circuit_breaker = circuit_breaker or get_circuit_breaker()
         
         # Setup HTTP session
         self.session = requests.Session()
@@ -353,9 +413,31 @@ class NCBIClient:
         except (etree.XMLSyntaxError, Exception):
             return False
     
+    def _is_valid_text_response(self, content: str, response: requests.Response) -> bool:
+        """Validate a plain-text response (e.g. ecitmatch), rejecting empty bodies and HTML error pages."""
+        content_type = response.headers.get('content-type', '').lower()
+        content_lower = content.lower().strip()
+        if not content_lower or 'html' in content_type:
+            return False
+        return not (content_lower.startswith('<!doctype html') or
+                    content_lower.startswith('<html') or
+                    'down_bethesda' in content_lower)
+
+    def _endpoint_url(self, endpoint: str) -> str:
+        # Most E-utilities are "<name>.fcgi"; others (ecitmatch.cgi) are passed with their extension.
+        return f"{self.BASE_URL}/{endpoint}" if '.' in endpoint else f"{self.BASE_URL}/{endpoint}.fcgi"
+
+    def _is_cacheable(self, endpoint: str, content: str, response: requests.Response) -> bool:
+        """Only cache successful responses that are valid XML (or text, for text endpoints)."""
+        if response.status_code != 200:
+            return False
+        if endpoint in self.TEXT_ENDPOINTS:
+            return self._is_valid_text_response(content, response)
+        return self._is_valid_xml_response(content, response)
+
     def _make_request(self, endpoint: str, **params) -> str:
         """Make HTTP request to NCBI with caching and rate limiting."""
-        url = f"{self.BASE_URL}/{endpoint}.fcgi"
+        url = self._endpoint_url(endpoint)
         request_params = self._build_params(**params)
         
         # Check cache first
@@ -364,6 +446,60 @@ class NCBIClient:
             if cached_response:
                 return cached_response
         
+        content, response = self._send(endpoint, url, request_params)
+
+        if self.cache:
+            if self._is_cacheable(endpoint, content, response):
+                self.cache.set(url, request_params, content)
+            else:
+                log.warning(f"Skipping cache for non-XML response from {endpoint}")
+
+        return content
+
+    def fetch_uncached(self, endpoint: str, **params) -> str:
+        """Rate-limited request that neither reads nor writes the cache.
+        
+        For batched requests whose records are cached individually (see
+        cache_responses), so the combined response isn't stored as well.
+        
+        Raises:
+            MetaPubError: if NCBI returns an error page instead of content
+        """
+        url = self._endpoint_url(endpoint)
+        content, response = self._send(endpoint, url, self._build_params(**params))
+        if not self._is_valid_text_response(content, response):
+            raise MetaPubError(f"Unexpected response from {endpoint} (status {response.status_code})")
+        return content
+
+    def cached_response(self, endpoint: str, **params) -> Optional[str]:
+        """Return the cached response for a request, or None. Never makes a request."""
+        if not self.cache:
+            return None
+        return self.cache.get(self._endpoint_url(endpoint), self._build_params(**params))
+
+    def cache_responses(self, endpoint: str, responses) -> None:
+        """Cache several responses in one write, each under the key of its own request.
+        
+        Args:
+            responses: iterable of (params dict, content) pairs, where params are
+                the keyword arguments of the equivalent single request
+        """
+        if not self.cache:
+            return
+        url = self._endpoint_url(endpoint)
+        self.cache.update((self.cache._make_key(url, self._build_params(**params)), content)
+                          for params, content in responses)
+
+    def _send(self, endpoint: str, url: str, request_params: Dict[str, str]):
+        """Rate-limited GET without caching. Returns (content, response).
+        
+        Raises:
+            NCBIServiceError: without sending anything if the circuit breaker is open
+        """
+        breaker = self.circuit_breaker
+        if breaker:
+            breaker.before_request(url)
+
         # Rate limit
         self.rate_limiter.wait_if_needed()
         
@@ -380,27 +516,56 @@ class NCBIClient:
                 # Find the end of the XML declaration and remove it
                 declaration_end = content.find('?>') + 2
                 content = content[declaration_end:].lstrip()
+
+            if breaker and self._is_valid_text_response(content, response):
+                breaker.record_success(url)
             
-            # Cache successful responses - but only if they contain valid XML
-            if self.cache and response.status_code == 200:
-                # Validate that response is actually XML before caching
-                if self._is_valid_xml_response(content, response):
-                    self.cache.set(url, request_params, content)
-                else:
-                    log.warning(f"Skipping cache for non-XML response from {endpoint}")
-            
-            return content
+            return content, response
             
-        except requests.exceptions.RequestException as e:
-            diagnosis = diagnose_ncbi_error(e, url)
-            if diagnosis['is_service_issue']:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # NCBI couldn't be reached at all
+            if breaker:
+                breaker.record_failure(f"{type(e).__name__} from {endpoint}")
+            raise self._service_error(e, url) from e
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code is not None and status_code >= 500:
+                if breaker:
+                    breaker.record_failure(f"HTTP {status_code} from {endpoint}")
+                raise self._service_error(e, url) from e
+            # NCBI answered; the request itself was at fault, or came too fast
+            if breaker:
+                breaker.record_success(url)
+            if status_code == 429:
+                self.rate_limiter.back_off(self._retry_after(e.response))
                 raise NCBIServiceError(
-                    diagnosis['user_message'],
-                    diagnosis['error_type'],
-                    diagnosis['suggested_actions']
+                    'NCBI rate limit exceeded.',
+                    'rate_limit',
+                    ['You are making requests too quickly',
+                     'Consider using an NCBI API key for higher limits']
                 ) from e
-            else:
-                raise MetaPubError(f"Request failed: {str(e)}") from e
+            raise MetaPubError(f"Request failed: {str(e)}") from e
+        except requests.exceptions.RequestException as e:
+            raise MetaPubError(f"Request failed: {str(e)}") from e
+
+    @staticmethod
+    def _service_error(error: Exception, url: str) -> NCBIServiceError:
+        """NCBIServiceError for a failure that lies with NCBI, worded by diagnose_ncbi_error."""
+        diagnosis = diagnose_ncbi_error(error, url)
+        if not diagnosis['is_service_issue']:
+            return NCBIServiceError('NCBI services could not be reached.', 'network',
+                                    ['Try again in a few minutes',
+                                     'Use ncbi_health_check --quick to diagnose service issues'])
+        return NCBIServiceError(diagnosis['user_message'], diagnosis['error_type'],
+                                diagnosis['suggested_actions'])
+
+    @staticmethod
+    def _retry_after(response, default: float = 1.0) -> float:
+        """Seconds to wait according to a 429 response's Retry-After header."""
+        try:
+            return float(response.headers.get('Retry-After', default))
+        except (TypeError, ValueError):
+            return default
     
     def efetch(self, db: str, id: Union[str, List[str]], rettype: str = 'xml', 
                retmode: str = 'text', **kwargs) -> str:
@@ -456,4 +621,120 @@ class NCBIClient:
             'einfo',
             db=db,
             **kwargs
-        )
\ No newline at end of file
+        )
+    
+    def ecitmatch(self, bdata: Union[str, List[str]], db: str = 'pubmed',
+                  retmode: str = 'xml', **kwargs) -> str:
+        """Match citation strings to PMIDs.
+        
+        Each citation is a "journal|year|volume|first_page|author|key|" line;
+        a list of citations is submitted as one request (lines separated by CR).
+        """
+        if isinstance(bdata, (list, tuple)):
+            bdata = '\r'.join(bdata)
+        return self._make_request(
+            'ecitmatch.cgi',
+            db=db,
+            retmode=retmode,
+            bdata=bdata,
+            **kwargs
+        )
+    
+    def elink_many(self, dbfrom: str, ids: List[str], db: str = None, cmd: str = 'neighbor',
+                   batch_size: int = 200, **kwargs) -> Dict[str, str]:
+        """Find related records for many IDs, packing up to batch_size per request.
+        
+        IDs are sent as separate id= parameters ("by-id" mode), so NCBI returns one
+        LinkSet per ID instead of merging their links. Each LinkSet is cached as an
+        eLinkResult document under the same key a single elink() call for that ID
+        uses, so single and batched lookups share the cache.
+        
+        Returns:
+            Dict mapping each ID to an eLinkResult XML string holding its LinkSet
+            (IDs NCBI returned no LinkSet for are left out)
+        """
+        url = self._endpoint_url('elink')
+        
+        def single_params(uid):
+            return self._build_params(dbfrom=dbfrom, id=uid, db=db, cmd=cmd, **kwargs)
+        
+        results = {}
+        todo = []
+        for uid in dict.fromkeys(str(uid).strip() for uid in ids):
+            cached = self.cache.get(url, single_params(uid)) if self.cache else None
+            if cached:
+                results[uid] = cached
+            else:
+                todo.append(uid)
+        
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            request_params = self._build_params(dbfrom=dbfrom, db=db, cmd=cmd, **kwargs)
+            request_params['id'] = batch    # requests repeats the parameter for each ID
+            content, response = self._send('elink', url, request_params)
+            if not self._is_valid_xml_response(content, response):
+                raise MetaPubError('Unexpected response from elink for %d IDs' % len(batch))
+            
+            linksets = etree.fromstring(content.encode('utf-8')).findall('LinkSet')
+            by_id = {linkset.findtext('IdList/Id'): linkset for linkset in linksets}
+            fresh = []
+            for position, uid in enumerate(batch):
+                linkset = by_id.get(uid)
+                if linkset is None and len(linksets) == len(batch):
+                    linkset = linksets[position]
+                if linkset is None:
+                    continue
+                linkset_xml = etree.tostring(linkset, encoding='unicode', with_tail=False)
+                results[uid] = '<eLinkResult>%s</eLinkResult>' % linkset_xml
+                if linkset.find('ERROR') is None:
+                    fresh.append((single_params(uid), results[uid]))
+            if self.cache and fresh:
+                self.cache.update((self.cache._make_key(url, params), xmlstr) for params, xmlstr in fresh)
+        
+        return results
+    
+    def ecitmatch_many(self, citations: List[str], batch_size: int = 100,
+                       db: str = 'pubmed', retmode: str = 'xml') -> Dict[str, str]:
+        """Match many citations, packing up to batch_size per request.
+        
+        Each citation is a "journal|year|volume|first_page|author" string. Results
+        are cached per citation, under the same key a single ecitmatch() call for
+        "<citation>||" uses, so single and batched lookups share the cache.
+        
+        Returns:
+            Dict mapping each citation to its result field: a PMID,
+            'NOT_FOUND', or 'AMBIGUOUS (n citations)'.
+        """
+        url = self._endpoint_url('ecitmatch.cgi')
+        
+        def single_params(citation):
+            return self._build_params(db=db, retmode=retmode, bdata=citation + '||')
+        
+        results = {}
+        todo = []
+        for citation in dict.fromkeys(citations):
+            cached = self.cache.get(url, single_params(citation)) if self.cache else None
+            if cached:
+                results[citation] = cached.strip().split('|')[-1].strip()
+            else:
+                todo.append(citation)
+        
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            # Tag each line with its position in the batch as the "user key".
+            bdata = '\r'.join(f'{citation}|{key}|' for key, citation in enumerate(batch))
+            request_params = self._build_params(db=db, retmode=retmode, bdata=bdata)
+            content, response = self._send('ecitmatch.cgi', url, request_params)
+            if not self._is_valid_text_response(content, response):
+                raise MetaPubError('Unexpected response from ecitmatch.cgi for %d citations' % len(batch))
+            
+            for line in content.splitlines():
+                fields = line.strip().split('|')
+                if len(fields) < 7 or not fields[5].isdigit() or int(fields[5]) >= len(batch):
+                    continue
+                citation = batch[int(fields[5])]
+                results[citation] = fields[-1].strip()
+                if self.cache:
+                    self.cache.set(url, single_params(citation), f'{citation}||{results[citation]}\n')
+        
+        return results
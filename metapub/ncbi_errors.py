@@ -5,14 +5,27 @@ This module provides intelligent error detection for NCBI service outages
 and converts cryptic network/XML errors into clear, actionable user messages.
 """
 
+import logging
 import re
+import threading
 import time
 from typing import Optional, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import requests
 from lxml import etree
 
+log = logging.getLogger('metapub.ncbi_errors')
+
+EUTILS_BASE_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils'
+
+# Endpoints probed by the background health monitor.
+DEFAULT_PROBE_URLS = (f'{EUTILS_BASE_URL}/efetch.fcgi', f'{EUTILS_BASE_URL}/esearch.fcgi')
+
+# Probe results that mean the service itself is down (as opposed to e.g. our own rate limit).
+OUTAGE_ERROR_TYPES = ('server_error', 'maintenance', 'timeout', 'connection_error',
+                      'empty_response', 'xml_error')
+
 
 @dataclass
 class ServiceStatus:
@@ -22,26 +35,81 @@ class ServiceStatus:
     error_message: Optional[str] = None
     response_time: Optional[float] = None
     status_code: Optional[int] = None
+    checked_at: float = field(default_factory=time.time)
+
+    @property
+    def is_outage(self) -> bool:
+        """True if this status says the service is down or in maintenance."""
+        return not self.is_available and self.error_type in OUTAGE_ERROR_TYPES
 
 
 class NCBIErrorDetector:
-    """Detects and categorizes NCBI service errors."""
+    """Detects and categorizes NCBI service errors.
+
+    Holds a snapshot of the latest probe result per URL. Entries expire
+    cache_duration seconds after the probe that produced them. Error
+    diagnosis only reads the snapshot; it never makes a request itself
+    (see NCBIHealthMonitor for keeping the snapshot current).
+    """
 
-    def __init__(self):
+    def __init__(self, cache_duration: float = 300):
         self._status_cache = {}
-        self._last_check = 0
-        self._cache_duration = 300  # 5 minutes
+        self._cache_duration = cache_duration  # 5 minutes
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def cached_status(self, url: str) -> Optional[ServiceStatus]:
+        """Return the unexpired status for url, or None. Never makes a request."""
+        with self._lock:
+            status = self._status_cache.get(url)
+        if status is not None and time.time() - status.checked_at < self._cache_duration:
+            return status
+        return None
+
+    def record_status(self, url: str, status: ServiceStatus) -> None:
+        """Store the status of url in the shared snapshot."""
+        with self._lock:
+            self._status_cache[url] = status
+
+    def clear_status(self) -> None:
+        """Forget all recorded statuses."""
+        with self._lock:
+            self._status_cache.clear()
 
     def check_service_status(self, url: str, timeout: int = 10) -> ServiceStatus:
-        """Check if NCBI service is available and responding properly."""
-        # Use cached result if recent
-        cache_key = url
-        now = time.time()
+        """Check if NCBI service is available and responding properly.
+
+        Returns the snapshot entry if it hasn't expired, otherwise probes url
+        (a blocking request) and records the result.
+        """
+        status = self.cached_status(url)
+        if status is None:
+            status = self.probe_service(url, timeout)
+            self.record_status(url, status)
+        return status
+
+    def refresh_in_background(self, url: str, timeout: int = 10) -> bool:
+        """Probe url on a daemon thread unless a probe of it is already running.
 
-        if (cache_key in self._status_cache and
-            now - self._last_check < self._cache_duration):
-            return self._status_cache[cache_key]
+        Returns True if a probe was started.
+        """
+        with self._lock:
+            if url in self._pending:
+                return False
+            self._pending.add(url)
 
+        def probe():
+            try:
+                self.record_status(url, self.probe_service(url, timeout))
+            finally:
+                with self._lock:
+                    self._pending.discard(url)
+
+        threading.Thread(target=probe, name='ncbi-status-probe', daemon=True).start()
+        return True
+
+    def probe_service(self, url: str, timeout: int = 10) -> ServiceStatus:
+        """Send one test query to url and report what came back. Always makes a request."""
         start_time = time.time()
 
         try:
@@ -150,10 +218,6 @@ class NCBIErrorDetector:
                 response_time=time.time() - start_time
             )
 
-        # Cache the result
-        self._status_cache[cache_key] = status
-        self._last_check = now
-
         return status
 
     def diagnose_error(self, exception: Exception, url: str = None) -> Dict[str, Any]:
@@ -188,10 +252,13 @@ class NCBIErrorDetector:
         elif any(keyword in exception_str for keyword in [
             'xml', 'syntax', 'parse', 'opening and ending tag mismatch'
         ]):
-            # Check if NCBI is actually down
+            # Check if NCBI is actually down, going by the last known status. No request is
+            # made here; if nothing recent is known, a probe is started for later diagnoses.
             if url:
-                status = self.check_service_status(url)
-                if not status.is_available:
+                status = self.cached_status(url)
+                if status is None:
+                    self.refresh_in_background(url)
+                if status is not None and not status.is_available:
                     error_info.update({
                         'is_service_issue': True,
                         'error_type': 'service_outage',
@@ -269,6 +336,66 @@ class NCBIErrorDetector:
 _detector = NCBIErrorDetector()
 
 
+class NCBIHealthMonitor:
+    """Keeps an NCBIErrorDetector's status snapshot current from a background thread.
+
+    Every `interval` seconds each URL is probed once and the result recorded,
+    so error paths and circuit breakers can read the service status without
+    making requests of their own. Keep interval below the detector's
+    cache_duration, or the snapshot will expire between probes.
+
+    Args:
+        detector: NCBIErrorDetector whose snapshot to update (default: the shared one)
+        urls: endpoints to probe (default: efetch and esearch)
+        interval: seconds between rounds of probes
+        timeout: per-probe request timeout in seconds
+    """
+
+    def __init__(self, detector: Optional[NCBIErrorDetector] = None, urls=DEFAULT_PROBE_URLS,
+                 interval: float = 60, timeout: int = 10):
+        self.detector = detector or _detector
+        self.urls = tuple(urls)
+        self.interval = interval
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start probing in a daemon thread. Does nothing if already running."""
+        if not self.is_running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ncbi-health-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop probing and wait (up to timeout seconds) for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def check_now(self) -> Dict[str, ServiceStatus]:
+        """Probe every URL once, record and return the results."""
+        results = {}
+        for url in self.urls:
+            status = self.detector.probe_service(url, self.timeout)
+            self.detector.record_status(url, status)
+            if not status.is_available:
+                log.warning('NCBI health probe of %s failed: %s', url, status.error_message)
+            results[url] = status
+        return results
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_now()
+            self._stop.wait(self.interval)
+
+
 def check_ncbi_status(url: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi") -> ServiceStatus:
     """Quick function to check NCBI service status."""
     return _detector.check_service_status(url)
@@ -370,3 +497,135 @@ def handle_ncbi_request_error(func):
                 raise
 
     return wrapper
+
+
+class CircuitBreaker:
+    """Stops sending requests to NCBI while it is failing.
+
+    Closed (normal): requests go through. After failure_threshold consecutive
+    service failures, or when the detector's snapshot reports an outage, the
+    breaker opens and before_request raises NCBIServiceError without touching
+    the network. After reset_timeout seconds one trial request is let through
+    (half-open): success closes the breaker, failure keeps it open for another
+    reset_timeout.
+
+    Thread-safe; a single breaker is shared by all NCBIClient instances
+    unless one is passed in (see get_circuit_breaker).
+
+    Args:
+        failure_threshold: consecutive failures that open the breaker
+        reset_timeout: seconds to stay open before allowing a trial request
+        detector: NCBIErrorDetector whose snapshot is consulted (default: the shared one)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30,
+                 detector: Optional[NCBIErrorDetector] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.detector = detector or _detector
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._reason = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _open(self, reason: str, opened_at: Optional[float] = None):
+        if self._state == self.CLOSED:
+            log.warning('NCBI circuit breaker opened: %s', reason)
+        self._state = self.OPEN
+        self._opened_at = opened_at or time.time()
+        self._reason = reason
+
+    def allow_request(self, url: Optional[str] = None) -> bool:
+        """Return True if a request (to url) may be sent now. Never makes a request."""
+        status = self.detector.cached_status(url) if url else None
+        with self._lock:
+            if self._current_state() == self.CLOSED:
+                if status is None or not status.is_outage:
+                    return True
+                self._open(status.error_message, status.checked_at)
+            if self._current_state() == self.HALF_OPEN:
+                # Let this one request through as the trial; everyone else waits out
+                # another reset_timeout unless its outcome is recorded first.
+                self._open(self._reason)
+                return True
+            return False
+
+    def before_request(self, url: Optional[str] = None):
+        """Raise NCBIServiceError if the breaker won't let a request to url through."""
+        if not self.allow_request(url):
+            with self._lock:
+                retry_in = max(0, self.reset_timeout - (time.time() - self._opened_at))
+                reason = self._reason
+            raise NCBIServiceError(
+                f'NCBI requests suspended ({reason}); retrying in {retry_in:.0f}s.',
+                'circuit_open',
+                ['NCBI services appear to be down or in maintenance',
+                 'Check service status: https://www.ncbi.nlm.nih.gov/',
+                 'Use ncbi_health_check --quick for detailed status'])
+
+    def record_success(self, url: Optional[str] = None):
+        """Note a request that NCBI answered; closes the breaker."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                log.info('NCBI circuit breaker closed')
+            self._state = self.CLOSED
+            self._failures = 0
+        if url:
+            # a real response is fresher news than the last probe
+            status = self.detector.cached_status(url)
+            if status is not None and not status.is_available:
+                self.detector.record_status(url, ServiceStatus(is_available=True))
+
+    def reset(self):
+        """Close the breaker and forget past failures."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._reason = None
+
+    def record_failure(self, reason: str = 'repeated request failures'):
+        """Note a request that failed because of NCBI (not because of the request itself)."""
+        with self._lock:
+            self._failures += 1
+            if self._state != self.CLOSED or self._failures >= self.failure_threshold:
+                self._open(reason)
+
+
+_circuit_breaker = CircuitBreaker()
+_monitor = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the circuit breaker shared by NCBIClient instances."""
+    return _circuit_breaker
+
+
+def start_health_monitor(interval: float = 60, urls=DEFAULT_PROBE_URLS) -> NCBIHealthMonitor:
+    """Start (or return the already running) background monitor of the shared status snapshot."""
+    global _monitor
+    if _monitor is None or not _monitor.is_running:
+        _monitor = NCBIHealthMonitor(_detector, urls=urls, interval=interval).start()
+    return _monitor
+
+
+def stop_health_monitor():
+    """Stop the background monitor started by start_health_monitor, if any."""
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
@@ -9,20 +9,25 @@ Usage:
     python ncbi_health_check.py          # Check all services
     python ncbi_health_check.py --quick  # Check only essential services
     python ncbi_health_check.py --json   # Output results as JSON
+    python ncbi_health_check.py --repeat 10         # Latency percentiles and throughput
+    python ncbi_health_check.py --watch --json      # Continuous, one JSON line per round
 """
 
 import argparse
 import json
 import sys
 import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 import requests
 from lxml import etree
 
-from .eutils_common import get_eutils_client
 from .config import API_KEY
+from .eutils_compat import QueryService
+from .ncbi_client import RateLimiter
 
 
 @dataclass
@@ -35,6 +40,106 @@ class ServiceResult:
     status_code: Optional[int] = None
     error_message: Optional[str] = None
     details: Optional[str] = None
+    started_at: Optional[float] = None
+
+
+# Probes slower than this (seconds) mark a service as slow.
+SLOW_THRESHOLD = 5.0
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentile of values (0-100), interpolating linearly between closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _service_sort_key(item):
+    """Sort results with NCBI Main Website first, then alphabetically."""
+    if item.name == 'NCBI Main Website':
+        return '0'  # Force to top
+    return item.name
+
+
+def _span(results: List[ServiceResult]) -> float:
+    """Wall-clock seconds from the first probe's start to the last probe's end."""
+    timed = [r for r in results if r.started_at is not None]
+    if not timed:
+        return 0.0
+    return max(r.started_at + r.response_time for r in timed) - min(r.started_at for r in timed)
+
+
+def _busy_time(results: List[ServiceResult]) -> float:
+    """Seconds during which at least one of the probes was in flight (idle gaps excluded)."""
+    intervals = sorted((r.started_at, r.started_at + r.response_time) for r in results if r.started_at is not None)
+    busy = 0.0
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                busy += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        busy += current_end - current_start
+    return busy
+
+
+@dataclass
+class LatencyStats:
+    """Latency percentiles and throughput of repeated probes of one NCBI service.
+
+    Percentiles cover successful probes only; throughput is successful probes per
+    second of time with at least one probe of the service in flight (so the pauses
+    between --watch rounds don't count).
+    """
+    name: str
+    url: str
+    status: str  # 'up', 'slow', 'error' (some probes failed), 'down' (all failed)
+    samples: int
+    successes: int
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    throughput: float = 0.0
+    error_message: Optional[str] = None
+
+    @classmethod
+    def from_results(cls, results: List[ServiceResult]) -> 'LatencyStats':
+        ok = [r.response_time for r in results if r.status in ('up', 'slow')]
+        failures = [r for r in results if r.status not in ('up', 'slow')]
+        p95 = percentile(ok, 95)
+        if not ok:
+            status = 'down' if any(r.status == 'down' for r in failures) else 'error'
+        elif failures:
+            status = 'error'
+        else:
+            status = 'slow' if p95 > SLOW_THRESHOLD else 'up'
+        busy = _busy_time(results)
+        return cls(name=results[0].name, url=results[0].url, status=status,
+                   samples=len(results), successes=len(ok),
+                   p50=percentile(ok, 50), p95=p95, p99=percentile(ok, 99),
+                   min=min(ok) if ok else None, max=max(ok) if ok else None,
+                   throughput=len(ok) / busy if busy > 0 else 0.0,
+                   error_message=failures[-1].error_message if failures else None)
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__dataclass_fields__}
+
+
+def summarize(results: List[ServiceResult]) -> List[LatencyStats]:
+    """Group probe results by service into LatencyStats, in report order."""
+    by_service = defaultdict(list)
+    for result in results:
+        by_service[result.name].append(result)
+    return sorted((LatencyStats.from_results(group) for group in by_service.values()), key=_service_sort_key)
 
 
 class NCBIHealthChecker:
@@ -42,9 +147,12 @@ class NCBIHealthChecker:
     
     def __init__(self, timeout: int = 10):
         self.timeout = timeout
-        # Use existing eutils client with proper rate limiting and API key support
-        # No cache for health checks - we want live requests to check actual service status
-        self.eutils_client = get_eutils_client(None, cache=False)
+        # A client of its own, with API key support: no cache, since we want live requests,
+        # and no circuit breaker, which would stop probes of the very outage they look for.
+        # Its rate limiter tells us when each probe got its slot (see check_service).
+        self.rate_limiter = RateLimiter(self.default_concurrency())
+        self.eutils_client = QueryService(api_key=API_KEY, circuit_breaker=False,
+                                          rate_limiter=self.rate_limiter)
         self.services = {
             'ncbi_main': {
                 'name': 'NCBI Main Website',
@@ -106,6 +214,11 @@ class NCBIHealthChecker:
                 eutils_method = getattr(self.eutils_client, config['eutils_method'])
                 result = eutils_method(config['params'])
                 
+                # Time the request from when the rate limiter let it go; the wait for a
+                # slot behind concurrent probes is queueing, not NCBI latency.
+                granted_at = self.rate_limiter.granted_at()
+                if granted_at is not None and granted_at > start_time:
+                    start_time = granted_at
                 response_time = time.time() - start_time
                 
                 # Check if we got valid XML response
@@ -247,13 +360,64 @@ class NCBIHealthChecker:
                     error_message=f"Check failed: {str(e)}"
                 ))
         
-        # Sort results with NCBI Main Website first, then alphabetically
-        def sort_key(result):
-            if result.name == 'NCBI Main Website':
-                return '0'  # Force to top
-            return result.name
-        
-        return sorted(results, key=sort_key)
+        return sorted(results, key=_service_sort_key)
+
+    def _select_services(self, quick: bool) -> Dict[str, dict]:
+        return {k: v for k, v in self.services.items() if not quick or v.get('essential', False)}
+
+    def _timed_check(self, service_id: str, config: dict) -> ServiceResult:
+        """check_service, never raising, with the probe's start time recorded.
+
+        The start excludes any wait for a rate-limit slot, as response_time does.
+        """
+        started_at = time.time()
+        try:
+            result = self.check_service(service_id, config)
+        except Exception as e:
+            result = ServiceResult(
+                name=config['name'],
+                url=config.get('url', f"eutils:{config.get('eutils_method', 'unknown')}"),
+                status='error',
+                response_time=time.time() - started_at,
+                error_message=f"Check failed: {str(e)}"
+            )
+        result.started_at = max(started_at, time.time() - result.response_time)
+        return result
+
+    def default_concurrency(self) -> int:
+        """Concurrent probes that fit NCBI's rate budget (3 requests/s, 10 with an API key)."""
+        return 10 if API_KEY else 3
+
+    def run_probes(self, quick: bool = False, repeat: int = 1,
+                   concurrency: Optional[int] = None) -> List[ServiceResult]:
+        """Probe each service `repeat` times, running up to `concurrency` probes at once.
+
+        E-utilities probes share the eutils client's rate limiter, so extra
+        concurrency queues rather than exceeding NCBI's request rate.
+        """
+        jobs = [(service_id, config) for _ in range(repeat)
+                for service_id, config in self._select_services(quick).items()]
+        with ThreadPoolExecutor(max_workers=concurrency or self.default_concurrency()) as pool:
+            return list(pool.map(lambda job: self._timed_check(*job), jobs))
+
+    def benchmark(self, quick: bool = False, repeat: int = 5,
+                  concurrency: Optional[int] = None) -> List[LatencyStats]:
+        """Probe each service `repeat` times concurrently; return per-service latency statistics."""
+        return summarize(self.run_probes(quick, repeat, concurrency))
+
+    def watch(self, interval: float = 30, window: int = 20, quick: bool = False, repeat: int = 1,
+              concurrency: Optional[int] = None):
+        """Probe every `interval` seconds, indefinitely.
+
+        Yields (results of this round, LatencyStats over the last `window` probes of each service).
+        """
+        windows = defaultdict(lambda: deque(maxlen=window))
+        while True:
+            results = self.run_probes(quick, repeat, concurrency)
+            for result in results:
+                windows[result.name].append(result)
+            yield results, summarize([r for samples in windows.values() for r in samples])
+            time.sleep(interval)
 
 
 def print_status_icon(status: str) -> str:
@@ -324,6 +488,128 @@ def print_results(results: List[ServiceResult], show_details: bool = True):
     print("\n" + "="*80)
 
 
+def _format_seconds(value: Optional[float]) -> str:
+    return f"{value:.2f}s" if value is not None else '-'
+
+
+def stats_report(stats: List[LatencyStats], results: List[ServiceResult], **extra) -> dict:
+    """JSON-ready report of a benchmark run (or a watch window), with overall throughput."""
+    elapsed = _span(results)
+    successes = sum(1 for r in results if r.status in ('up', 'slow'))
+    report = {'timestamp': time.time()}
+    report.update(extra)
+    report.update({
+        'elapsed': elapsed,
+        'throughput': successes / elapsed if elapsed > 0 else 0.0,
+        'summary': {
+            'total': len(stats),
+            'up': sum(1 for s in stats if s.status == 'up'),
+            'slow': sum(1 for s in stats if s.status == 'slow'),
+            'down': sum(1 for s in stats if s.status == 'down'),
+            'error': sum(1 for s in stats if s.status == 'error')
+        },
+        'services': [s.to_dict() for s in stats]
+    })
+    return report
+
+
+def print_stats(stats: List[LatencyStats], report: dict):
+    """Print latency percentiles and throughput in human-readable format."""
+    print("\n" + "="*80)
+    print("📈 NCBI SERVICE LATENCY REPORT")
+    print("="*80)
+    print(f"{'Service':<34}{'Status':<8}{'OK/N':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'req/s':>8}")
+    print("-" * 80)
+    for s in stats:
+        print(f"{print_status_icon(s.status)} {s.name:<31}{s.status.upper():<8}{f'{s.successes}/{s.samples}':>7}"
+              f"{_format_seconds(s.p50):>8}{_format_seconds(s.p95):>8}{_format_seconds(s.p99):>8}"
+              f"{s.throughput:>8.1f}")
+        if s.error_message:
+            print(f"   Error: {s.error_message}")
+    print("-" * 80)
+    print(f"Throughput: {report['throughput']:.1f} successful requests/s over {report['elapsed']:.1f}s")
+
+
+def _exit_code(statuses) -> int:
+    statuses = list(statuses)
+    if any(status in ['down', 'error'] for status in statuses):
+        return 1  # Some services are down
+    if any(status == 'slow' for status in statuses):
+        return 2  # Some services are slow
+    return 0  # All good
+
+
+def _run_watch(checker: NCBIHealthChecker, args, concurrency: int) -> int:
+    """--watch: report each round until interrupted (or --rounds); returns the exit code."""
+    statuses = []
+    rounds = checker.watch(args.interval, args.window, args.quick, args.repeat, concurrency)
+    try:
+        for number, (results, stats) in enumerate(rounds, 1):
+            # percentiles cover the window; elapsed and throughput cover this round
+            report = stats_report(stats, results, round=number, window=args.window,
+                                  repeat=args.repeat, concurrency=concurrency)
+            statuses = [s.status for s in stats]
+            if args.json:
+                print(json.dumps(report), flush=True)
+            else:
+                print(f"\n🕒 Round {number} ({time.strftime('%H:%M:%S')}), last {args.window} probes per service")
+                print_stats(stats, report)
+            if args.rounds and number >= args.rounds:
+                break
+    except KeyboardInterrupt:
+        pass
+    return _exit_code(statuses)
+
+
+def _run_repeated(checker: NCBIHealthChecker, args, concurrency: int) -> int:
+    """--repeat/--concurrency: report latency statistics; returns the exit code."""
+    results = checker.run_probes(args.quick, args.repeat, concurrency)
+    stats = summarize(results)
+    report = stats_report(stats, results, repeat=args.repeat, concurrency=concurrency)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_stats(stats, report)
+    return _exit_code(s.status for s in stats)
+
+
+def _run_once(checker: NCBIHealthChecker, args) -> int:
+    """Default mode: check each service once; returns the exit code."""
+    results = checker.check_all_services(quick=args.quick)
+    
+    if args.json:
+        # JSON output for programmatic use
+        json_results = []
+        for result in results:
+            json_results.append({
+                'name': result.name,
+                'url': result.url,
+                'status': result.status,
+                'response_time': result.response_time,
+                'status_code': result.status_code,
+                'error_message': result.error_message,
+                'details': result.details
+            })
+        
+        output = {
+            'timestamp': time.time(),
+            'summary': {
+                'total': len(results),
+                'up': sum(1 for r in results if r.status == 'up'),
+                'slow': sum(1 for r in results if r.status == 'slow'),
+                'down': sum(1 for r in results if r.status == 'down'),
+                'error': sum(1 for r in results if r.status == 'error')
+            },
+            'services': json_results
+        }
+        
+        print(json.dumps(output, indent=2))
+    else:
+        print_results(results, show_details=not args.no_details)
+    
+    return _exit_code(r.status for r in results)
+
+
 def main():
     """Main CLI function."""
     parser = argparse.ArgumentParser(
@@ -335,6 +621,8 @@ Examples:
   python ncbi_health_check.py --quick      # Check only essential services  
   python ncbi_health_check.py --json       # JSON output for scripts
   python ncbi_health_check.py --timeout 30 # Longer timeout for slow networks
+  python ncbi_health_check.py --quick --repeat 20 --json    # p50/p95/p99 and throughput
+  python ncbi_health_check.py --watch --interval 60 --json  # One JSON line per round
         """
     )
     
@@ -359,6 +647,42 @@ Examples:
         action='store_true', 
         help='Hide detailed information'
     )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=1,
+        help='Probe each service N times and report p50/p95/p99 latency and throughput'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=None,
+        help='Probes to run at once (default: 3, or 10 with an API key); '
+             'E-utilities probes stay within the NCBI rate limit regardless'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep probing; report statistics over a rolling window after each round'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=30,
+        help='Seconds between rounds in --watch mode (default: 30)'
+    )
+    parser.add_argument(
+        '--window',
+        type=int,
+        default=20,
+        help='Probes per service in the --watch rolling window (default: 20)'
+    )
+    parser.add_argument(
+        '--rounds',
+        type=int,
+        default=0,
+        help='Stop --watch after N rounds (default: run until interrupted)'
+    )
     
     args = parser.parse_args()
     
@@ -368,45 +692,14 @@ Examples:
             print("   (Quick mode: essential services only)")
     
     checker = NCBIHealthChecker(timeout=args.timeout)
-    results = checker.check_all_services(quick=args.quick)
-    
-    if args.json:
-        # JSON output for programmatic use
-        json_results = []
-        for result in results:
-            json_results.append({
-                'name': result.name,
-                'url': result.url,
-                'status': result.status,
-                'response_time': result.response_time,
-                'status_code': result.status_code,
-                'error_message': result.error_message,
-                'details': result.details
-            })
-        
-        output = {
-            'timestamp': time.time(),
-            'summary': {
-                'total': len(results),
-                'up': sum(1 for r in results if r.status == 'up'),
-                'slow': sum(1 for r in results if r.status == 'slow'),
-                'down': sum(1 for r in results if r.status == 'down'),
-                'error': sum(1 for r in results if r.status == 'error')
-            },
-            'services': json_results
-        }
-        
-        print(json.dumps(output, indent=2))
-    else:
-        print_results(results, show_details=not args.no_details)
-    
-    # Exit with appropriate code
-    if any(r.status in ['down', 'error'] for r in results):
-        sys.exit(1)  # Some services are down
-    elif any(r.status == 'slow' for r in results):
-        sys.exit(2)  # Some services are slow
+    concurrency = args.concurrency or checker.default_concurrency()
+
+    if args.watch:
+        sys.exit(_run_watch(checker, args, concurrency))
+    elif args.repeat > 1 or args.concurrency:
+        sys.exit(_run_repeated(checker, args, concurrency))
     else:
-        sys.exit(0)  # All good
+        sys.exit(_run_once(checker, args))
 
 
 if __name__ == '__main__':
@@ -1,11 +1,30 @@
+import logging
+
 from lxml import etree
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from .config import PKGNAME, DEFAULT_EMAIL
+from .cache_utils import SQLiteCache, get_cache_path
+from .ncbi_client import RateLimiter
+from .config import PKGNAME, DEFAULT_EMAIL, DEFAULT_CACHE_DIR
 from .ncbi_errors import diagnose_ncbi_error, NCBIServiceError
 
-PMC_ID_CONVERSION_URI = 'https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/?tool='+PKGNAME+'&email='+DEFAULT_EMAIL+'&ids=%s'
+PMC_ID_CONVERSION_URL = 'https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/'
+PMC_ID_CONVERSION_URI = PMC_ID_CONVERSION_URL + '?tool='+PKGNAME+'&email='+DEFAULT_EMAIL+'&ids=%s'
+
+# The ID conversion service accepts at most 200 IDs (all of one type) per request.
+PMC_ID_CONVERSION_MAX_IDS = 200
+
+# Shared by all idconv requests in this process (NCBI asks for at most 3 requests/second).
+PMC_IDCONV_RATE_LIMITER = RateLimiter(3)
+
+CACHE_FILENAME = 'pmc-idconv-cache.db'
+
+PMC_IDCONV_CACHE = None
+PMC_IDCONV_SESSION = None
+
+log = logging.getLogger('metapub.pubmedcentral')
 
 __doc__="""An assortment of functions providing access to various web APIs.
 
@@ -24,49 +43,187 @@ __doc__="""An assortment of functions providing access to various web APIs.
         get_doi_for_otherid(string)
 
         get_pmcid_for_otherid(string)
+
+    Batched versions take a list of IDs, send up to 200 IDs per request, and
+    cache every conversion in an SQLite cache. They return a dict mapping each
+    input ID to its result (None if the service has no mapping):
+
+        get_pmids_for_otherids(list)
+
+        get_dois_for_otherids(list)
+
+        get_pmcids_for_otherids(list)
 """
 
-def _pmc_id_conversion_api(input_id):
+
+def _get_idconv_cache(cachedir=DEFAULT_CACHE_DIR):
+    global PMC_IDCONV_CACHE
+    if not PMC_IDCONV_CACHE:
+        _cache_path = get_cache_path(cachedir, CACHE_FILENAME)
+        PMC_IDCONV_CACHE = SQLiteCache(_cache_path)
+    return PMC_IDCONV_CACHE
+
+
+def _get_idconv_session():
+    global PMC_IDCONV_SESSION
+    if PMC_IDCONV_SESSION is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+        session.mount('https://', adapter)
+        PMC_IDCONV_SESSION = session
+    return PMC_IDCONV_SESSION
+
+
+def _normalize_otherid(otherid):
+    """ Canonical form of an ID for cache keys and matching service responses:
+    DOIs are lowercased, PMC / NIHMS IDs uppercased. """
+    otherid = str(otherid).strip()
+    if otherid.startswith('10.'):
+        return otherid.lower()
+    return otherid.upper()
+
+
+def _idtype(otherid):
+    if otherid.isdigit():
+        return 'pmid'
+    if otherid.startswith('10.'):
+        return 'doi'
+    if otherid.startswith('PMC'):
+        return 'pmcid'
+    if otherid.startswith('NIHMS'):
+        return 'mid'
+    return None
+
+
+def _pmc_id_conversion_batch(idtype, otherids):
+    """ Submit up to PMC_ID_CONVERSION_MAX_IDS normalized IDs of one type in a single request.
+
+    :return: dict of normalized requested ID -> dict with pmid, pmcid, doi keys
+    """
+    params = {'tool': PKGNAME, 'email': DEFAULT_EMAIL, 'ids': ','.join(otherids)}
+    if idtype:
+        params['idtype'] = idtype
+    PMC_IDCONV_RATE_LIMITER.wait_if_needed()
     try:
-        xml = requests.get(PMC_ID_CONVERSION_URI % input_id, timeout=30).content
-        root = etree.fromstring(xml)
+        response = _get_idconv_session().get(PMC_ID_CONVERSION_URL, params=params, timeout=30)
+        response.raise_for_status()
+        root = etree.fromstring(response.content)
     except Exception as e:
-        # Handle PMC ID conversion API errors
-        diagnosis = diagnose_ncbi_error(e, PMC_ID_CONVERSION_URI % input_id)
+        diagnosis = diagnose_ncbi_error(e, PMC_ID_CONVERSION_URL)
         if diagnosis['is_service_issue']:
             raise NCBIServiceError(
-                f"Unable to convert ID '{input_id}' via PMC API: {diagnosis['user_message']}", 
-                diagnosis['error_type'], 
+                f"Unable to convert {len(otherids)} IDs via PMC API: {diagnosis['user_message']}",
+                diagnosis['error_type'],
                 diagnosis['suggested_actions']
             ) from e
         else:
             raise
-    record = root.find('record')
-    return record
 
-def get_pmid_for_otherid(otherid):
+    results = {}
+    for record in root.iterfind('record'):
+        requested = record.get('requested-id')
+        if requested is None:
+            continue
+        results[_normalize_otherid(requested)] = {key: record.get(key) for key in ('pmid', 'pmcid', 'doi')}
+    return results
+
+
+def _convert_otherids(otherids, cachedir=DEFAULT_CACHE_DIR):
+    """ Look up many IDs, serving what we can from cache and batching the rest.
+
+    :return: dict of input ID -> dict with pmid, pmcid, doi keys (values may be None)
+    """
+    cache = _get_idconv_cache(cachedir) if cachedir else None
+    records = {}
+    todo = {}
+    pending = set()
+    for otherid in otherids:
+        key = _normalize_otherid(otherid)
+        if key in records or key in pending:
+            continue
+        if cache is not None:
+            try:
+                records[key] = cache[key]
+                continue
+            except KeyError:
+                pass
+        pending.add(key)
+        todo.setdefault(_idtype(key), []).append(key)
+
+    for idtype, keys in todo.items():
+        for start in range(0, len(keys), PMC_ID_CONVERSION_MAX_IDS):
+            chunk = keys[start:start + PMC_ID_CONVERSION_MAX_IDS]
+            log.debug('Converting %d IDs of type %s via PMC API', len(chunk), idtype)
+            found = _pmc_id_conversion_batch(idtype, chunk)
+            for key in chunk:
+                record = found.get(key) or {'pmid': None, 'pmcid': None, 'doi': None}
+                records[key] = record
+                if cache is not None:
+                    cache[key] = record
+
+    return {otherid: records[_normalize_otherid(otherid)] for otherid in otherids}
+
+
+def get_pmids_for_otherids(otherids, cachedir=DEFAULT_CACHE_DIR):
+    """ Batched get_pmid_for_otherid: convert many PMCIDs and/or DOIs to PMIDs.
+
+    IDs are grouped by type and sent PMC_ID_CONVERSION_MAX_IDS at a time; results
+    are cached in cachedir (set cachedir=None to disable caching).
+
+    :param otherids: (list of str)
+    :param cachedir: (str) cache directory
+    :return: dict of input ID -> PMID (str) or None
+    """
+    return {otherid: record['pmid'] for otherid, record in _convert_otherids(otherids, cachedir).items()}
+
+
+def get_pmcids_for_otherids(otherids, cachedir=DEFAULT_CACHE_DIR):
+    """ Batched get_pmcid_for_otherid: convert many PMIDs and/or DOIs to PMCIDs.
+
+    :param otherids: (list of str)
+    :param cachedir: (str) cache directory
+    :return: dict of input ID -> PMCID (str) or None
+    """
+    return {otherid: record['pmcid'] for otherid, record in _convert_otherids(otherids, cachedir).items()}
+
+
+def get_dois_for_otherids(otherids, cachedir=DEFAULT_CACHE_DIR):
+    """ Batched get_doi_for_otherid: convert many PMIDs and/or PMCIDs to DOIs.
+
+    :param otherids: (list of str)
+    :param cachedir: (str) cache directory
+    :return: dict of input ID -> DOI (str) or None
+    """
+    return {otherid: record['doi'] for otherid, record in _convert_otherids(otherids, cachedir).items()}
+
+
+def get_pmid_for_otherid(otherid, cachedir=DEFAULT_CACHE_DIR):
     """ Use the PMC ID conversion API to attempt to convert either PMCID or DOI to a PMID.
     Returns PMID if successful, or None if there is no 'pmid' item in the response.
 
+    Conversions are cached (see get_pmids_for_otherids); pass cachedir=None to bypass the cache.
+
     :param otherid: (str)
+    :param cachedir: (str) cache directory
     :return pmid: (str)
     :rtype: str
     """
-    record = _pmc_id_conversion_api(otherid)
-    return record.get('pmid')
+    return _convert_otherids([otherid], cachedir)[otherid]['pmid']
 
-def get_pmcid_for_otherid(otherid):
+def get_pmcid_for_otherid(otherid, cachedir=DEFAULT_CACHE_DIR):
     """ Use the PMC ID conversion API to attempt to convert either PMID or DOI to a PMCID.
     Returns PMCID if successful, or None if there is no 'pmcid' item in the response.
 
+    Conversions are cached (see get_pmcids_for_otherids); pass cachedir=None to bypass the cache.
+
     :param otherid: (str)
+    :param cachedir: (str) cache directory
     :return pmcid: (str)
     :rtype: str
     """
-    record = _pmc_id_conversion_api(otherid)
-    return record.get('pmcid')
+    return _convert_otherids([otherid], cachedir)[otherid]['pmcid']
 
-def get_doi_for_otherid(otherid):
+def get_doi_for_otherid(otherid, cachedir=DEFAULT_CACHE_DIR):
     """ Use the PMC ID conversion API to attempt to convert either PMID or PMCID to a DOI.
     Returns DOI if successful, or None if there is no 'doi' item in the response.
 
@@ -74,12 +231,14 @@ def get_doi_for_otherid(otherid):
     CrossRef object, i.e. `from metapub import CrossRef` which excels at resolving citations
     into DOIs (and DOIs into citations).
 
+    Conversions are cached (see get_dois_for_otherids); pass cachedir=None to bypass the cache.
+
     :param otherid: (str)
+    :param cachedir: (str) cache directory
     :return doi: (str)
     :rtype: str
     """
-    record = _pmc_id_conversion_api(otherid)
-    return record.get('doi')
+    return _convert_otherids([otherid], cachedir)[otherid]['doi']
 
 
 # PMID: https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/?tool=my_tool&email=my_email@example.com&ids=23193287
@@ -2,7 +2,6 @@ __author__ = 'nthmost'
 __doc__ = '''metapub.PubMedFetcher -- tools to deal with NCBI's E-utilities interface to PubMed'''
 
 from lxml import etree
-import requests
 import logging
 
 from .eutils_common import get_eutils_client
@@ -124,6 +123,14 @@ class PubMedFetcher(Borg):
 
         pmids = fetch.pmids_for_citation(journal='Science', year='2008', volume='4',
                 first_page='7', author_name='Grant')
+
+    To resolve many citations at once (many citations per request), use pmids_for_citations:
+
+        results = fetch.pmids_for_citations([citation1_dict, citation2_dict, ...])
+
+    Likewise, related_pmids_many looks up related articles for many PMIDs per request:
+
+        related = fetch.related_pmids_many(['14873513', '20113659'])
     '''
 
     _cache_filename = 'pubmedfetcher.db'
@@ -207,6 +214,45 @@ class PubMedFetcher(Borg):
             else:
                 raise
 
+    def articles_by_pmids(self, pmids, batch_size=200):
+        '''Fetch many PubMedArticles, batch_size PMIDs per efetch request.
+
+        PMIDs that PubMed does not return (e.g. invalid or deleted IDs) are
+        simply absent from the result.
+
+        :param pmids: list of PMIDs (str or int)
+        :param batch_size: (int) PMIDs per request [default: 200]
+        :return: dict of pmid (str) -> PubMedArticle
+        '''
+        pmids = list(dict.fromkeys(str(pmid).strip() for pmid in pmids))
+        articles = {}
+        for start in range(0, len(pmids), batch_size):
+            chunk = pmids[start:start + batch_size]
+            try:
+                result = self.qs.efetch({'db': 'pubmed', 'id': ','.join(chunk)})
+            except EutilsRequestError as e:
+                diagnosis = diagnose_ncbi_error(e, 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi')
+                if diagnosis['is_service_issue']:
+                    raise NCBIServiceError(
+                        diagnosis['user_message'],
+                        diagnosis['error_type'],
+                        diagnosis['suggested_actions']
+                    ) from e
+                raise MetaPubError('Batch efetch of %d PMIDs rejected by Eutils: %s' % (len(chunk), e)) from e
+
+            if not result:
+                continue
+            if isinstance(result, str):
+                result = result.encode('utf-8')
+            root = etree.fromstring(result)
+            for elem in root.iterchildren('PubmedArticle', 'PubmedBookArticle'):
+                # PubMedArticle expects its record wrapped in a set, as efetch returns it.
+                xml = b'<PubmedArticleSet>' + etree.tostring(elem) + b'</PubmedArticleSet>'
+                pma = PubMedArticle(xml)
+                if pma.pmid:
+                    articles[pma.pmid] = pma
+        return articles
+
     def _eutils_article_by_pmcid(self, pmcid):
         # if user submitted a bare number, prepend "PMC" to make sure it is submitted correctly
         # the conversion API at pubmedcentral.
@@ -461,34 +507,11 @@ class PubMedFetcher(Borg):
         encoded characters and to remove punctuation.
         '''
         # output format in return:
-        # journal_title|year|volume|first_page|author_name|your_key|
-        base_uri = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/ecitmatch.cgi?db=pubmed&retmode=xml&bdata={journal_title}|{year}|{volume}|{first_page}|{author_name}|{api_key}|'
+        # journal_title|year|volume|first_page|author_name|your_key|pmid
+        bdata = '|'.join(_citation_fields(kwargs)) + '||'
+        log.debug('pmids_for_citation: querying with %s', bdata)
 
-        kwargs = lowercase_keys(kwargs)
-        journal_title = remove_chars(kpick(kwargs, options=['jtitle', 'journal', 'journal_title'], default=''), urldecode=True)
-        author_name = _reduce_author_string(kpick(kwargs,
-                        options=['aulast', 'author1_last_fm', 'author', 'authors'], default=''))
-        first_page = kpick(kwargs, options=['spage', 'first_page'], default='')
-        year = kpick(kwargs, options=['year', 'date', 'pdat'], default='')
-        volume = kpick(kwargs, options=['volume'], default='')
-
-        inp_dict = { 'journal_title': parameterize(journal_title, '+'),
-                     'year': str(year),
-                     'volume': str(volume),
-                     'first_page': str(first_page),
-                     'author_name': parameterize(author_name, '+'),
-                     'api_key': API_KEY or ''
-                   }
-
-        # clean up any "n/a" values.  eutils doesn't understand them.
-        for k in inp_dict:
-            if inp_dict[k].lower() == 'n/a':
-                inp_dict[k] = ''
-
-        req = base_uri.format(**inp_dict)
-        log.debug('pmids_for_citation: querying with %s', req)
-
-        content = requests.get(req, timeout=30).text
+        content = self._eutils_ecitmatch(bdata)
         pmids = []
         for item in content.split('\n'):
             if item.strip():
@@ -496,6 +519,47 @@ class PubMedFetcher(Borg):
                 pmids.append(pmid.strip())
         return pmids
 
+    def pmids_for_citations(self, citations, batch_size=100):
+        '''Batched pmids_for_citation: resolve many citations, packing up to batch_size
+        citations into each ECitMatch request.
+
+        citations may be a list of dicts (keyword arguments as for pmids_for_citation),
+        or a dict of {your_key: citation dict}. Results come back in the same shape
+        -- a list in input order, or a dict by your keys -- and each result is a list
+        like the return of pmids_for_citation: [pmid], ['NOT_FOUND'], or
+        ['AMBIGUOUS (n citations)'] (see convert.interpret_pmids_for_citation_results).
+
+        Results are cached per citation, shared with pmids_for_citation.
+
+        :param citations: list of dicts, or dict of key -> dict
+        :param batch_size: (int) citations per request [default: 100]
+        :return: list or dict of results
+        '''
+        keyed = citations.items() if isinstance(citations, dict) else enumerate(citations)
+        lines = [(key, '|'.join(_citation_fields(citation))) for key, citation in keyed]
+
+        matched = self.qs.client.ecitmatch_many([line for _, line in lines], batch_size=batch_size)
+        results = [(key, [matched.get(line) or 'NOT_FOUND']) for key, line in lines]
+
+        if isinstance(citations, dict):
+            return dict(results)
+        return [result for _, result in results]
+
+    def _eutils_ecitmatch(self, bdata):
+        """ Submit citation line(s) to ECitMatch through the shared NCBI client
+        (rate limited, and cached in the PubMedFetcher cache). """
+        try:
+            return self.qs.ecitmatch({'db': 'pubmed', 'retmode': 'xml', 'bdata': bdata})
+        except EutilsRequestError as e:
+            diagnosis = diagnose_ncbi_error(e, 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/ecitmatch.cgi')
+            if diagnosis['is_service_issue']:
+                raise NCBIServiceError(
+                    diagnosis['user_message'],
+                    diagnosis['error_type'],
+                    diagnosis['suggested_actions']
+                ) from e
+            raise MetaPubError('Citation match request failed: %s' % e) from e
+
     def related_pmids(self, pmid):
         '''For supplied pmid, return related ids of related pubmed articles,
         organized into a dictionary keyed by type of relation.  The keys include:
@@ -528,6 +592,33 @@ class PubMedFetcher(Borg):
             else:
                 raise
 
+    def related_pmids_many(self, pmids, batch_size=200):
+        '''Batched related_pmids: for each supplied pmid, the dictionary of related pubmed
+        ids keyed by type of relation (see related_pmids), looked up in elink requests
+        carrying up to batch_size PMIDs each.
+
+        :param pmids: list of PMIDs (str or int)
+        :param batch_size: (int) PMIDs per elink request [default: 200]
+        :return: dict mapping each PMID (str) to its related_pmids() dictionary
+                 (empty if NCBI returned nothing for it)
+        :raises: NCBIServiceError if NCBI ELink service is down
+        '''
+        pmids = list(dict.fromkeys(str(pmid).strip() for pmid in pmids))
+        try:
+            results = self.qs.client.elink_many('pubmed', pmids, cmd='neighbor', batch_size=batch_size)
+        except Exception as e:
+            diagnosis = diagnose_ncbi_error(e, 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi')
+            if diagnosis['is_service_issue']:
+                raise NCBIServiceError(
+                    f"Unable to fetch related articles for {len(pmids)} PMIDs: {diagnosis['user_message']}",
+                    diagnosis['error_type'],
+                    diagnosis['suggested_actions']
+                ) from e
+            else:
+                raise
+        return {pmid: parse_related_pmids_result(results[pmid]) if pmid in results else {}
+                for pmid in pmids}
+
     def pmid_for_bookID(self, book_id):
         '''For supplied NCBI Book ID, use the pubmed advanced query API to find its PMID.
 
@@ -544,6 +635,29 @@ class PubMedFetcher(Borg):
             return res[0].strip()
         return None
 
+def _normalize_citation_field(value):
+    """ Normalize one ECitMatch field so that equivalent citations share a cache key:
+    punctuation stripped, whitespace squashed, unidecoded and lowercased. "n/a" becomes ''. """
+    value = str(value).strip()
+    if value.lower() == 'n/a':
+        return ''
+    return parameterize(value, ' ').lower()
+
+
+def _citation_fields(kwargs):
+    """ Returns normalized (journal_title, year, volume, first_page, author_name)
+    from pmids_for_citation-style keyword arguments. """
+    kwargs = lowercase_keys(kwargs)
+    journal_title = remove_chars(kpick(kwargs, options=['jtitle', 'journal', 'journal_title'], default=''), urldecode=True)
+    author_name = _reduce_author_string(kpick(kwargs,
+                    options=['aulast', 'author1_last_fm', 'author', 'authors'], default=''))
+    first_page = kpick(kwargs, options=['spage', 'first_page'], default='')
+    year = kpick(kwargs, options=['year', 'date', 'pdat'], default='')
+    volume = kpick(kwargs, options=['volume'], default='')
+    return tuple(_normalize_citation_field(value if value is not None else '')
+                 for value in (journal_title, year, volume, first_page, author_name))
+
+
 def _reduce_author_string(author_string):
     # try splitting by commas
     authors = author_string.split(',')
@@ -1,4 +1,6 @@
 import re
+from functools import lru_cache
+from urllib.parse import urlparse
 
 from ..dx_doi import DxDOI
 from ..exceptions import DxDOIError, BadDOI
@@ -641,21 +643,145 @@ DOI_METHODS = [get_elifesciences_doi_from_link,
                ]
 
 
-def try_doi_methods(url):
-    """ Tries every "get_*_doi_from_link" method registered in DOI_METHODS and returns a doi
-    when/if it finds one. As a last resort, uses find_doi_in_string(url), which may work in cases
-    where the DOI can be parsed directly out of the URL.
+# == Hostname dispatch == #
+#
+# Each publisher-specific method above only ever fires for URLs on its own domain, so rather than
+# running the whole DOI_METHODS sequence for every URL we look at the hostname first and route the
+# URL straight to the method(s) that can apply: the publisher's own method, the early-release
+# method (for hosts with a known DOI prefix), and get_generic_doi_from_link as the last resort
+# (for urls that contain something DOI-shaped).
+# Relative order within a route is always the DOI_METHODS order.
+
+DOI_METHODS_BY_DOMAIN = {'elifesciences.org': get_elifesciences_doi_from_link,
+                         'plos.org': get_plos_doi_from_link,
+                         'cell.com': get_cell_doi_from_link,
+                         'jci.org': get_jci_doi_from_link,
+                         'jstage.jst.go.jp': get_jstage_doi_from_link,
+                         'pnas.org': get_pnas_doi_from_link,
+                         'bmj.com': get_bmj_doi_from_link,
+                         'ahajournals.org': get_ahajournals_doi_from_link,
+                         'biomedcentral.com': get_biomedcentral_doi_from_link,
+                         'nature.com': get_nature_doi_from_link,
+                         'sciencedirect.com': get_sciencedirect_doi_from_link,
+                         'karger.com': get_karger_doi_from_link,
+                         'spandidos-publications.com': get_spandidos_doi_from_link,
+                         }
+
+# Methods that may load a page or hit dx.doi.org. Everything else is pure regex.
+NETWORK_DOI_METHODS = (get_cell_doi_from_link,
+                       get_jstage_doi_from_link,
+                       get_bmj_doi_from_link,
+                       get_ahajournals_doi_from_link,
+                       get_nature_doi_from_link,
+                       get_sciencedirect_doi_from_link,
+                       get_spandidos_doi_from_link,
+                       get_generic_doi_from_link,
+                       )
+
+_DOI_METHOD_ORDER = {method: index for index, method in enumerate(DOI_METHODS)}
+
+
+@lru_cache(maxsize=1024)
+def _dispatch_domain(hostname):
+    """ Returns the DOI_METHODS_BY_DOMAIN key that hostname falls under (the hostname itself
+    or any parent domain of it), or None. """
+    labels = hostname.split('.')
+    for start in range(len(labels) - 1):
+        domain = '.'.join(labels[start:])
+        if domain in DOI_METHODS_BY_DOMAIN:
+            return domain
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _has_doi_prefix(hostname):
+    """ True if get_early_release_doi_from_link knows a DOI prefix for this hostname. """
+    return (hostname in HOSTNAME_TO_DOI_PREFIX_MAP or
+            '*.%s' % rootdomain_of(hostname) in HOSTNAME_TO_DOI_PREFIX_MAP)
+
+
+def doi_methods_for_url(url):
+    """ Returns the DOI methods applicable to this url, in DOI_METHODS order.
+
+    Known publisher hostnames (see DOI_METHODS_BY_DOMAIN) are routed to their own method; for
+    other hostnames, any publisher method whose domain appears elsewhere in the url is kept.
 
     :param url: (str)
-    :return: {'doi': <doi>, 'method': <method>} or None
+    :return: list of functions
+    """
+    hostname = hostname_of(url)
+    domain = _dispatch_domain(hostname)
+    if domain:
+        methods = [DOI_METHODS_BY_DOMAIN[domain]]
+    else:
+        methods = [method for domain, method in DOI_METHODS_BY_DOMAIN.items() if domain in url]
+    if _has_doi_prefix(hostname):
+        methods.append(get_early_release_doi_from_link)
+    # the generic method can only succeed (and only touches the network) if there's a DOI in the url.
+    if find_doi_in_string(url):
+        methods.append(get_generic_doi_from_link)
+    return sorted(methods, key=_DOI_METHOD_ORDER.__getitem__)
+
+
+def split_doi_methods(url):
+    """ Splits the url's DOI methods into the leading pure-regex methods, which can run
+    without touching the network, and the rest (starting at the first network-backed method).
+
+    :param url: (str)
+    :return: (offline_methods, network_methods)
     """
-    for method in DOI_METHODS:
+    methods = doi_methods_for_url(url)
+    for index, method in enumerate(methods):
+        if method in NETWORK_DOI_METHODS:
+            return methods[:index], methods[index:]
+    return methods, []
+
+
+def _run_doi_methods(url, methods):
+    for method in methods:
         doi = method(url)
         if doi:
             return {'doi': doi, 'method': method}
     return None
 
 
+def try_doi_methods(url):
+    """ Tries the "get_*_doi_from_link" methods applicable to this url (see doi_methods_for_url)
+    and returns a doi when/if it finds one. As a last resort, uses find_doi_in_string(url), which
+    may work in cases where the DOI can be parsed directly out of the URL.
+
+    :param url: (str)
+    :return: {'doi': <doi>, 'method': <method>} or None
+    """
+    return _run_doi_methods(url, doi_methods_for_url(url))
+
+
+def try_doi_methods_many(urls, network=True):
+    """ Runs try_doi_methods over a list of urls in two passes: first every url's pure-regex
+    methods, then (only for urls still unresolved) the network-backed methods.
+
+    If network is False, the second pass is skipped and those urls map to None.
+
+    :param urls: iterable of str
+    :param network: (bool)
+    :return: dict of url -> {'doi': <doi>, 'method': <method>} or None
+    """
+    results = {}
+    pending = []
+    for url in urls:
+        if url in results:
+            continue
+        offline, online = split_doi_methods(url)
+        results[url] = _run_doi_methods(url, offline)
+        if results[url] is None and online:
+            pending.append((url, online))
+
+    if network:
+        for url, online in pending:
+            results[url] = _run_doi_methods(url, online)
+    return results
+
+
 def try_vip_methods(url):
     """ Many URLs follow the "volume-issue-page" format. If this URL is one of them, this function will return
     a dictionary containing at least the volume, issue, and first_page aspects of this article. The 'jtitle'
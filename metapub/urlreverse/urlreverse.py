@@ -1,24 +1,31 @@
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-from ..pubmedcentral import get_pmid_for_otherid
+from ..pubmedcentral import get_pmid_for_otherid, get_pmids_for_otherids
 from ..pubmedfetcher import PubMedFetcher
 from ..crossref import CrossRefFetcher
 from ..cache_utils import SQLiteCache, get_cache_path, datetime_to_timestamp
 from ..dx_doi import DxDOI
-from ..convert import doi2pmid, pmid2doi, interpret_pmids_for_citation_results
+from ..convert import (doi2pmid, pmid2doi, dois2pmids, pmids2dois,
+                       interpret_pmids_for_citation_results)
 from ..exceptions import MetaPubError, DxDOIError, BadDOI
-from ..utils import hostname_of, remove_chars, asciify
+from ..utils import HostLimiter, hostname_of, remove_chars, asciify
 from ..text_mining import find_doi_in_string
 from ..config import DEFAULT_CACHE_DIR
 
-from .methods import re_pmcid, try_pmid_methods, try_doi_methods, try_vip_methods
+from .methods import (re_pmcid, try_pmid_methods, try_doi_methods, try_vip_methods,
+                      split_doi_methods, _run_doi_methods)
 
 
 # UrlReverse cacheing engine globals
 URLREVERSE_CACHE = None
 CACHE_FILENAME = 'urlreverse.db'
 
+# UrlReverse.batch defaults: threads overall, and simultaneous page loads from any one host.
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+
 pm_fetch = None
 dxdoi = None
 cr_fetch = None
@@ -52,7 +59,11 @@ def get_article_info_from_url(url):
     :return: result dictionary (see above)
     """
     # maybe the DOI is deducible from the URL:
-    doidict = try_doi_methods(url)
+    return _article_info_from_doi_result(url, try_doi_methods(url))
+
+
+def _article_info_from_doi_result(url, doidict):
+    """ The rest of get_article_info_from_url, given the result of try_doi_methods(url). """
     if doidict:
         doidict['format'] = 'doi'
         return doidict
@@ -80,6 +91,15 @@ def get_article_info_from_url(url):
     return {'format': 'unknown'}
 
 
+def normalize_url(url):
+    """ Returns url as UrlReverse looks it up and caches it: stripped of surrounding
+    whitespace, with 'http://' prepended if it has no protocol. """
+    url = url.strip()
+    if not url.lower().startswith('http'):
+        url = 'http://' + url
+    return url
+
+
 def _get_urlreverse_cache(cachedir=DEFAULT_CACHE_DIR):
     global URLREVERSE_CACHE
     if not URLREVERSE_CACHE:
@@ -133,6 +153,9 @@ class UrlReverse(object):
 
     When ambiguous results are received, UrlReverse considers this a failure (see `steps`).
 
+    To reverse many URLs at once, use UrlReverse.batch(urls), which deduplicates, answers
+    from the cache, and runs each lookup stage over the whole set (see its docstring).
+
     Args:
 
         skip_cache: (default: False) whether to load results afresh, regardless of cache contents.
@@ -145,14 +168,25 @@ class UrlReverse(object):
     """
 
     def __init__(self, url, skip_cache=False, **kwargs):
-        if not url.lower().startswith('http'):
-            url = 'http://' + url
+        self._setup(url, **kwargs)
+
+        if self._cache:
+            self._load_from_cache()
+        else:
+            self._urlreverse()
+
+    def _setup(self, url, **kwargs):
+        url = normalize_url(url)
 
         _start_engines()
 
         self.url = url
         self.steps = []
 
+        # batch() bookkeeping: DOI methods left for the network stage; whether the result is partial.
+        self._pending_doi_methods = None
+        self._incomplete = False
+
         self.pmid = None
         self.doi = None
         self.info = None
@@ -168,11 +202,6 @@ class UrlReverse(object):
         else:
             self._log.setLevel(logging.INFO)
 
-        if self._cache:
-            self._load_from_cache()
-        else:
-            self._urlreverse()
-
     def _urlreverse(self):
         """ the switchboard operator of the urlreverse methods.
 
@@ -183,28 +212,13 @@ class UrlReverse(object):
             self.doi
             self.steps
         """
-        self.info = get_article_info_from_url(self.url)
-        self.format = self.info['format']
+        self._set_info(get_article_info_from_url(self.url))
 
         if self.format == 'pmid':
-            self.pmid = self.info['pmid']
-            #self.doi = pmid2doi(self.pmid)
-            if self.pmid:
-                self.steps.append('FOUND PMID from inferred PMID in URL')
+            self._record_url_pmid()
 
         elif self.format == 'doi':
-            self.doi = self.info['doi']
-            self.steps.append('FOUND DOI via inferred doi')
-            self.pmid = doi2pmid(self.doi)
-            if self.pmid:
-                try:
-                    int(self.pmid)
-                    self.steps.append('FOUND PMID via doi2pmid')
-                except:
-                    # we'll log this further down (avoiding repeated code).
-                    pass
-            else:
-                self.steps.append('NO PMID from doi2pmid')
+            self._record_doi2pmid(doi2pmid(self.info['doi']))
 
         elif self.format == 'vip':
             try:
@@ -214,30 +228,249 @@ class UrlReverse(object):
                 self.steps.append('NO PMID from VIP info + citation methods')
 
         elif self.format == 'pmcid':
-            self.pmid = get_pmid_for_otherid(self.info['pmcid'])
-            self.doi = doi2pmid(self.pmid)
-            if self.pmid:
-                self.steps.append('FOUND PMID from PMCID -> PMID lookup')
+            pmid = get_pmid_for_otherid(self.info['pmcid'])
+            self._record_pmcid_lookup(pmid, pmid2doi(pmid) if pmid else None)
 
-        if self.pmid and self.pmid.startswith('NOT_FOUND'):
-            self.steps.append('NO PMID: PMID citation lookup resulted in "%s"' % self.pmid)
-            self.pmid = None
+        self._check_pmid()
 
         if self.doi and not self.pmid:
             self._try_backup_doi2pmid_methods()
 
         if self.doi:
             try:
-                urlres = dxdoi.resolve(self.doi)
-                self.steps.append('VERIFY dx.doi.org: %s' % urlres)
+                self._record_verification(dxdoi.resolve(self.doi))
             except (DxDOIError, BadDOI) as error:
-                self.doi = None
-                self.steps.append('VERIFY dx.doi.org: PROBLEM with DOI: %r' % error)
+                self._record_verification(None, error)
 
+        self._finish()
+
+    # The _record_* / _check_* steps below are shared by _urlreverse and batch().
+
+    def _set_info(self, info):
+        self.info = info
+        self.format = info['format']
+
+    def _record_url_pmid(self):
+        self.pmid = self.info['pmid']
+        if self.pmid:
+            self.steps.append('FOUND PMID from inferred PMID in URL')
+
+    def _record_doi2pmid(self, pmid):
+        self.doi = self.info['doi']
+        self.steps.append('FOUND DOI via inferred doi')
+        self.pmid = pmid
+        if self.pmid:
+            try:
+                int(self.pmid)
+                self.steps.append('FOUND PMID via doi2pmid')
+            except:
+                # we'll log this further down (avoiding repeated code).
+                pass
+        else:
+            self.steps.append('NO PMID from doi2pmid')
+
+    def _record_pmcid_lookup(self, pmid, doi):
+        self.pmid = pmid
+        self.doi = doi
+        if self.pmid:
+            self.steps.append('FOUND PMID from PMCID -> PMID lookup')
+
+    def _record_citation_match(self, pmid, doi):
+        self.pmid = pmid
+        self.doi = doi
+        self.steps.append('FOUND PMID via PubmedFetcher.pmids_for_citation')
+        if self.doi:
+            self.steps.append('FOUND DOI via pmid2doi')
+
+    def _check_pmid(self):
+        if self.pmid and self.pmid.startswith('NOT_FOUND'):
+            self.steps.append('NO PMID: PMID citation lookup resulted in "%s"' % self.pmid)
+            self.pmid = None
+
+    def _record_verification(self, urlres, error=None):
+        if urlres:
+            self.steps.append('VERIFY dx.doi.org: %s' % urlres)
+        else:
+            self.doi = None
+            self.steps.append('VERIFY dx.doi.org: PROBLEM with DOI: %r' % (error or DxDOIError('could not resolve')))
+
+    def _finish(self):
         # Finally: ADMIT DEFEAT
         if not self.doi and not self.pmid:
             self.steps.append('NO DOI. NO PMID. All methods failed. END OF LINE.')
 
+    @classmethod
+    def batch(cls, urls, network=True, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, **kwargs):
+        """ Reverse many urls at once. Returns a dict of url -> UrlReverse object.
+
+        Urls are deduplicated by their normalized form (see normalize_url) and answered
+        from the cache where possible. The rest are processed in stages, each run over
+        the whole set before the next:
+
+            1. parse: everything that can be read straight out of the url (pure regex
+               DOI methods, PMIDs, PMCIDs, volume-issue-page), with no network access.
+            2. doi methods: publisher page scrapes / DOI checks for urls that need them,
+               run concurrently with at most `per_host` requests to any one host.
+            3. lookups: bulk dois2pmids, PMC ID conversion and citation matching, then
+               the CrossRef/PubMed backup methods concurrently for DOIs still without a PMID.
+            4. verify: all DOIs resolved together with DxDOI.resolve_many.
+
+        With network=False only stage 1 runs. Urls that are fully answered by parsing
+        (e.g. pubmed links) are complete; the others are returned with whatever the url
+        itself revealed, a step noting that network stages were skipped, and are not cached.
+
+        :param urls: iterable of str
+        :param network: (bool) run the network stages [default: True]
+        :param workers: (int) concurrent threads for network stages
+        :param per_host: (int) max concurrent page loads from one host (stage 2)
+        :param cachedir: (kwarg) cache directory; None disables the cache
+        :param skip_cache: (kwarg) ignore cached results (new results are still stored)
+        :param debug: (kwarg) as for UrlReverse()
+        :return: dict of url -> UrlReverse
+        """
+        skip_cache = kwargs.pop('skip_cache', False)
+        normalized = {url: normalize_url(url) for url in urls}
+
+        found = {}
+        todo = []
+        for norm in dict.fromkeys(normalized.values()):
+            urlrev = cls.__new__(cls)
+            urlrev._setup(norm, **kwargs)
+            found[norm] = urlrev
+            cache_result = None if skip_cache else urlrev._query_cache(norm)
+            if cache_result:
+                urlrev._set_from_cache(cache_result)
+            else:
+                todo.append(urlrev)
+
+        # Stage 1: parse.
+        needs_doi_methods = []
+        for urlrev in todo:
+            offline, online = split_doi_methods(urlrev.url)
+            doidict = _run_doi_methods(urlrev.url, offline)
+            if doidict or not online:
+                urlrev._set_info(_article_info_from_doi_result(urlrev.url, doidict))
+            else:
+                urlrev._pending_doi_methods = online
+                needs_doi_methods.append(urlrev)
+
+        if not network:
+            for urlrev in needs_doi_methods:
+                urlrev._set_info(_article_info_from_doi_result(urlrev.url, None))
+            for urlrev in todo:
+                if urlrev._pending_doi_methods or urlrev.format not in ('pmid', 'unknown'):
+                    urlrev._incomplete = True
+                    if urlrev.format == 'doi':
+                        urlrev.doi = urlrev.info['doi']
+                        urlrev.steps.append('FOUND DOI via inferred doi')
+                    urlrev.steps.append('SKIPPED network stages (network=False)')
+                elif urlrev.format == 'pmid':
+                    urlrev._record_url_pmid()
+            cls._finish_batch(todo)
+            return {url: found[norm] for url, norm in normalized.items()}
+
+        # Stage 2: network-backed DOI methods, per-host limited.
+        limiter = HostLimiter(per_host)
+
+        def run_doi_methods(urlrev):
+            try:
+                with limiter.slot(urlrev.url):
+                    doidict = _run_doi_methods(urlrev.url, urlrev._pending_doi_methods)
+            except Exception as error:
+                urlrev._log.info('DOI methods failed for %s: %r', urlrev.url, error)
+                urlrev._incomplete = True
+                urlrev.steps.append('ERROR in DOI methods: %r' % error)
+                doidict = None
+            urlrev._set_info(_article_info_from_doi_result(urlrev.url, doidict))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run_doi_methods, needs_doi_methods))
+
+        # Stage 3: bulk ID lookups by format.
+        by_format = {}
+        for urlrev in todo:
+            by_format.setdefault(urlrev.format, []).append(urlrev)
+
+        for urlrev in by_format.get('pmid', []):
+            urlrev._record_url_pmid()
+
+        doi_urlrevs = by_format.get('doi', [])
+        if doi_urlrevs:
+            pmids = dois2pmids([urlrev.info['doi'] for urlrev in doi_urlrevs])
+            for urlrev in doi_urlrevs:
+                urlrev._record_doi2pmid(pmids[urlrev.info['doi'].strip()])
+
+        pmcid_urlrevs = by_format.get('pmcid', [])
+        if pmcid_urlrevs:
+            pmids = get_pmids_for_otherids([urlrev.info['pmcid'] for urlrev in pmcid_urlrevs])
+            dois = pmids2dois([pmid for pmid in pmids.values() if pmid])
+            for urlrev in pmcid_urlrevs:
+                pmid = pmids[urlrev.info['pmcid']]
+                urlrev._record_pmcid_lookup(pmid, dois.get(pmid) if pmid else None)
+
+        vip_urlrevs = by_format.get('vip', [])
+        if vip_urlrevs:
+            cls._batch_citation_methods(vip_urlrevs)
+
+        for urlrev in todo:
+            urlrev._check_pmid()
+
+        def backup(urlrev):
+            try:
+                urlrev._try_backup_doi2pmid_methods()
+            except Exception as error:
+                urlrev._log.info('backup doi2pmid methods failed for %s: %r', urlrev.url, error)
+                urlrev._incomplete = True
+                urlrev.steps.append('ERROR in backup doi2pmid methods: %r' % error)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(backup, [urlrev for urlrev in todo if urlrev.doi and not urlrev.pmid]))
+
+        # Stage 4: verify DOIs.
+        to_verify = [urlrev for urlrev in todo if urlrev.doi]
+        if to_verify:
+            urls = dxdoi.resolve_many([urlrev.doi for urlrev in to_verify], workers=workers)
+            for urlrev in to_verify:
+                urlrev._record_verification(urls.get(urlrev.doi))
+
+        cls._finish_batch(todo)
+        return {url: found[norm] for url, norm in normalized.items()}
+
+    @staticmethod
+    def _batch_citation_methods(urlrevs):
+        """ Batched _try_citation_methods: one citation match and one pmids2dois for all urlrevs. """
+        try:
+            results = pm_fetch.pmids_for_citations({urlrev.url: urlrev.info for urlrev in urlrevs})
+        except MetaPubError:
+            results = {}
+        pmids = {}
+        for urlrev in urlrevs:
+            pmid = interpret_pmids_for_citation_results(results.get(urlrev.url) or [])
+            if pmid and pmid != 'AMBIGUOUS':
+                pmids[urlrev.url] = pmid
+            elif urlrev.url not in results:
+                urlrev.steps.append('NO PMID from VIP info + citation methods')
+        dois = pmids2dois(list(pmids.values())) if pmids else {}
+        for urlrev in urlrevs:
+            if urlrev.url in pmids:
+                urlrev._record_citation_match(pmids[urlrev.url], dois.get(pmids[urlrev.url]))
+
+    @staticmethod
+    def _finish_batch(urlrevs):
+        """ Admit defeat where due, and store complete results in the cache in one write. """
+        caches = {}
+        for urlrev in urlrevs:
+            if urlrev._incomplete:
+                continue
+            urlrev._finish()
+            if urlrev._cache:
+                cache_value = urlrev.to_dict()
+                cache_value['timestamp'] = time.time()
+                caches.setdefault(id(urlrev._cache), (urlrev._cache, {}))[1][
+                    urlrev._make_cache_key(urlrev.url)] = cache_value
+        for cache, values in caches.values():
+            cache.update(values)
+
     def _store_cache(self):
         """ Store this object in cache by explicitly choosing variables to store as
         values, using self.url as the cache key.
@@ -255,10 +488,7 @@ class UrlReverse(object):
         cache_result = self._query_cache(self.url, expiry_date)
 
         if cache_result:
-            self.pmid = cache_result['pmid']
-            self.doi = cache_result['doi']
-            self.steps = cache_result['steps']
-            self.info = cache_result['info']
+            self._set_from_cache(cache_result)
 
             if retry:
                 if 'END OF LINE' in ';'.join(self.steps):
@@ -269,6 +499,12 @@ class UrlReverse(object):
             self._urlreverse()
             self._store_cache()
 
+    def _set_from_cache(self, cache_result):
+        self.pmid = cache_result['pmid']
+        self.doi = cache_result['doi']
+        self.steps = cache_result['steps']
+        self.info = cache_result['info']
+
     def _make_cache_key(self, url):
         """ Returns url normalized via str() function for hash lookup / store. """
         return str(url)
@@ -320,11 +556,7 @@ class UrlReverse(object):
         pmids = pm_fetch.pmids_for_citation(**self.info)
         pmid = interpret_pmids_for_citation_results(pmids)
         if pmid and pmid != 'AMBIGUOUS':
-            self.pmid = pmid
-            self.doi = pmid2doi(pmid)
-            self.steps.append('FOUND PMID via PubmedFetcher.pmids_for_citation')
-            if self.doi:
-                self.steps.append('FOUND DOI via pmid2doi')
+            self._record_citation_match(pmid, pmid2doi(pmid))
             return
 
         # 2) try CrossRef -- most effective when title available, but may work without it.
@@ -1,4 +1,9 @@
+import gzip
+import os
 import unicodedata
+from threading import BoundedSemaphore, Lock
+
+import requests
 
 from unidecode import unidecode
 
@@ -69,6 +74,68 @@ def rootdomain_of(url):
     return '.'.join(hostname.split('.')[-2:])
 
 
+class HostLimiter:
+    """ Hands out one semaphore per hostname, so that concurrent workers send no more than
+    `per_host` simultaneous requests to any single host.
+
+    Usage:
+        limiter = HostLimiter(4)
+        with limiter.slot(url):
+            response = session.get(url)
+    """
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._slots = {}
+        self._lock = Lock()
+
+    def slot(self, url):
+        """ Returns the semaphore for the url's hostname.
+
+        :param url: (str)
+        :return: threading.BoundedSemaphore
+        """
+        host = (urlparse(url).netloc or url).lower()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def open_maybe_gzipped(path, mode='rb', encoding=None):
+    """ Open a data file for reading, transparently decompressing it if it is gzipped.
+
+    :param path: (str)
+    :param mode: 'rb' or 'rt'
+    :param encoding: text encoding for mode 'rt'
+    :return: file object
+    """
+    with open(path, 'rb') as fh:
+        magic = fh.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+def download_file(url, path, chunk_size=1024 * 1024, timeout=60):
+    """ Stream url to path, via a temporary .part file so an interrupted download never
+    replaces a good copy. Returns path.
+
+    :raises: requests.exceptions.RequestException
+    """
+    partial = path + '.part'
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(partial, 'wb') as fh:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                fh.write(chunk)
+    os.replace(partial, path)
+    return path
+
+
 def asciify(inp):
     """ Nuke all the unicode from orbit. It's the only way to be sure.
 
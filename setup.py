@@ -82,6 +82,9 @@ setup(
             "ncbi_health_check = metapub.ncbi_health_check:main",
             "metapub_build_registry = metapub.scripts.build_registry_from_yaml:main",
             "metapub-registry = metapub.findit.cli:main",
+            "metapub-findit-cache = metapub.findit.cache_cli:main",
+            "metapub-clinvar-index = metapub.clinvarindex:main",
+            "metapub-medgen-index = metapub.medgenindex:main",
         ]
     },
     # Include all Python files in the package
@@ -98,13 +101,13 @@ setup(
         "lxml_html_clean",
         "requests",
         "brotli",
-        "habanero",
         "tabulate",
         "cssselect",
         "unidecode",
         "docopt",
         "coloredlogs",
         "python-Levenshtein",
+        "rapidfuzz",
         "pyyaml",
     ],
     classifiers=[
@@ -186,3 +186,13 @@ def coordinate_network_tests(request):
     # Small delay after network tests to be extra conservative
     if request.node.get_closest_marker('network'):
         time.sleep(0.1)
+
+
+@pytest.fixture(autouse=True)
+def reset_ncbi_circuit_breaker():
+    """Keep one test's NCBI failures from tripping the shared circuit breaker for the next."""
+    from metapub.ncbi_errors import get_circuit_breaker
+    breaker = get_circuit_breaker()
+    breaker.reset()
+    breaker.detector.clear_status()
+    yield
@@ -5,7 +5,7 @@ from unittest.mock import patch, Mock
 
 from .common import BaseDanceTest
 from metapub import PubMedFetcher
-from metapub.findit.dances import the_sciencedirect_disco
+from metapub.findit.dances import the_sciencedirect_disco, sciencedirect_pdf_candidates
 from metapub.exceptions import AccessDenied, NoPDFLink
 from tests.fixtures import load_pmid_xml, SCIENCEDIRECT_EVIDENCE_PMIDS
 
@@ -185,6 +185,53 @@ class TestScienceDirectDance(BaseDanceTest):
             assert f'pii/{expected_clean}/pdfft' in url
             print(f"Test 9 - PII {original_pii} → {expected_clean}")
 
+    def test_sciencedirect_pdf_candidates_pii(self):
+        """Test 10: Candidate URLs for race mode, PII present.
+
+        Expected: primary then alternate PDF URL, no network access
+        """
+        pma = Mock()
+        pma.pii = 'S0167-9236(22)00118-X'
+        pma.doi = '10.1016/j.dss.2022.113847'
+
+        with patch('metapub.findit.dances.sciencedirect.get_crossref_pdf_links') as mock_crossref:
+            urls = list(sciencedirect_pdf_candidates(pma))
+            mock_crossref.assert_not_called()
+
+        assert urls == [
+            'https://www.sciencedirect.com/science/article/pii/S016792362200118X/pdfft?isDTMRedir=true&download=true',
+            'https://www.sciencedirect.com/science/article/pii/S016792362200118X/pdfft',
+        ]
+
+    @patch('metapub.findit.dances.sciencedirect.the_doi_2step')
+    @patch('metapub.findit.dances.sciencedirect.get_crossref_pdf_links')
+    def test_sciencedirect_pdf_candidates_doi_fallbacks(self, mock_crossref, mock_2step):
+        """Test 11: Candidate URLs for race mode, DOI only.
+
+        Expected: CrossRef links first, then PII-based URLs from DOI resolution
+        """
+        mock_crossref.return_value = ['https://api.elsevier.com/content/article/PII:S0964195596000358?httpAccept=text/pdf']
+        mock_2step.return_value = 'https://www.sciencedirect.com/science/article/pii/S0964195596000358'
+        pma = Mock()
+        pma.pii = None
+        pma.doi = '10.1006/test.1996.0035'
+
+        urls = list(sciencedirect_pdf_candidates(pma))
+        assert urls[0] == mock_crossref.return_value[0]
+        assert urls[1:] == [
+            'https://www.sciencedirect.com/science/article/pii/S0964195596000358/pdfft?isDTMRedir=true&download=true',
+            'https://www.sciencedirect.com/science/article/pii/S0964195596000358/pdfft',
+        ]
+
+    def test_sciencedirect_pdf_candidates_missing_identifiers(self):
+        """Test 12: Candidate URLs for race mode without PII or DOI."""
+        pma = Mock()
+        pma.pii = None
+        pma.doi = None
+
+        with pytest.raises(NoPDFLink):
+            list(sciencedirect_pdf_candidates(pma))
+
 
 def test_sciencedirect_journal_recognition():
     """Test that ScienceDirect journals are properly recognized in the registry."""
@@ -22,7 +22,22 @@ class TestConversions(unittest.TestCase):
         ids = parse_elink_response(fixture)
         assert len(ids) == 0
 
-    
+    def test_elink_response_multiple_linksets(self):
+        xmlstr = ('<eLinkResult>'
+                  '<LinkSet><DbFrom>clinvar</DbFrom><IdList><Id>9</Id></IdList>'
+                  '<LinkSetDb><DbTo>pubmed</DbTo><LinkName>clinvar_pubmed</LinkName>'
+                  '<Link><Id>111</Id></Link><Link><Id>222</Id></Link></LinkSetDb></LinkSet>'
+                  '<LinkSet><DbFrom>clinvar</DbFrom><IdList><Id>10</Id></IdList></LinkSet>'
+                  '<LinkSet><DbFrom>clinvar</DbFrom><IdList><Id>11</Id></IdList>'
+                  '<LinkSetDb><DbTo>pubmed</DbTo><LinkName>clinvar_pubmed</LinkName>'
+                  '<Link><Id>222</Id></Link><Link><Id>333</Id></Link></LinkSetDb></LinkSet>'
+                  '</eLinkResult>')
+        self.assertEqual(parse_elink_response(xmlstr), ['111', '222', '333'])
+        # a LinkSet with only its source ID has no links
+        self.assertEqual(parse_elink_response('<eLinkResult><LinkSet><DbFrom>clinvar</DbFrom>'
+                                              '<IdList><Id>10</Id></IdList></LinkSet></eLinkResult>'), [])
+        self.assertIsNone(parse_elink_response('<eLinkResult></eLinkResult>'))
+
     def test_clean_html(self):
         obj = MetaPubObject('<br/>')
         test_cases = [
@@ -0,0 +1,279 @@
+"""Offline tests for ClinVarFetcher (E-utilities responses mocked)."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from lxml import etree
+
+from metapub import ClinVarFetcher, ClinVarVariant, ClinVarVCVRelease
+from metapub.clinvarindex import ClinVarIndex, normalize_hgvs
+from metapub.exceptions import MetaPubError
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+EMPTY_SET = '<ClinVarResult-Set><set/></ClinVarResult-Set>'
+
+
+def _archive_xml(variation_id):
+    """ The VCV 12397 archive from the test fixture, relabelled with variation_id. """
+    with open(os.path.join(DATA_DIR, 'clinvar_vcv_12000.xml'), 'rb') as fh:
+        archive = etree.fromstring(fh.read()).find('VariationArchive')
+    archive.set('VariationID', variation_id)
+    return etree.tostring(archive, encoding='unicode')
+
+
+# Entrez UID -> VCV record (VariationID differs from the UID, as in real ClinVar)
+RECORDS = {'12000': _archive_xml('12397'), '12001': _archive_xml('12398'), '12002': _archive_xml('12399')}
+RECORDS_BY_VARIATION_ID = {'12397': RECORDS['12000'], '12398': RECORDS['12001'], '12399': RECORDS['12002']}
+
+
+def fake_send(endpoint, url, params):
+    records = RECORDS_BY_VARIATION_ID if params.get('is_variationid') else RECORDS
+    found = [records[uid] for uid in params['id'].split(',') if uid in records]
+    content = '<ClinVarResult-Set>%s</ClinVarResult-Set>' % ''.join(found) if found else EMPTY_SET
+    return content, Mock(status_code=200, headers={'content-type': 'text/xml'})
+
+
+class TestClinVarVariants(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.fetch = ClinVarFetcher(cachedir=self.cachedir)
+        self.client = self.fetch.qs.client
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_variants_batches_and_isolates_invalid_ids(self):
+        with patch.object(self.client, '_send', side_effect=fake_send) as send:
+            variants = self.fetch.variants([12000, '12001', 'junk', '99999', 12002, '12000'], batch_size=10)
+
+        self.assertEqual(list(variants), ['12000', '12001', 'junk', '99999', '12002'])
+        self.assertEqual({uid: v and v.variation_id for uid, v in variants.items()},
+                         {'12000': '12397', '12001': '12398', 'junk': None, '99999': None, '12002': '12399'})
+        # one batched request, then halves until the invalid UID is isolated
+        self.assertEqual(send.call_args_list[0][0][2]['id'], '12000,12001,99999,12002')
+        self.assertNotIn('junk', ''.join(call[0][2]['id'] for call in send.call_args_list))
+
+    def test_variants_share_cache_with_variant(self):
+        with patch.object(self.client, '_send', side_effect=fake_send):
+            self.fetch.variants(['12000', '12001'])
+
+        with patch.object(self.client, '_send', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.fetch.variant(12001).variation_id, '12398')
+            variants = self.fetch.variants(['12000', '12001'])
+        self.assertEqual(variants['12000'].variation_id, '12397')
+
+        # invalid IDs aren't cached
+        with patch.object(self.client, '_send', side_effect=fake_send):
+            self.assertEqual(self.fetch.variants(['99999']), {'99999': None})
+            with self.assertRaises(MetaPubError):
+                self.fetch.variant('99999')
+
+    def test_variants_matched_by_variation_id_not_order(self):
+        def sorted_send(endpoint, url, params):
+            # Entrez UIDs that are VariationIDs, with efetch returning the records in its own order
+            ids = sorted(params['id'].split(','), reverse=True)
+            content = '<ClinVarResult-Set>%s</ClinVarResult-Set>' % ''.join(RECORDS_BY_VARIATION_ID[i] for i in ids)
+            return content, Mock(status_code=200, headers={'content-type': 'text/xml'})
+
+        with patch.object(self.client, '_send', side_effect=sorted_send):
+            variants = self.fetch.variants(['12397', '12398', '12399'])
+        self.assertEqual({uid: v.variation_id for uid, v in variants.items()},
+                         {'12397': '12397', '12398': '12398', '12399': '12399'})
+
+        with patch.object(self.client, '_send', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.fetch.variant('12397').variation_id, '12397')
+
+    def test_variants_by_variation_id(self):
+        with patch.object(self.client, '_send', side_effect=fake_send) as send:
+            variants = self.fetch.variants(['12399', '12397', '1'], id_from='clinvar', batch_size=2)
+
+        self.assertEqual({vid: v and v.variation_id for vid, v in variants.items()},
+                         {'12399': '12399', '12397': '12397', '1': None})
+        self.assertEqual(send.call_count, 2)
+        self.assertTrue(all(call[0][2]['is_variationid'] == 'true' for call in send.call_args_list))
+
+    def test_iter_ids_by_gene_pages(self):
+        gene_ids = ['12000', '12001', '99999', '12002']
+
+        def esearch_send(endpoint, url, params):
+            if endpoint != 'esearch':
+                return fake_send(endpoint, url, params)
+            start, size = int(params['retstart']), int(params['retmax'])
+            ids = ''.join('<Id>%s</Id>' % uid for uid in gene_ids[start:start + size])
+            content = '<eSearchResult><Count>%i</Count><IdList>%s</IdList></eSearchResult>' % (len(gene_ids), ids)
+            return content, Mock(status_code=200, headers={'content-type': 'text/xml'})
+
+        with patch.object(self.client, '_send', side_effect=esearch_send) as send:
+            self.assertEqual(list(self.fetch.iter_ids_by_gene('TSC2', single_gene=True, page_size=3)), gene_ids)
+            searches = [call[0][2] for call in send.call_args_list]
+            self.assertEqual([params['retstart'] for params in searches], ['0', '3'])
+            self.assertEqual(searches[0]['term'], 'TSC2[gene] AND single_gene[prop]')
+
+            variants = list(self.fetch.iter_variants_by_gene('TSC2', batch_size=2, prefetch=1))
+        self.assertEqual([v.variation_id for v in variants], ['12397', '12398', '12399'])
+
+    def test_pmids_for_ids(self):
+        xmlstr = ('<eLinkResult>'
+                  '<LinkSet><DbFrom>clinvar</DbFrom><IdList><Id>9</Id></IdList>'
+                  '<LinkSetDb><DbTo>pubmed</DbTo><LinkName>clinvar_pubmed</LinkName>'
+                  '<Link><Id>111</Id></Link><Link><Id>222</Id></Link></LinkSetDb></LinkSet>'
+                  '<LinkSet><DbFrom>clinvar</DbFrom><IdList><Id>10</Id></IdList></LinkSet>'
+                  '</eLinkResult>')
+        response = Mock(status_code=200, headers={'content-type': 'text/xml'})
+        with patch.object(self.client, '_send', return_value=(xmlstr, response)) as send:
+            self.assertEqual(self.fetch.pmids_for_ids([9, '10', '11']), {'9': ['111', '222'], '10': [], '11': []})
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(send.call_args[0][2]['db'], 'pubmed')
+
+        with patch.object(self.client, '_send', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.fetch.pmids_for_id(9), ['111', '222'])
+
+
+class TestClinVarVariantLazyAttributes(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'clinvar_vcv_12000.xml'), 'rb') as fh:
+            self.xml = fh.read()
+
+    def test_parses_once_and_builds_sub_structures_on_demand(self):
+        with patch('metapub.base.etree.XML', wraps=etree.XML) as parse, \
+                patch.object(ClinVarVariant, '_get_clinical_assertions', autospec=True,
+                             side_effect=ClinVarVariant._get_clinical_assertions) as build:
+            var = ClinVarVariant(self.xml)
+            self.assertEqual(parse.call_count, 1)
+            build.assert_not_called()
+            for name in ClinVarVariant.LAZY_ATTRIBUTES:
+                self.assertNotIn(name, var.__dict__)
+
+            assertions = var.clinical_assertions
+            self.assertIs(var.clinical_assertions, assertions)
+            self.assertEqual(build.call_count, 1)
+        self.assertEqual(len(assertions), 12)
+        self.assertEqual(var.pathogenic_summary.consensus, 'pathogenic')
+
+    def test_to_dict_includes_lazy_attributes(self):
+        var_dict = ClinVarVariant(self.xml).to_dict()
+        for name in ClinVarVariant.LAZY_ATTRIBUTES:
+            self.assertIn(name, var_dict)
+        for key in ClinVarVariant._MEMO_KEYS:
+            self.assertNotIn(key, var_dict)
+        self.assertNotIn('content', var_dict)
+
+
+class TestClinVarVCVRelease(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'ClinVarVCVRelease_test.xml.gz')
+        with gzip.open(self.path, 'wt', encoding='utf-8') as fh:
+            fh.write('<?xml version="1.0" encoding="UTF-8"?>\n<ClinVarVariationRelease ReleaseDate="2024-01-01">\n')
+            fh.write('\n'.join(RECORDS_BY_VARIATION_ID.values()))
+            fh.write('\n</ClinVarVariationRelease>\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_variants_match_efetch_parsing(self):
+        variants = list(ClinVarVCVRelease(self.path))
+        self.assertEqual([v.variation_id for v in variants], ['12397', '12398', '12399'])
+
+        expected = ClinVarVariant('<ClinVarResult-Set>%s</ClinVarResult-Set>' % RECORDS['12000'])
+        for attr in ('variation_name', 'genes', 'hgvs', 'clinical_significance', 'vcv_accession',
+                     'associated_conditions', 'pathogenic_summary'):
+            self.assertEqual(getattr(variants[0], attr), getattr(expected, attr), attr)
+        self.assertIsNone(variants[0].xml)
+
+    def test_archives_are_detached(self):
+        # earlier records are gone from the tree (later ones may already be partly parsed)
+        seen = []
+        for archive in ClinVarVCVRelease(self.path).archives():
+            self.assertIs(archive.getparent()[0], archive)
+            seen.append(archive)
+        self.assertEqual(len(seen), 3)
+        self.assertTrue(all(archive.getparent() is None for archive in seen))
+
+    def test_records(self):
+        records = list(ClinVarVCVRelease(self.path).records())
+        self.assertEqual(len(records), 3)
+        record = records[0]
+        self.assertEqual(record['variation_id'], '12397')
+        self.assertEqual(record['accession'], 'VCV000012397')
+        self.assertEqual(record['genes'], ['TSC2'])
+        self.assertIn('NC_000016.10:g.2070571G>A', record['hgvs'])
+        self.assertIn('10205261', record['pmids'])
+        self.assertEqual(record['pmids'], sorted(set(record['pmids']), key=int))
+
+
+def _write_release(path, archives, release_date='2024-01-01'):
+    with gzip.open(path, 'wt', encoding='utf-8') as fh:
+        fh.write('<ClinVarVariationRelease ReleaseDate="%s">\n%s\n</ClinVarVariationRelease>\n'
+                 % (release_date, '\n'.join(archives)))
+
+
+class TestClinVarIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.release = os.path.join(self.tmpdir, 'release.xml.gz')
+        _write_release(self.release, RECORDS_BY_VARIATION_ID.values())
+        self.index = ClinVarIndex(os.path.join(self.tmpdir, 'clinvar_index.db'))
+        self.stats = self.index.update(self.release)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_normalize_hgvs(self):
+        self.assertEqual(normalize_hgvs(' NM_000548.4(TSC2):c.1832G>A (p.Arg611Gln)'), 'NM_000548.4:c.1832G>A')
+        self.assertEqual(normalize_hgvs('NC_000016.10:g.2070571G>A'), 'NC_000016.10:g.2070571G>A')
+
+    def test_lookups(self):
+        self.assertEqual(self.stats['added'], 3)
+        self.assertEqual(self.index.ids_for_variant('NM_000548.4(TSC2):c.1832G>A'), ['12397', '12398', '12399'])
+        self.assertEqual(self.index.ids_for_variant('NC_000016.10:g.2070571G>A'), ['12397', '12398', '12399'])
+        self.assertEqual(self.index.ids_for_variant('VCV000012398.1'), ['12398'])
+        self.assertEqual(self.index.ids_for_variant('NM_000548.4:c.1A>G'), [])
+        self.assertEqual(self.index.ids_by_gene('tsc2'), ['12397', '12398', '12399'])
+        self.assertEqual(self.index.ids_by_gene('TSC2', single_gene=True), ['12397', '12398', '12399'])
+        self.assertEqual(self.index.ids_by_gene('FGFR3'), [])
+
+        pmids = self.index.pmids_for_id(12397)
+        self.assertIn('10205261', pmids)
+        self.assertEqual(self.index.pmids_for_id('VCV000012397'), pmids)
+        self.assertEqual(self.index.pmids_for_hgvs('NM_000548.4:c.1832G>A'), pmids)
+        self.assertEqual(self.index.info()['release_date'], '2024-01-01')
+
+    def test_incremental_update(self):
+        changed = RECORDS_BY_VARIATION_ID['12398'].replace('DateLastUpdated="2021-07-22"',
+                                                           'DateLastUpdated="2024-02-01"')
+        changed = changed.replace('<ID Source="PubMed">10205261</ID>', '<ID Source="PubMed">39999999</ID>')
+        _write_release(self.release, [RECORDS_BY_VARIATION_ID['12397'], changed], '2024-02-01')
+
+        stats = self.index.update(self.release)
+        self.assertEqual((stats['unchanged'], stats['updated'], stats['removed']), (1, 1, 0))
+        self.assertIn('39999999', self.index.pmids_for_id(12398))
+        self.assertNotIn('10205261', self.index.pmids_for_id(12398))
+        self.assertIn('10205261', self.index.pmids_for_id(12397))
+
+        stats = self.index.update(self.release, prune=True)
+        self.assertEqual((stats['unchanged'], stats['removed']), (2, 1))
+        self.assertEqual(self.index.ids_by_gene('TSC2'), ['12397', '12398'])
+        self.assertEqual(self.index.pmids_for_id(12399), [])
+
+    def test_fetcher_local_method(self):
+        fetch = ClinVarFetcher(method='local', cachedir=self.tmpdir)
+        try:
+            self.assertEqual(fetch.ids_by_gene('TSC2'), ['12397', '12398', '12399'])
+            self.assertEqual(fetch.pmids_for_hgvs('NM_000548.4:c.1832G>A'), self.index.pmids_for_id(12397))
+        finally:
+            fetch = ClinVarFetcher(cachedir=self.tmpdir)
+        self.assertEqual(fetch.ids_by_gene, fetch._eutils_ids_by_gene)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -68,3 +68,66 @@ class TestConversions(unittest.TestCase):
         for pair in title_pairs_nonequiv:
             assert Levenshtein.ratio(pair[0], pair[1]) < TITLE_SIMILARITY_MIN_SCORE
 
+
+
+class TestBulkConversions(unittest.TestCase):
+    """Staged bulk converters; each stage is mocked so no network is used."""
+
+    def setUp(self):
+        from unittest.mock import patch, Mock
+        from metapub import convert
+        self.convert = convert
+        self.pm_fetch = Mock()
+        self.cr_fetch = Mock()
+        for target, value in (('pm_fetch', self.pm_fetch), ('cr_fetch', self.cr_fetch)):
+            patcher = patch.object(convert, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _pma(self, pmid, doi):
+        from unittest.mock import Mock
+        return Mock(pmid=pmid, doi=doi)
+
+    def test_dois2pmids_only_remainder_falls_through(self):
+        from unittest.mock import patch, Mock
+        dois = ['10.1/idconv', '10.1/query', '10.1/crossref', '10.1/nowhere']
+
+        self.pm_fetch.pmids_for_query.return_value = ['2', '9']
+        # 9 is a near-miss DOI that must be rejected by the cross-check
+        self.pm_fetch.articles_by_pmids.return_value = {'2': self._pma('2', '10.1/QUERY'),
+                                                        '9': self._pma('9', '10.1/query-not')}
+        self.cr_fetch.articles_by_dois.side_effect = lambda dois: {
+            doi: Mock(to_citation=lambda: {'jtitle': 'J'}) if doi == '10.1/crossref' else None for doi in dois}
+        self.pm_fetch.pmids_for_citations.return_value = {'10.1/crossref': ['3']}
+
+        with patch.object(self.convert, 'get_pmids_for_otherids',
+                          side_effect=lambda ids: {doi: '1' if doi == '10.1/idconv' else None for doi in ids}):
+            results = self.convert.dois2pmids(dois)
+
+        self.assertEqual(dict(results), {'10.1/idconv': '1', '10.1/query': '2',
+                                         '10.1/crossref': '3', '10.1/nowhere': None})
+        self.assertEqual([(s.name, s.attempted, s.found) for s in results.stages],
+                         [('pmc_idconv', 4, 1), ('pubmed_query', 3, 1), ('crossref', 2, 1)])
+        query = self.pm_fetch.pmids_for_query.call_args[0][0]
+        self.assertNotIn('idconv', query)
+        self.assertIn('"10.1/nowhere"[AID]', query)
+        self.pm_fetch.pmids_for_citations.assert_called_once_with({'10.1/crossref': {'jtitle': 'J'}})
+        self.assertIn('TOTAL', results.report())
+
+    def test_pmids2dois(self):
+        from unittest.mock import patch
+        self.pm_fetch.articles_by_pmids.return_value = {'1': self._pma('1', '10.1/a'),
+                                                        '2': self._pma('2', None),
+                                                        '3': self._pma('3', None)}
+
+        with patch.object(self.convert, 'get_dois_for_otherids',
+                          side_effect=lambda ids: {pmid: '10.1/b' if pmid == '2' else None for pmid in ids}), \
+                patch.object(self.convert, 'PubMedArticle2doi', return_value='10.1/c') as mock_cr:
+            results = self.convert.pmids2dois([1, '2', '3', '404'])
+            without_crossref = self.convert.pmids2dois(['3'], crossref=False)
+
+        self.assertEqual(dict(results), {'1': '10.1/a', '2': '10.1/b', '3': '10.1/c', '404': None})
+        # the invalid PMID never reaches CrossRef
+        self.assertEqual(mock_cr.call_count, 1)
+        self.assertEqual([s.found for s in results.stages], [1, 1, 1])
+        self.assertEqual([s.name for s in without_crossref.stages], ['pubmed_efetch', 'pmc_idconv'])
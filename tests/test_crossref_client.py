@@ -0,0 +1,272 @@
+"""Tests for the shared CrossRef client (mocked HTTP)."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from metapub import crossref_client
+from metapub.config import DEFAULT_CACHE_DIR, DEFAULT_EMAIL
+from metapub.crossref_client import CrossRefClient, CrossRefRateLimiter, get_crossref_client
+
+DEFAULT_CLIENT_KEY = (DEFAULT_CACHE_DIR, DEFAULT_EMAIL)
+
+
+def make_response(data=None, status_code=200, headers=None):
+    response = Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = data if data is not None else {'message': {}}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(
+            '%d Client Error' % status_code, response=response)
+    return response
+
+
+class TestCrossRefRateLimiter(unittest.TestCase):
+
+    def test_follows_rate_limit_headers(self):
+        limiter = CrossRefRateLimiter(10)
+        limiter.update_from_headers({'X-Rate-Limit-Limit': '50', 'X-Rate-Limit-Interval': '1s'})
+        self.assertAlmostEqual(limiter.min_interval, 0.02)
+        limiter.update_from_headers({'X-Rate-Limit-Limit': '5', 'X-Rate-Limit-Interval': '2000ms'})
+        self.assertAlmostEqual(limiter.min_interval, 0.4)
+
+        # missing or malformed headers leave the rate alone
+        limiter.update_from_headers({})
+        limiter.update_from_headers({'X-Rate-Limit-Limit': 'lots', 'X-Rate-Limit-Interval': '1s'})
+        self.assertAlmostEqual(limiter.min_interval, 0.4)
+
+        limiter.back_off()
+        self.assertAlmostEqual(limiter.min_interval, 0.8)
+
+
+class TestCrossRefClient(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.client = CrossRefClient(mailto='test@example.com',
+                                     cache_path=os.path.join(self.tmpdir, 'crossref-cache.db'))
+        self.client.rate_limiter = CrossRefRateLimiter(1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_works_query_params_and_polite_pool(self):
+        with patch.object(self.client.session, 'get', return_value=make_response()) as mock_get:
+            self.client.works(query_bibliographic='A Title', query_container_title='Nature',
+                              filter={'from_pub_date': '2020'}, limit=5)
+
+        url = mock_get.call_args[0][0]
+        params = mock_get.call_args[1]['params']
+        self.assertEqual(url, 'https://api.crossref.org/works')
+        self.assertEqual(params, {'query.bibliographic': 'A Title', 'query.container-title': 'Nature',
+                                  'filter': 'from-pub-date:2020', 'rows': 5,
+                                  'mailto': 'test@example.com'})
+        self.assertIn('mailto:test@example.com', self.client.session.headers['User-Agent'])
+
+    def test_cache_keyed_on_normalized_query(self):
+        data = {'message': {'total-results': 1, 'items': [{'DOI': '10.1/x'}]}}
+        with patch.object(self.client.session, 'get', return_value=make_response(data)) as mock_get:
+            first = self.client.works(query_bibliographic='Some  Title ', limit=5)
+            second = self.client.works(query_bibliographic='some title', limit=5)
+            self.client.work('10.1/ABC')
+            self.client.work('10.1/abc')
+
+        self.assertEqual(first, data)
+        self.assertEqual(second, data)
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        with patch.object(self.client.session, 'get', return_value=make_response(status_code=404)) as mock_get:
+            for _ in range(2):
+                with self.assertRaises(requests.HTTPError):
+                    self.client.work('10.1/missing')
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('metapub.crossref_client.time.sleep')
+    def test_retries_after_429(self, mock_sleep):
+        responses = [make_response(status_code=429, headers={'Retry-After': '3'}), make_response()]
+        with patch.object(self.client.session, 'get', side_effect=responses) as mock_get:
+            self.client.work('10.1/busy')
+        self.assertEqual(mock_get.call_count, 2)
+        mock_sleep.assert_any_call(3.0)
+
+    def test_shared_by_fetcher_and_dances(self):
+        from metapub.crossref import CrossRefFetcher
+        from metapub.findit.dances.generic import get_crossref_pdf_links
+
+        work = {'DOI': '10.1/pdf', 'title': ['T'],
+                'link': [{'URL': 'https://example.org/a.pdf', 'content-type': 'application/pdf'},
+                         {'URL': 'https://example.org/a.xml', 'content-type': 'text/xml'}]}
+        with patch.dict(crossref_client.CROSSREF_CLIENTS, {DEFAULT_CLIENT_KEY: self.client}), \
+                patch.object(self.client.session, 'get', return_value=make_response({'message': work})) as mock_get:
+            self.assertEqual(CrossRefFetcher().article_by_doi('10.1/pdf').doi, '10.1/pdf')
+            self.assertEqual(get_crossref_pdf_links('10.1/PDF'), ['https://example.org/a.pdf'])
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_clients_keyed_on_cachedir_and_mailto(self):
+        with patch.dict(crossref_client.CROSSREF_CLIENTS, clear=True):
+            cached = get_crossref_client(cachedir=self.tmpdir, mailto='a@example.com')
+            uncached = get_crossref_client(cachedir=None, mailto='a@example.com')
+            other = get_crossref_client(cachedir=self.tmpdir, mailto='b@example.com')
+            self.assertIs(get_crossref_client(cachedir=self.tmpdir, mailto='a@example.com'), cached)
+        self.assertIsNotNone(cached.cache)
+        self.assertIsNone(uncached.cache)
+        self.assertEqual(other.mailto, 'b@example.com')
+        # one rate limit for the whole process
+        self.assertIs(cached.rate_limiter, uncached.rate_limiter)
+        self.assertIs(cached.rate_limiter, other.rate_limiter)
+
+
+class TestCrossRefFetcherBulk(unittest.TestCase):
+
+    def setUp(self):
+        from metapub.crossref import CrossRefFetcher
+        self.client = CrossRefClient(cache_path=None)
+        self.client.rate_limiter = CrossRefRateLimiter(1000)
+        patcher = patch.dict(crossref_client.CROSSREF_CLIENTS, {DEFAULT_CLIENT_KEY: self.client})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetch = CrossRefFetcher()
+        self.fetch.cr = self.client
+
+    def test_articles_by_dois_batches_filter_queries(self):
+        def fake_get(url, params=None, timeout=None):
+            dois = [part.split(':', 1)[1] for part in params['filter'].split(',')]
+            # CrossRef returns DOIs in its own case; one DOI is unknown
+            items = [{'DOI': doi.upper()} for doi in dois if doi != '10.1/unknown']
+            return make_response({'message': {'items': items}})
+
+        dois = ['10.1/a', '10.1/B', '10.1/unknown', '10.1/c', '10.1/b']
+        with patch.object(self.client.session, 'get', side_effect=fake_get) as mock_get:
+            works = self.fetch.articles_by_dois(dois, batch_size=2)
+
+        # four unique DOIs, two per request
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0][1]['params']['filter'], 'doi:10.1/a,doi:10.1/b')
+        self.assertEqual(works['10.1/B'].doi, '10.1/B')
+        self.assertEqual(works['10.1/b'].doi, '10.1/B')
+        self.assertIsNone(works['10.1/unknown'])
+        self.assertEqual(set(works), set(dois))
+
+    def test_articles_by_dois_survives_failed_batch(self):
+        def fake_get(url, params=None, timeout=None):
+            if url.endswith('/works'):
+                if 'doi:10.1/c' in params['filter']:
+                    raise requests.exceptions.ConnectionError('connection reset')
+                return make_response({'message': {'items': [{'DOI': '10.1/a'}, {'DOI': '10.1/b'}]}})
+            return make_response({'message': {'DOI': '10.1/x,y'}})
+
+        dois = ['10.1/a', '10.1/b', '10.1/c', '10.1/x,y']
+        with patch.object(self.client.session, 'get', side_effect=fake_get) as mock_get:
+            works = self.fetch.articles_by_dois(dois, batch_size=2)
+
+        self.assertEqual(works['10.1/a'].doi, '10.1/a')
+        self.assertIsNone(works['10.1/c'])
+        # the comma DOI is fetched on its own rather than breaking the filter
+        self.assertEqual(works['10.1/x,y'].doi, '10.1/x,y')
+        filters = [call[1]['params'].get('filter', '') for call in mock_get.call_args_list]
+        self.assertNotIn('10.1/x,y', ' '.join(filters))
+
+    def test_iter_works_follows_cursor(self):
+        pages = {'*': ['1', '2'], 'c1': ['3', '4'], 'c2': ['5']}
+        next_cursor = {'*': 'c1', 'c1': 'c2', 'c2': 'c3'}
+
+        def fake_get(url, params=None, timeout=None):
+            cursor = params['cursor']
+            return make_response({'message': {'items': [{'DOI': '10.1/' + n} for n in pages[cursor]],
+                                              'next-cursor': next_cursor[cursor]}})
+
+        with patch.object(self.client.session, 'get', side_effect=fake_get) as mock_get:
+            works = self.fetch.iter_works(filter={'issn': '1234-5678'}, rows=2)
+            self.assertEqual(mock_get.call_count, 0)   # lazy
+            self.assertEqual([w.doi for w in works], ['10.1/%d' % n for n in range(1, 6)])
+            self.assertEqual(mock_get.call_count, 3)
+            self.assertEqual(mock_get.call_args[1]['params']['filter'], 'issn:1234-5678')
+
+            mock_get.reset_mock()
+            self.assertEqual(len(list(self.fetch.iter_works(query='x', rows=2, max_results=3))), 3)
+            self.assertEqual(mock_get.call_count, 2)
+
+
+class TestCandidateRanking(unittest.TestCase):
+
+    def _pma(self, title, journal='Nat Genet', year='2009', author='Smith JA', pmid='1'):
+        return Mock(title=title, journal=journal, year=year, author1_last_fm=author, pmid=pmid)
+
+    def _item(self, doi, title, family='Smith', year=2009, container='Nature Genetics', short='Nat Genet'):
+        return {'DOI': doi, 'title': [title], 'issued': {'date-parts': [[year]]},
+                'author': [{'family': family, 'given': 'J', 'sequence': 'first'}],
+                'container-title': [container], 'short-container-title': [short]}
+
+    def test_combined_signals_break_title_ties(self):
+        from metapub.crossref import rank_crossref_candidates
+        pmas = [self._pma('Gene <i>X</i> and disease.'), self._pma('Something else entirely', pmid='2')]
+        candidates = [
+            [self._item('10.1/wrong', 'Gene X and disease', family='Jones', year=2001, container='Other', short=''),
+             self._item('10.1/right', 'Gene X and Disease')],
+            [],
+        ]
+        ranked = rank_crossref_candidates(pmas, candidates)
+
+        self.assertEqual(ranked[1], [])
+        best, other = ranked[0]
+        self.assertEqual(best.work['DOI'], '10.1/right')
+        self.assertEqual(best.title, 1.0)
+        self.assertEqual(other.title, 1.0)
+        self.assertAlmostEqual(best.confidence, 1.0)
+        self.assertEqual(other.year, 0.0)
+        self.assertLess(other.confidence, 0.7)
+
+    def test_missing_signals_are_reweighted(self):
+        from metapub.crossref import rank_crossref_candidates, CrossRefWork
+        pma = self._pma('A title', journal=None, year=None, author=None)
+        work = CrossRefWork(**self._item('10.1/x', 'A title'))
+        (score,), = rank_crossref_candidates([pma], [[work]])
+        self.assertIsNone(score.author)
+        self.assertIsNone(score.year)
+        self.assertIsNone(score.container)
+        self.assertAlmostEqual(score.confidence, 1.0)
+
+    def test_articles_by_pmas(self):
+        from metapub.crossref import CrossRefFetcher
+        client = CrossRefClient(cache_path=None)
+        client.rate_limiter = CrossRefRateLimiter(1000)
+        fetch = CrossRefFetcher()
+        results = {'Gene X and disease': [self._item('10.1/right', 'Gene X and disease')],
+                   'Unrelated': [self._item('10.1/nope', 'Completely different words here', family='Doe',
+                                            year=1990, container='Other', short='')]}
+
+        def fake_get(url, params=None, timeout=None):
+            return make_response({'message': {'items': results[params['query.bibliographic']]}})
+
+        with patch.object(fetch, 'cr', client), \
+                patch.object(client.session, 'get', side_effect=fake_get):
+            works = fetch.articles_by_pmas([self._pma('Gene X and disease'), self._pma('Unrelated')])
+
+        self.assertEqual(works[0].doi, '10.1/right')
+        self.assertIsNone(works[1])
+
+    def test_articles_by_pmas_survives_failed_query(self):
+        from metapub.crossref import CrossRefFetcher
+        client = CrossRefClient(cache_path=None)
+        client.rate_limiter = CrossRefRateLimiter(1000)
+        fetch = CrossRefFetcher()
+
+        def fake_get(url, params=None, timeout=None):
+            if params['query.bibliographic'] == 'Unlucky':
+                raise requests.exceptions.ConnectionError('connection reset')
+            return make_response({'message': {'items': [self._item('10.1/right', 'Gene X and disease')]}})
+
+        with patch.object(fetch, 'cr', client), \
+                patch.object(client.session, 'get', side_effect=fake_get):
+            works = fetch.articles_by_pmas([self._pma('Unlucky'), self._pma('Gene X and disease')])
+
+        self.assertIsNone(works[0])
+        self.assertEqual(works[1].doi, '10.1/right')
+
+
+if __name__ == '__main__':
+    unittest.main()
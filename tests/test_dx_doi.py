@@ -0,0 +1,107 @@
+"""Tests for DxDOI bulk resolution (mocked HTTP)."""
+
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from metapub import dx_doi
+from metapub.dx_doi import DxDOI
+
+
+def _response(status_code, location=None, json_data=None):
+    response = Mock(status_code=status_code)
+    response.is_redirect = location is not None
+    response.headers = {'Location': location} if location else {}
+    response.json.return_value = json_data
+    return response
+
+
+REDIRECTS = {
+    'https://doi.org/10.1000/one': _response(302, 'https://publisher.example.com/article/one'),
+    'https://publisher.example.com/article/one': _response(301, '/full/one'),
+    'https://publisher.example.com/full/one': _response(200),
+    'https://doi.org/10.1000/paywalled': _response(302, 'https://paywall.example.org/p'),
+    'https://paywall.example.org/p': _response(403),
+    'https://doi.org/10.1000/missing': _response(404),
+}
+
+
+class TestResolveMany(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        dx_doi.DX_DOI_CACHE = None
+        self.dx = DxDOI(cachedir=self.cachedir)
+        self.session = Mock()
+        self.dx._session = self.session
+
+    def tearDown(self):
+        self.dx._session = None
+        dx_doi.DX_DOI_CACHE = None
+        shutil.rmtree(self.cachedir)
+
+    def test_head_follows_redirects_and_caches_once(self):
+        self.session.head.side_effect = lambda url, **kwargs: REDIRECTS[url]
+        dois = ['10.1000/one', '10.1000/paywalled', '10.1000/missing', 'not a doi', '10.1000/one']
+
+        with patch.object(self.dx._cache, 'update', wraps=self.dx._cache.update) as update:
+            result = self.dx.resolve_many(dois, workers=3)
+
+        self.assertEqual(result, {'10.1000/one': 'https://publisher.example.com/full/one',
+                                  '10.1000/paywalled': 'https://paywall.example.org/p',
+                                  '10.1000/missing': None,
+                                  'not a doi': None})
+        self.session.get.assert_not_called()
+        for call in self.session.head.call_args_list:
+            self.assertFalse(call[1]['allow_redirects'])
+        update.assert_called_once()
+
+        # second pass is served from the cache; the failure is retried
+        self.session.head.reset_mock()
+        result = self.dx.resolve_many(['10.1000/one', '10.1000/missing'])
+        self.assertEqual(result['10.1000/one'], 'https://publisher.example.com/full/one')
+        self.assertEqual([call[0][0] for call in self.session.head.call_args_list],
+                         ['https://doi.org/10.1000/missing'])
+        self.assertEqual(self.dx.resolve('10.1000/paywalled'), 'https://paywall.example.org/p')
+
+    def test_head_refused_falls_back_to_streamed_get(self):
+        self.session.head.return_value = _response(405)
+        self.session.get.return_value = _response(200)
+        result = self.dx.resolve_many(['10.1000/nohead'])
+        self.assertEqual(result, {'10.1000/nohead': 'https://doi.org/10.1000/nohead'})
+        self.assertTrue(self.session.get.call_args[1]['stream'])
+
+    def test_handle_api(self):
+        def fake_get(url, **kwargs):
+            if url.endswith('/missing'):
+                return _response(404)
+            return _response(200, json_data={'responseCode': 1, 'values': [
+                {'index': 100, 'type': 'HS_ADMIN', 'data': {}},
+                {'index': 1, 'type': 'URL', 'data': {'format': 'string', 'value': 'https://pub.example/x'}}]})
+        self.session.get.side_effect = fake_get
+
+        result = self.dx.resolve_many(['10.1000/x', '10.1000/missing'], method='handle')
+        self.assertEqual(result, {'10.1000/x': 'https://pub.example/x', '10.1000/missing': None})
+        self.session.head.assert_not_called()
+        self.assertEqual(self.session.get.call_args[0][0], 'https://doi.org/api/handles/10.1000/missing')
+
+        with self.assertRaises(ValueError):
+            self.dx.resolve_many(['10.1000/x'], method='get')
+
+        # handle API URLs are cached apart and don't answer resolve()
+        self.assertEqual(self.dx.resolve_many(['10.1000/x'], method='handle'), {'10.1000/x': 'https://pub.example/x'})
+        self.session.get.side_effect = None
+        self.session.get.return_value = Mock(status_code=200, url='https://pub.example/landing/x')
+        self.assertEqual(self.dx.resolve('10.1000/x'), 'https://pub.example/landing/x')
+
+    def test_resolve_writes_cache_once(self):
+        response = Mock(status_code=200, url='https://pub.example/y')
+        self.session.get.return_value = response
+        with patch.object(dx_doi.SQLiteCache, '__setitem__') as setitem:
+            self.assertEqual(self.dx.resolve('10.1000/y', skip_cache=True), 'https://pub.example/y')
+        setitem.assert_called_once_with('10.1000/y', 'https://pub.example/y')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -84,6 +84,102 @@ class TestFindIt(unittest.TestCase):
         assert "Cell" in journals
         assert "Nature" in journals
 
+    def test_registry_publisher_by_url_pattern(self):
+        "Test that the compiled URL pattern index matches publishers by URL."
+        from metapub.findit.registry import JournalRegistry
+        registry = JournalRegistry()
+
+        result = registry.get_publisher_by_url_pattern('https://onlinelibrary.wiley.com/doi/epdf/10.1002/ajmg.a.38215')
+        assert result['name'] == 'Wiley'
+        assert result['match_type'] == 'format_template'
+
+        # http templates also accept https URLs, and hostnames are case-insensitive
+        result = registry.get_publisher_by_url_pattern('https://WWW.JCI.ORG/articles/view/12345/files/pdf')
+        assert result['name'] == 'jci'
+
+        # templates with a placeholder hostname are tried for any host
+        result = registry.get_publisher_by_url_pattern('http://jcb.rupress.org/content/196/1/123.full.pdf')
+        assert result is not None
+        assert result['format_template'] == 'http://{host}/content/{volume}/{issue}/{first_page}.full.pdf'
+
+        assert registry.get_publisher_by_url_pattern('https://example.org/not/a/publisher') is None
+        assert registry.get_publisher_by_url_pattern('') is None
+        registry.close()
+
+    def test_registry_url_pattern_index_matches_linear_scan(self):
+        "Test that indexed URL lookups agree with matching every template in order."
+        import json
+        from metapub.findit.registry import JournalRegistry
+        registry = JournalRegistry()
+
+        rows = registry._get_connection().execute('''
+            SELECT name, format_template, config_data FROM publishers
+            WHERE is_active = 1 AND (format_template IS NOT NULL OR config_data IS NOT NULL)
+        ''').fetchall()
+
+        def linear_scan(url):
+            for name, format_template, config_data in rows:
+                templates = [format_template] if format_template else []
+                if config_data:
+                    for template in json.loads(config_data).get('url_patterns', {}).values():
+                        if template and not isinstance(template, str):
+                            break   # the original scan raised TypeError here and gave up on the publisher
+                        if template:
+                            templates.append(template)
+                for template in templates:
+                    if registry._url_matches_template(url, template):
+                        return name
+            return None
+
+        urls = ['https://www.nejm.org/doi/pdf/10.1056/NEJMoa1234567',
+                'http://www.sciencedirect.com/science/article/pii/S0092867415001234',
+                'https://doi.org/10.1039/c5cc01234a',
+                'http://circ.ahajournals.org/content/120/1/45.full.pdf',
+                'http://www.bloodjournal.org/content/bloodjournal/125/3/400.full.pdf',
+                'https://link.springer.com/content/pdf/10.1007/s00125-015-3567-8.pdf',
+                'https://pubs.acs.org/doi/pdf/10.1021/acs.jmedchem.5b00123',
+                'https://www.karger.com/Article/Pdf/123456',
+                ]
+        for url in urls:
+            with self.subTest(url=url):
+                result = registry.get_publisher_by_url_pattern(url)
+                self.assertEqual(result['name'] if result else None, linear_scan(url))
+        registry.close()
+
+    def test_registry_url_pattern_malformed_url(self):
+        "Test that a URL urlparse can't parse gets no match instead of raising."
+        from metapub.findit.registry import JournalRegistry
+        registry = JournalRegistry()
+        assert registry.get_publisher_by_url_pattern('http://[bad/x') is None
+        # wildcard-host templates still apply, as in the original regex-only scan
+        result = registry.get_publisher_by_url_pattern('http://[bad/content/1/2/3.full.pdf')
+        assert result['format_template'] == 'http://{host}/content/{volume}/{issue}/{first_page}.full.pdf'
+        registry.close()
+
+    def test_registry_url_pattern_non_string_template_ends_publisher(self):
+        "Test that a template list stops the publisher's later url_patterns, as the linear scan did."
+        import json
+        import shutil
+        import tempfile
+        from metapub.findit.registry import JournalRegistry
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        registry = JournalRegistry(os.path.join(tmpdir, 'registry.db'))
+        registry.add_publisher('example', 'the_doi_2step', config_data=json.dumps({'url_patterns': {
+            'primary': 'https://example.org/pdf/{doi}',
+            'secondary': [{'template': 'https://example.org/alt/{doi}'}],
+            'tertiary': 'https://example.org/late/{doi}'}}))
+
+        assert registry.get_publisher_by_url_pattern('https://example.org/pdf/10.1/x')['match_type'] == 'primary'
+        assert registry.get_publisher_by_url_pattern('https://example.org/late/10.1/x') is None
+        # lookups for many distinct hosts don't accumulate per-host state
+        state = dict(vars(registry))
+        for n in range(100):
+            registry.get_publisher_by_url_pattern('https://host%d.example.net/pdf/x' % n)
+        assert vars(registry) == state
+        assert 'host1.example.net' not in registry._url_pattern_index[0]
+        registry.close()
+
     def test_embargoed_pmid(self):
         "Test that FindIt redirects currently embargoed PMC article to publisher."
         pass
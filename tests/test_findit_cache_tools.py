@@ -0,0 +1,109 @@
+"""Tests for FindIt cache preload / export / import tools."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from metapub.cache_utils import SQLiteCache
+from metapub.exceptions import MetaPubError
+from metapub.findit import cache_tools
+
+
+class TestFindItCacheTools(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmpdir, 'findit.db')
+        self.cache = SQLiteCache(self.cache_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _store(self, pmid, url, reason, verify, timestamp, cache=None):
+        (cache or self.cache)[int(pmid)] = {'url': url, 'reason': reason,
+                                            'verify': verify, 'timestamp': timestamp}
+
+    def test_export_import_roundtrip(self):
+        self._store('1', 'http://a.org/1.pdf', None, True, 100.0)
+        self._store('2', None, 'NOFORMAT: nope', False, 200.0)
+
+        for name in ('out.jsonl', 'out.jsonl.gz'):
+            out = os.path.join(self.tmpdir, name)
+            self.assertEqual(cache_tools.export_cache(self.cache_path, out), 2)
+
+            other_path = os.path.join(self.tmpdir, 'other_%s.db' % name)
+            stats = cache_tools.import_cache(other_path, out)
+            self.assertEqual(stats, {'read': 2, 'written': 2, 'kept': 0})
+
+            # FindIt reads the imported entries through its usual cache class.
+            other = SQLiteCache(other_path)
+            self.assertEqual(other[1]['url'], 'http://a.org/1.pdf')
+            self.assertTrue(other[1]['verify'])
+            self.assertEqual(other[2]['reason'], 'NOFORMAT: nope')
+
+        with open(os.path.join(self.tmpdir, 'out.jsonl')) as fh:
+            first = json.loads(fh.readline())
+        self.assertEqual(set(first), set(cache_tools.ENTRY_FIELDS))
+
+    def test_merge_prefers_verified_then_newest(self):
+        self._store('1', 'http://old-verified/1.pdf', None, True, 100.0)
+        self._store('2', 'http://old/2.pdf', None, False, 100.0)
+        self._store('3', 'http://new/3.pdf', None, False, 500.0)
+
+        incoming = [
+            # newer but unverified: loses to verified entry
+            {'pmid': 1, 'url': 'http://new-unverified/1.pdf', 'reason': None, 'verify': False, 'timestamp': 900.0},
+            # newer: wins
+            {'pmid': 2, 'url': 'http://new/2.pdf', 'reason': None, 'verify': False, 'timestamp': 200.0},
+            # older: loses
+            {'pmid': 3, 'url': 'http://old/3.pdf', 'reason': None, 'verify': False, 'timestamp': 100.0},
+            # new pmid, duplicated in the input: verified copy wins
+            {'pmid': 4, 'url': 'http://verified/4.pdf', 'reason': None, 'verify': True, 'timestamp': 10.0},
+            {'pmid': 4, 'url': 'http://unverified/4.pdf', 'reason': None, 'verify': False, 'timestamp': 20.0},
+        ]
+        stats = cache_tools.merge_entries(self.cache_path, incoming)
+
+        self.assertEqual(stats['read'], 5)
+        self.assertEqual(stats['written'], 2)
+        self.assertEqual(stats['kept'], 2)
+        self.assertEqual(self.cache[1]['url'], 'http://old-verified/1.pdf')
+        self.assertEqual(self.cache[2]['url'], 'http://new/2.pdf')
+        self.assertEqual(self.cache[3]['url'], 'http://new/3.pdf')
+        self.assertEqual(self.cache[4]['url'], 'http://verified/4.pdf')
+
+    def test_parquet_without_pyarrow(self):
+        with patch.dict('sys.modules', {'pyarrow': None, 'pyarrow.parquet': None}):
+            with self.assertRaises(MetaPubError):
+                cache_tools.export_cache(self.cache_path, os.path.join(self.tmpdir, 'out.parquet'))
+
+    def test_read_pmid_list(self):
+        path = os.path.join(self.tmpdir, 'pmids.txt')
+        with open(path, 'w') as fh:
+            fh.write('123\n\n456\nnot-a-pmid\n123\n 789 \n')
+        self.assertEqual(cache_tools.read_pmid_list(path), ['123', '456', '789'])
+
+    def test_preload_pmids(self):
+        def fake_findit(pmid, cachedir, verify, retry_errors):
+            if pmid == '3':
+                raise ValueError('boom')
+            return Mock(url='http://x/%s.pdf' % pmid if pmid == '1' else None,
+                        reason=None if pmid == '1' else 'NOFORMAT: none')
+
+        seen = []
+        with patch('metapub.findit.cache_tools.FindIt', side_effect=fake_findit) as mock_findit:
+            stats = cache_tools.preload_pmids(['1', '2', '3'], cachedir=self.tmpdir, workers=2,
+                                              callback=lambda *result: seen.append(result))
+
+        self.assertEqual(mock_findit.call_count, 3)
+        self.assertEqual(stats, {'total': 3, 'url': 1, 'noformat': 1, 'error': 1, 'other': 0})
+        self.assertEqual([pmid for pmid, url, reason in seen], ['1', '2', '3'])
+
+        with self.assertRaises(MetaPubError):
+            cache_tools.preload_pmids(['1'], cachedir=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -205,6 +205,106 @@ class TestRegistryBackedLookupSystem(unittest.TestCase):
             self.assertEqual(reason, "NOFORMAT: No handler found for journal 'Unknown Journal'. Report with sample PMID at https://github.com/metapub/metapub/issues")
 
 
+class TestCandidateRacing(unittest.TestCase):
+    """Test concurrent verification of a dance's candidate URLs."""
+
+    def setUp(self):
+        self.handler = PublisherHandler({'name': 'sciencedirect',
+                                         'dance_function': 'the_sciencedirect_disco'})
+
+    @staticmethod
+    def _fake_verify(results, delays=None):
+        import time
+        from metapub.exceptions import NoPDFLink
+
+        def verify(pdfurl, *args, **kwargs):
+            time.sleep((delays or {}).get(pdfurl, 0))
+            if results[pdfurl]:
+                return pdfurl
+            raise NoPDFLink('MISSING: %s not found.' % pdfurl)
+        return verify
+
+    def test_race_prefers_priority_order(self):
+        """Test that a slower higher-priority candidate beats a faster lower-priority one."""
+        from metapub.findit.dances import race_pdf_urls
+        verify = self._fake_verify({'http://a': True, 'http://b': True},
+                                   delays={'http://a': 0.2})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            self.assertEqual(race_pdf_urls(['http://a', 'http://b']), 'http://a')
+
+    def test_race_falls_through_failures(self):
+        """Test that failed candidates give way to the next valid one."""
+        from metapub.findit.dances import race_pdf_urls
+        verify = self._fake_verify({'http://a': False, 'http://b': False, 'http://c': True})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            self.assertEqual(race_pdf_urls(['http://a', 'http://b', 'http://c']), 'http://c')
+
+    def test_race_stops_consuming_candidates_after_winner(self):
+        """Test that later candidates are not generated once the winner is known."""
+        from metapub.findit.dances import race_pdf_urls
+        generated = []
+
+        def candidates():
+            for url in ['http://a', 'http://b', 'http://c']:
+                generated.append(url)
+                yield url
+
+        verify = self._fake_verify({'http://a': True, 'http://b': True, 'http://c': True})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            with patch('metapub.findit.dances.generic.ThreadPoolExecutor') as mock_executor:
+                from concurrent.futures import Future
+
+                def submit(fn, *args):
+                    future = Future()
+                    future.set_result(fn(*args))
+                    return future
+                mock_executor.return_value.submit.side_effect = submit
+                self.assertEqual(race_pdf_urls(candidates()), 'http://a')
+        self.assertEqual(generated, ['http://a'])
+
+    def test_race_raises_highest_priority_error(self):
+        """Test that the first candidate's error is raised when nothing verifies."""
+        from metapub.findit.dances import race_pdf_urls
+        from metapub.exceptions import NoPDFLink
+        verify = self._fake_verify({'http://a': False, 'http://b': False})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            with self.assertRaises(NoPDFLink) as context:
+                race_pdf_urls(['http://a', 'http://b'])
+        self.assertIn('http://a', str(context.exception))
+
+        with self.assertRaises(NoPDFLink):
+            race_pdf_urls([])
+
+    def test_handler_race_pdf_url(self):
+        """Test that the handler races candidates for dances that provide them."""
+        mock_pma = Mock()
+        mock_pma.pii = 'S0167-9236(22)00118-X'
+        primary = 'https://www.sciencedirect.com/science/article/pii/S016792362200118X/pdfft?isDTMRedir=true&download=true'
+        alternate = 'https://www.sciencedirect.com/science/article/pii/S016792362200118X/pdfft'
+
+        verify = self._fake_verify({primary: False, alternate: True})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            url, reason = self.handler.race_pdf_url(mock_pma)
+        self.assertEqual(url, alternate)
+        self.assertIsNone(reason)
+
+        verify = self._fake_verify({primary: False, alternate: False})
+        with patch('metapub.findit.dances.generic.verify_pdf_url', side_effect=verify):
+            url, reason = self.handler.race_pdf_url(mock_pma)
+        self.assertIsNone(url)
+        self.assertTrue(reason.startswith('TXERROR'))
+
+    @patch('metapub.findit.handlers.PublisherHandler._dispatch_dance_function')
+    def test_handler_race_without_candidates_runs_dance(self, mock_dispatch):
+        """Test that dances without candidate generators run normally with verify=True."""
+        mock_dispatch.return_value = ("http://test.url", None)
+        handler = PublisherHandler({'name': 'Test Publisher', 'dance_function': 'the_doi_slide'})
+        mock_pma = Mock()
+
+        self.assertEqual(handler.race_pdf_url(mock_pma), ("http://test.url", None))
+        mock_dispatch.assert_called_once_with(mock_pma, True, 10, 3)
+
+
 @skip_network_tests
 class TestRegistryIntegration(unittest.TestCase):
     """Integration tests with the actual registry."""
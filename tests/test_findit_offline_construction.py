@@ -237,6 +237,77 @@ class TestOfflineURLConstruction(unittest.TestCase):
                 self.fail(f"Cache integration with verify=False should work: {e}")
 
 
+class TestOfflineURLBuilder(unittest.TestCase):
+    """Test bulk URL construction from article metadata with zero network access."""
+
+    @classmethod
+    def setUpClass(cls):
+        from metapub.findit.offline import OfflineURLBuilder
+        cls.builder = OfflineURLBuilder()
+
+    def test_doi_vip_and_bmc_records(self):
+        """Test that DOI-, VIP- and BMC-based journals build the same URLs as their dances."""
+        records = [
+            {'pmid': '1', 'journal': 'BMC Genomics', 'doi': '10.1186/s12864-023-09123-4'},
+            {'pmid': '2', 'journal': 'J Biol Chem', 'volume': '290', 'issue': '3', 'pages': '1234-40'},
+            {'pmid': '3', 'journal': 'Nature', 'doi': '10.1038/nature12373'},
+        ]
+        with patch('metapub.findit.dances.generic.requests') as mock_requests:
+            results = list(self.builder.build_many(records))
+            mock_requests.Session.assert_not_called()
+
+        self.assertEqual(results[0].url, 'http://www.biomedcentral.com/content/pdf/s12864-023-09123-4.pdf')
+        self.assertEqual(results[0].dance, 'the_bmc_boogie')
+        self.assertEqual(results[1].dance, 'the_vip_shake')
+        self.assertTrue(results[1].url.endswith('/content/290/3/1234.full.pdf'))
+        self.assertEqual(results[2].url, 'https://www.nature.com/articles/nature12373.pdf')
+        for result in results:
+            self.assertIsNone(result.reason)
+            self.assertFalse(result.network_required)
+
+    def test_matches_dance_output_with_verify_false(self):
+        """Test that offline construction agrees with the_vip_shake(verify=False)."""
+        from metapub.findit.dances import the_vip_shake
+        pma = Mock(journal='J Biol Chem', volume='290', issue='3', first_page='1234',
+                   doi=None, pii=None, pmc=None, pages=None, pmid='2')
+        self.assertEqual(self.builder.build(pma).url, the_vip_shake(pma, verify=False))
+
+    def test_pmc_comes_first(self):
+        """Test that PMC articles get the EuropePMC link first, like find_article_from_pma."""
+        result = self.builder.build({'pmid': '4', 'journal': 'BMC Genomics', 'pmc': 'PMC12345',
+                                     'doi': '10.1186/s12864-023-09123-4'})
+        self.assertEqual(result.dance, 'the_pmc_twist')
+        self.assertEqual(len(result.urls), 2)
+        self.assertIn('accid=PMC12345', result.url)
+
+    def test_network_dances_are_flagged(self):
+        """Test that journals whose dance needs network access are flagged, not guessed."""
+        result = self.builder.build({'pmid': '5', 'journal': 'Cell', 'pii': 'S0092-8674(15)00123-4'})
+        self.assertIsNone(result.url)
+        self.assertTrue(result.network_required)
+        self.assertTrue(result.reason.startswith('NETWORK'))
+
+    def test_missing_data_reasons(self):
+        """Test that unknown journals and missing metadata produce reasons instead of errors."""
+        result = self.builder.build({'pmid': '6', 'journal': 'Not A Real Journal Of Anything'})
+        self.assertTrue(result.reason.startswith('NOFORMAT'))
+        self.assertFalse(result.network_required)
+
+        result = self.builder.build({'pmid': '7', 'journal': 'J Biol Chem', 'volume': '290'})
+        self.assertTrue(result.reason.startswith('MISSING'))
+
+        result = self.builder.build({'pmid': '8'})
+        self.assertTrue(result.reason.startswith('MISSING'))
+
+    def test_accepts_objects_and_namedtuples(self):
+        """Test that records may be attribute-style rows (e.g. DataFrame.itertuples)."""
+        from collections import namedtuple
+        Row = namedtuple('Row', ['pmid', 'journal', 'doi'])
+        results = list(self.builder.build_many([Row(9, 'BMC Genomics', '10.1186/s12864-023-09123-4')]))
+        self.assertEqual(results[0].pmid, '9')
+        self.assertIsNotNone(results[0].url)
+
+
 class TestOfflineConstructionDocumentation(unittest.TestCase):
     """Test that offline construction capabilities are well-documented."""
 
@@ -0,0 +1,117 @@
+"""Tests for FindIt per-stage timing instrumentation."""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from metapub.findit import timing
+from metapub.findit.handlers import PublisherHandler
+
+
+class TestTimingSpans(unittest.TestCase):
+
+    def setUp(self):
+        timing.reset_timing_stats()
+
+    def tearDown(self):
+        timing.reset_timing_stats()
+
+    def test_collect_timings_accumulates_stages(self):
+        with timing.collect_timings() as timings:
+            with timing.timed('verify_pdf_url'):
+                pass
+            with timing.timed('verify_pdf_url'):
+                pass
+            with timing.timed('dxdoi'):
+                pass
+
+        self.assertEqual(set(timings), {'verify_pdf_url', 'dxdoi'})
+        stats = timing.get_timing_stats()
+        self.assertEqual(stats['verify_pdf_url']['']['count'], 2)
+
+        # spans outside a collector still feed the histograms
+        with timing.timed('dxdoi'):
+            pass
+        self.assertEqual(timing.get_timing_stats()['dxdoi']['']['count'], 2)
+
+    def test_labels_key_histograms_and_reach_hooks(self):
+        calls = []
+        hook = lambda stage, seconds, labels: calls.append((stage, labels))
+        timing.add_timing_hook(hook)
+        try:
+            with timing.timing_labels(publisher='Wiley', dance='the_doi_slide'):
+                with timing.timed('verify_pdf_url'):
+                    pass
+        finally:
+            timing.remove_timing_hook(hook)
+
+        self.assertEqual(calls, [('verify_pdf_url', {'publisher': 'Wiley', 'dance': 'the_doi_slide'})])
+        self.assertIn('the_doi_slide', timing.get_timing_stats()['verify_pdf_url'])
+
+    def test_failing_hook_is_ignored(self):
+        def bad_hook(stage, seconds, labels):
+            raise RuntimeError('metrics backend down')
+        timing.add_timing_hook(bad_hook)
+        try:
+            with timing.timed('dance'):
+                pass
+        finally:
+            timing.remove_timing_hook(bad_hook)
+        self.assertEqual(timing.get_timing_stats()['dance']['']['count'], 1)
+
+    def test_histogram_quantiles(self):
+        histogram = timing.TimingHistogram()
+        for seconds in [0.005] * 90 + [3.0] * 10:
+            histogram.add(seconds)
+        summary = histogram.to_dict()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['p50'], 0.01)
+        self.assertEqual(summary['p99'], 3.0)
+        self.assertEqual(summary['buckets']['0.01'], 90)
+        self.assertEqual(summary['buckets']['5.0'], 10)
+
+    def test_dispatch_records_dance_and_verification(self):
+        handler = PublisherHandler({'name': 'Bmc', 'dance_function': 'the_bmc_boogie'})
+        pma = Mock(doi='10.1186/s12864-023-09123-4', pii=None, journal='BMC Genomics', pmid='1')
+
+        with patch('metapub.findit.dances.generic.requests.Session') as mock_session:
+            response = mock_session.return_value.get.return_value
+            response.status_code = 200
+            response.content = b'%PDF-1.4'
+            with timing.collect_timings() as timings:
+                url, reason = handler.get_pdf_url(pma, verify=True)
+
+        self.assertIsNotNone(url)
+        self.assertIn('dance', timings)
+        self.assertIn('verify_pdf_url', timings)
+        self.assertIn('the_bmc_boogie', timing.get_timing_stats()['verify_pdf_url'])
+
+    def test_race_workers_report_to_lookup(self):
+        from metapub.findit.dances import race_pdf_urls
+
+        with patch('metapub.findit.dances.generic.requests.Session') as mock_session:
+            response = mock_session.return_value.get.return_value
+            response.status_code = 200
+            response.content = b'%PDF-1.4'
+            with timing.collect_timings() as timings:
+                race_pdf_urls(['http://example.com/a.pdf', 'http://example.com/b.pdf'])
+
+        self.assertIn('verify_pdf_url', timings)
+
+    def test_findit_exposes_timings(self):
+        from metapub import FindIt
+        pma = Mock(doi='10.1186/s12864-023-09123-4', pii=None, pmc=None,
+                   journal='BMC Genomics', pmid='12345678')
+
+        with patch('metapub.findit.findit.pm_fetch') as mock_fetch, \
+                patch('metapub.findit.findit._start_engines'):
+            mock_fetch.article_by_pmid.return_value = pma
+            src = FindIt(pmid='12345678', cachedir=None, verify=False)
+
+        self.assertEqual(src.url, 'http://www.biomedcentral.com/content/pdf/s12864-023-09123-4.pdf')
+        for stage in ('findit', 'pubmed_fetch', 'find_article_from_pma'):
+            self.assertIn(stage, src.timings)
+        self.assertGreaterEqual(src.timings['findit'], src.timings['pubmed_fetch'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Offline tests for MedGenFetcher (E-utilities responses mocked) and the local MedGen index."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from lxml import etree
+
+from metapub import MedGenFetcher
+from metapub.exceptions import MetaPubError
+from metapub.medgenindex import MedGenIndex
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _docsum_xml(uid, cui):
+    """ The concept 336867 summary from the test fixture, relabelled with uid and cui. """
+    with open(os.path.join(DATA_DIR, 'medgen_concept_336867.xml'), 'rb') as fh:
+        docsum = etree.fromstring(fh.read()).find('DocumentSummarySet/DocumentSummary')
+    docsum.set('uid', uid)
+    docsum.find('ConceptId').text = cui
+    return etree.tostring(docsum, encoding='unicode')
+
+
+SUMMARIES = {'336867': _docsum_xml('336867', 'C1845167'), '2881': _docsum_xml('2881', 'C0007194')}
+CUIS = {'C1845167': '336867', 'C0007194': '2881'}
+XML_HEADERS = {'content-type': 'text/xml'}
+
+
+def fake_send(endpoint, url, params):
+    if endpoint == 'esearch':
+        uids = [CUIS[term] for term in params['term'].split(' OR ') if term in CUIS]
+        content = '<eSearchResult><Count>%i</Count><IdList>%s</IdList></eSearchResult>' % (
+            len(uids), ''.join('<Id>%s</Id>' % uid for uid in uids))
+    else:
+        docsums = [SUMMARIES.get(uid, '<DocumentSummary uid="%s"><error>cannot get document summary</error>'
+                                      '</DocumentSummary>' % uid) for uid in params['id'].split(',')]
+        content = '<eSummaryResult><DocumentSummarySet status="OK">%s</DocumentSummarySet></eSummaryResult>' % (
+            ''.join(docsums))
+    return content, Mock(status_code=200, headers=XML_HEADERS)
+
+
+class TestMedGenBatchConcepts(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.fetch = MedGenFetcher(cachedir=self.cachedir)
+        self.client = self.fetch.qs.client
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+
+    def test_concepts_by_uids(self):
+        with patch.object(self.client, '_send', side_effect=fake_send) as send:
+            concepts = self.fetch.concepts_by_uids([336867, '2881', '3', '336867'])
+
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(send.call_args[0][2]['id'], '336867,2881,3')
+        self.assertEqual({uid: c and c.CUI for uid, c in concepts.items()},
+                         {'336867': 'C1845167', '2881': 'C0007194', '3': None})
+        self.assertEqual(concepts['336867'].title, 'Dent disease 2')
+
+        with patch.object(self.client, '_send', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.fetch.concept_by_uid(2881).uid, '2881')
+            self.assertEqual(self.fetch.concepts_by_uids(['336867'])['336867'].uid, '336867')
+
+    def test_concepts_by_cuis(self):
+        with patch.object(self.client, '_send', side_effect=fake_send) as send:
+            concepts = self.fetch.concepts_by_cuis(['C0007194', 'C1845167', 'CN000000', 'X1'])
+
+        self.assertEqual({cui: c and c.uid for cui, c in concepts.items()},
+                         {'C0007194': '2881', 'C1845167': '336867', 'CN000000': None, 'X1': None})
+        endpoints = [call[0][0] for call in send.call_args_list]
+        # one batched search and one batched summary, then a single-CUI retry for the unresolved one
+        self.assertEqual(endpoints, ['esearch', 'esummary', 'esearch'])
+        self.assertEqual(send.call_args_list[0][0][2]['term'], 'C0007194 OR C1845167 OR CN000000')
+
+
+# Excerpts of the MedGen dump files, in their published formats.
+MEDGEN_DUMP = {
+    'NAMES.RRF.gz': '#CUI|name|source|SUPPRESS|\n'
+                    'C1845167|Dent disease type 2|MONDO|N|\n'
+                    'C0441748|X-linked recessive inheritance|HPO|N|\n',
+    'MGCONSO.RRF.gz': '#CUI|TS|STT|ISPREF|AUI|SAUI|SCUI|SDUI|SAB|TTY|CODE|STR|SUPPRESS|\n'
+                      'C1845167|P|PF|Y|A1||300555|300555|OMIM|PT|300555|Dent disease type 2|N|\n'
+                      'C1845167|S|PF|N|A2||||GTR|SYN|AN0001|Dent disease 2|N|\n'
+                      'C0441748|P|PF|Y|A3||HP:0001419|HP:0001419|HPO|PT|HP:0001419|'
+                      'X-linked recessive inheritance|N|\n',
+    'MGSTY.RRF.gz': '#CUI|TUI|STN|STY|ATUI|CVF|\n'
+                    'C1845167|T047|B2.2.1.2.1|Disease or Syndrome|AT1||\n'
+                    'C0441748|T045|A2.2|Genetic Function|AT2||\n',
+    'MGDEF.RRF.gz': '#CUI|DEF|source|SUPPRESS|\n'
+                    'C1845167|Dent disease type 2 is caused by mutations in OCRL.|GeneReviews|N|\n',
+    'MGREL.RRF.gz': '#CUI1|AUI1|STYPE1|REL|CUI2|AUI2|RELA|RUI|SAB|SL|SUPPRESS|\n'
+                    'C0441748|A3|CUI|RO|C1845167|A1|has_inheritance_type|R1|OMIM|OMIM|N|\n',
+    'MedGenIDMappings.txt.gz': '#CUI_or_CN_id|pref_name|source_id|source|\n'
+                               'C1845167|Dent disease type 2|300555|OMIM|\n'
+                               'C1845167|Dent disease type 2|MONDO:0010573|MONDO|\n',
+    'MedGen_HPO_OMIM_Mapping.txt.gz': '#OMIM_CUI|MIM_number|OMIM_name|relationship|HPO_CUI|HPO_ID|HPO_name|'
+                                      'MedGen_name|MedGen_source|STY|\n'
+                                      'C1845167|300555|Dent disease 2|phenotype|C0020456|HP:0003259|'
+                                      'Elevated serum creatinine|Hypercreatininemia|HPO|Finding|\n',
+    'medgen_pubmed_lnk.txt.gz': '#UID|CUI|NAME|PMID|\n'
+                                '336867|C1845167|Dent disease type 2|20301653|\n'
+                                '336867|C1845167|Dent disease type 2|15627218|\n',
+    'mim2gene_medgen': '#MIM number\tGeneID\ttype\tSource\tMedGenCUI\tComment\n'
+                       '300555\t4952\tphenotype\tGeneMap\tC1845167\t-\n'
+                       '300535\t4952\tgene\t-\t-\t-\n',
+}
+
+
+class TestMedGenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for filename, content in MEDGEN_DUMP.items():
+            opener = gzip.open if filename.endswith('.gz') else open
+            with opener(os.path.join(self.tmpdir, filename), 'wt') as fh:
+                fh.write(content)
+        self.index = MedGenIndex(os.path.join(self.tmpdir, 'medgen_index.db'))
+        self.loaded = self.index.load(self.tmpdir)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_load(self):
+        self.assertEqual(self.loaded['MGCONSO.RRF.gz'], 3)
+        self.assertEqual(self.loaded['mim2gene_medgen'], 2)
+        # reloading replaces rows rather than adding to them
+        self.index.load(self.tmpdir)
+        self.assertEqual(self.index.info()['names'], 3)
+        self.assertEqual(self.index.info()['uids'], 1)
+
+    def test_lookups(self):
+        self.assertEqual(self.index.uids_by_term('DENT DISEASE 2'), ['336867'])
+        self.assertEqual(self.index.uids_by_term('MONDO:0010573'), ['336867'])
+        self.assertEqual(self.index.uids_by_term('C1845167'), ['336867'])
+        self.assertEqual(self.index.uids_by_term('no such disease'), [])
+        self.assertEqual(self.index.uid_for_cui('C1845167'), '336867')
+        self.assertRaises(MetaPubError, self.index.uid_for_cui, 'C0441748')
+        self.assertRaises(MetaPubError, self.index.uid_for_cui, '1845167')
+        self.assertEqual(self.index.pubmeds_for_cui('C1845167'), ['15627218', '20301653'])
+
+    def test_concept_by_cui(self):
+        concept = self.index.concept_by_cui('C1845167')
+        self.assertEqual(concept.uid, '336867')
+        self.assertEqual(concept.title, 'Dent disease type 2')
+        self.assertEqual(concept.semantic_type, 'Disease or Syndrome')
+        self.assertEqual(concept.OMIM, ['300555'])
+        self.assertEqual(concept.associated_genes[0]['gene_id'], '4952')
+        self.assertEqual([mode['name'] for mode in concept.modes_of_inheritance], ['X-linked recessive inheritance'])
+        self.assertEqual(len(concept.names), 2)
+        self.assertEqual(concept.to_dict()['CUI'], 'C1845167')
+        self.assertRaises(MetaPubError, self.index.concept_by_cui, 'C9999999')
+
+    def test_joins(self):
+        self.assertEqual(self.index.cuis_for_omim(300555), ['C1845167'])
+        self.assertEqual(self.index.gene_ids_for_cui('C1845167'), ['4952'])
+        self.assertEqual(self.index.cuis_for_gene_id(4952), ['C1845167'])
+        self.assertEqual(self.index.clinical_features('C1845167'), [('C0020456', 'HP:0003259')])
+
+    def test_local_fetcher(self):
+        fetch = MedGenFetcher(method='local', cachedir=self.tmpdir, index_path=self.index.db_path)
+        try:
+            self.assertEqual(fetch.uid_for_cui('C1845167'), '336867')
+            self.assertEqual(fetch.concept_by_cui('C1845167').OMIM, ['300555'])
+        finally:
+            fetch.index.close()
+            MedGenFetcher(cachedir=self.tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""Tests for NCBI error diagnosis, the status snapshot and the circuit breaker (no live network)."""
+
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+from lxml import etree
+
+from metapub.exceptions import MetaPubError
+from metapub.ncbi_client import NCBIClient
+from metapub.ncbi_errors import (CircuitBreaker, NCBIErrorDetector, NCBIHealthMonitor, NCBIServiceError,
+                                 ServiceStatus)
+
+EFETCH_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi'
+OUTAGE = dict(is_available=False, error_type='maintenance', error_message='NCBI service in maintenance mode')
+
+
+class TestNCBIErrorDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = NCBIErrorDetector(cache_duration=300)
+
+    def test_diagnose_xml_error_never_probes_inline(self):
+        try:
+            etree.fromstring('<html><body>down_bethesda</html>')
+        except etree.XMLSyntaxError as e:
+            error = e
+
+        with patch.object(self.detector, 'probe_service') as probe, \
+                patch.object(self.detector, 'refresh_in_background') as refresh:
+            diagnosis = self.detector.diagnose_error(error, EFETCH_URL)
+            probe.assert_not_called()
+            refresh.assert_called_once_with(EFETCH_URL)
+        self.assertEqual(diagnosis['error_type'], 'xml_parsing')
+
+        self.detector.record_status(EFETCH_URL, ServiceStatus(**OUTAGE))
+        diagnosis = self.detector.diagnose_error(error, EFETCH_URL)
+        self.assertEqual(diagnosis['error_type'], 'service_outage')
+        self.assertTrue(diagnosis['is_service_issue'])
+
+    def test_status_entries_expire(self):
+        with patch.object(self.detector, 'probe_service', return_value=ServiceStatus(is_available=True)) as probe:
+            self.detector.check_service_status(EFETCH_URL)
+            self.detector.check_service_status(EFETCH_URL)
+            self.assertEqual(probe.call_count, 1)
+
+            self.detector.record_status(EFETCH_URL, ServiceStatus(is_available=True, checked_at=time.time() - 301))
+            self.assertIsNone(self.detector.cached_status(EFETCH_URL))
+            self.detector.check_service_status(EFETCH_URL)
+            self.assertEqual(probe.call_count, 2)
+
+    def test_refresh_in_background_runs_one_probe_per_url(self):
+        started = []
+
+        def slow_probe(url, timeout):
+            started.append(url)
+            time.sleep(0.2)
+            return ServiceStatus(**OUTAGE)
+
+        with patch.object(self.detector, 'probe_service', side_effect=slow_probe):
+            self.assertTrue(self.detector.refresh_in_background(EFETCH_URL))
+            self.assertFalse(self.detector.refresh_in_background(EFETCH_URL))
+            for _ in range(50):
+                if self.detector.cached_status(EFETCH_URL):
+                    break
+                time.sleep(0.05)
+        self.assertEqual(started, [EFETCH_URL])
+        self.assertTrue(self.detector.cached_status(EFETCH_URL).is_outage)
+
+    def test_health_monitor(self):
+        monitor = NCBIHealthMonitor(self.detector, urls=[EFETCH_URL], interval=0.05)
+        with patch.object(self.detector, 'probe_service', return_value=ServiceStatus(**OUTAGE)) as probe:
+            monitor.start()
+            for _ in range(50):
+                if probe.call_count >= 2:
+                    break
+                time.sleep(0.05)
+            monitor.stop(timeout=1)
+        self.assertFalse(monitor.is_running)
+        self.assertGreaterEqual(probe.call_count, 2)
+        self.assertEqual(self.detector.cached_status(EFETCH_URL).error_type, 'maintenance')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = NCBIErrorDetector()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2, detector=self.detector)
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(NCBIServiceError) as context:
+            self.breaker.before_request(EFETCH_URL)
+        self.assertEqual(context.exception.error_type, 'circuit_open')
+
+    def test_half_open_lets_one_trial_through(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        time.sleep(0.25)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.25)
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_opens_on_reported_outage(self):
+        self.detector.record_status(EFETCH_URL, ServiceStatus(**OUTAGE))
+        self.assertFalse(self.breaker.allow_request(EFETCH_URL))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        # our own rate limit isn't an outage
+        detector = NCBIErrorDetector()
+        detector.record_status(EFETCH_URL, ServiceStatus(is_available=False, error_type='rate_limit'))
+        self.assertTrue(CircuitBreaker(detector=detector).allow_request(EFETCH_URL))
+
+    def test_client_consults_breaker(self):
+        client = NCBIClient(circuit_breaker=self.breaker)
+        client.rate_limiter.min_interval = 0
+        failure = requests.exceptions.ConnectionError('Connection refused')
+
+        with patch.object(client.session, 'get', side_effect=failure) as get:
+            for _ in range(3):
+                self.assertRaises(NCBIServiceError, client.esearch, db='pubmed', term='test')
+            self.assertRaises(NCBIServiceError, client.esearch, db='pubmed', term='test')
+            self.assertEqual(get.call_count, 3)
+
+        time.sleep(0.25)
+        response = Mock(status_code=200, headers={'content-type': 'text/xml'},
+                        text='<eSearchResult><Count>0</Count><IdList/></eSearchResult>')
+        with patch.object(client.session, 'get', return_value=response):
+            client.esearch(db='pubmed', term='test')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        # a rejected request (HTTP 400) means NCBI is up
+        self.breaker.record_failure()
+        bad_request = Mock(status_code=400)
+        bad_request.raise_for_status.side_effect = requests.exceptions.HTTPError('400 Client Error: Bad Request')
+        with patch.object(client.session, 'get', return_value=bad_request):
+            self.assertRaises(MetaPubError, client.esearch, db='pubmed', term='test')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker._failures, 0)
+
+    def test_client_counts_only_transport_errors_and_5xx(self):
+        client = NCBIClient(circuit_breaker=self.breaker)
+        client.rate_limiter.min_interval = 0
+
+        def http_error(status_code, message, headers=None):
+            response = Mock(status_code=status_code, headers=headers or {})
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError(message, response=response)
+            return response
+
+        # "500" in the URL of a rejected request doesn't make it a server error
+        bad_request = http_error(400, '400 Client Error: Bad Request for url: %s?id=25020045' % EFETCH_URL)
+        with patch.object(client.session, 'get', return_value=bad_request):
+            for _ in range(3):
+                self.assertRaises(MetaPubError, client.efetch, db='pubmed', id='25020045')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        too_many = http_error(429, '429 Client Error: Too Many Requests', {'Retry-After': '2'})
+        with patch.object(client.session, 'get', return_value=too_many):
+            for _ in range(3):
+                with self.assertRaises(NCBIServiceError) as context:
+                    client.rate_limiter.last_request_time = 0
+                    client.efetch(db='pubmed', id='1')
+                self.assertEqual(context.exception.error_type, 'rate_limit')
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertGreater(client.rate_limiter.last_request_time, time.time() + 1)
+
+        client.rate_limiter.last_request_time = 0
+        with patch.object(client.session, 'get', return_value=http_error(503, '503 Server Error')):
+            for _ in range(3):
+                self.assertRaises(NCBIServiceError, client.efetch, db='pubmed', id='1')
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
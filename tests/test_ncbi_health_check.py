@@ -1,22 +1,24 @@
 import unittest
 import json
 import sys
+import time
 from unittest.mock import Mock, patch, MagicMock
 from io import StringIO
 
 # Ensure no real network calls are made in tests
 import pytest
 
-from metapub.ncbi_health_check import NCBIHealthChecker, ServiceResult, main, print_results
+from metapub.ncbi_health_check import (NCBIHealthChecker, ServiceResult, LatencyStats, main, percentile,
+                                       print_results, summarize)
 
 
 class TestNCBIHealthChecker(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures with mocked NCBI client."""
-        with patch('metapub.ncbi_health_check.get_eutils_client') as mock_get_client:
+        with patch('metapub.ncbi_health_check.QueryService') as mock_query_service:
             self.mock_eutils_client = Mock()
-            mock_get_client.return_value = self.mock_eutils_client
+            mock_query_service.return_value = self.mock_eutils_client
             self.checker = NCBIHealthChecker()
 
     def test_service_configuration(self):
@@ -380,13 +382,13 @@ class TestHealthCheckOutput(unittest.TestCase):
         self.assertIn('🐌 NOTICE: Some services are responding slowly', output)
 
     @patch('sys.argv', ['ncbi_health_check', '--json'])
-    @patch('metapub.ncbi_health_check.get_eutils_client')
+    @patch('metapub.ncbi_health_check.QueryService')
     @patch('requests.get')
-    def test_main_json_output(self, mock_get, mock_get_client):
+    def test_main_json_output(self, mock_get, mock_query_service):
         """Test main function with JSON output."""
         # Mock eutils client
         mock_eutils_client = Mock()
-        mock_get_client.return_value = mock_eutils_client
+        mock_query_service.return_value = mock_eutils_client
         
         # Mock successful responses
         mock_response = Mock()
@@ -421,13 +423,13 @@ class TestHealthCheckOutput(unittest.TestCase):
         mock_exit.assert_called_with(0)
 
     @patch('sys.argv', ['ncbi_health_check', '--quick'])
-    @patch('metapub.ncbi_health_check.get_eutils_client')
+    @patch('metapub.ncbi_health_check.QueryService')
     @patch('requests.get')
-    def test_main_quick_mode(self, mock_get, mock_get_client):
+    def test_main_quick_mode(self, mock_get, mock_query_service):
         """Test main function in quick mode."""
         # Mock eutils client
         mock_eutils_client = Mock()
-        mock_get_client.return_value = mock_eutils_client
+        mock_query_service.return_value = mock_eutils_client
         
         # Mock responses with one service down
         mock_response = Mock()
@@ -456,13 +458,13 @@ class TestHealthCheckOutput(unittest.TestCase):
         mock_exit.assert_called_with(1)
 
     @patch('sys.argv', ['ncbi_health_check'])
-    @patch('metapub.ncbi_health_check.get_eutils_client')
+    @patch('metapub.ncbi_health_check.QueryService')
     @patch('requests.get')
-    def test_main_slow_services_exit_code(self, mock_get, mock_get_client):
+    def test_main_slow_services_exit_code(self, mock_get, mock_query_service):
         """Test main function exit code with slow services."""
         # Mock eutils client
         mock_eutils_client = Mock()
-        mock_get_client.return_value = mock_eutils_client
+        mock_query_service.return_value = mock_eutils_client
         
         # Mock responses
         mock_response = Mock()
@@ -487,5 +489,135 @@ class TestHealthCheckOutput(unittest.TestCase):
         mock_exit.assert_called_with(2)
 
 
+class TestHealthCheckLatency(unittest.TestCase):
+    """Repeated, concurrent probes with latency percentiles (mocked, no network)."""
+
+    MOCK_XML = b'<?xml version="1.0"?><eSearchResult><Count>1</Count></eSearchResult>'
+
+    def _mock_client(self, delay=0.0):
+        import time as _time
+        client = Mock()
+
+        def respond(params):
+            _time.sleep(delay)
+            return self.MOCK_XML
+
+        for method in ('efetch', 'esearch', 'elink', 'esummary', 'einfo'):
+            getattr(client, method).side_effect = respond
+        return client
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([3.0], 99), 3.0)
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2.5)
+        self.assertAlmostEqual(percentile(list(range(1, 101)), 95), 95.05)
+
+    def test_summarize_statuses(self):
+        def result(status, response_time, started_at):
+            return ServiceResult('ESearch (PubMed Search)', 'eutils:esearch', status, response_time,
+                                 started_at=started_at)
+
+        stats = summarize([result('up', 0.2, 0.0), result('up', 0.4, 0.1), result('up', 0.6, 10.0)])[0]
+        self.assertEqual((stats.status, stats.samples, stats.successes), ('up', 3, 3))
+        self.assertEqual(stats.p50, 0.4)
+        # busy from 0.0 to 0.5 and 10.0 to 10.6: the gap between rounds doesn't count
+        self.assertAlmostEqual(stats.throughput, 3 / 1.1)
+
+        stats = summarize([result('up', 0.2, 0.0), result('down', 10.0, 1.0)])[0]
+        self.assertEqual(stats.status, 'error')
+        self.assertEqual(summarize([result('down', 10.0, 0.0)])[0].status, 'down')
+        self.assertEqual(summarize([result('up', 6.0, 0.0)])[0].status, 'slow')
+
+    @patch('requests.get')
+    def test_benchmark_runs_probes_concurrently(self, mock_get):
+        mock_get.return_value = Mock(status_code=200)
+        with patch('metapub.ncbi_health_check.QueryService', return_value=self._mock_client(delay=0.1)):
+            checker = NCBIHealthChecker()
+
+        import time as _time
+        start = _time.time()
+        stats = checker.benchmark(quick=True, repeat=4, concurrency=10)
+        elapsed = _time.time() - start
+
+        self.assertEqual(len(stats), 5)
+        self.assertTrue(all(isinstance(s, LatencyStats) for s in stats))
+        self.assertTrue(all(s.samples == 4 and s.successes == 4 and s.status == 'up' for s in stats))
+        self.assertGreaterEqual(stats[0].p50, 0.1)
+        # 20 probes of 0.1s each, 10 at a time
+        self.assertLess(elapsed, 1.0)
+
+    @patch('requests.get')
+    def test_latency_excludes_rate_limit_queueing(self, mock_get):
+        mock_get.return_value = Mock(status_code=200)
+        client = self._mock_client()
+        with patch('metapub.ncbi_health_check.QueryService', return_value=client):
+            checker = NCBIHealthChecker()
+        checker.rate_limiter.min_interval = 0.1
+
+        def respond(params):
+            # what NCBIClient does: wait for a slot, then make the request
+            checker.rate_limiter.wait_if_needed()
+            time.sleep(0.02)
+            return self.MOCK_XML
+
+        for method in ('efetch', 'esearch', 'elink', 'esummary', 'einfo'):
+            getattr(client, method).side_effect = respond
+
+        stats = checker.benchmark(quick=True, repeat=2, concurrency=10)
+        # the last of 10 probes queues for ~0.9s behind the others
+        self.assertTrue(all(s.max < 0.09 for s in stats), [s.max for s in stats])
+
+    def test_probes_bypass_circuit_breaker(self):
+        from metapub.ncbi_errors import get_circuit_breaker
+        checker = NCBIHealthChecker()
+        breaker = get_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+        response = Mock(status_code=200, headers={'content-type': 'text/xml'},
+                        text=self.MOCK_XML.decode())
+        with patch.object(checker.eutils_client.client.session, 'get', return_value=response) as get:
+            result = checker.check_service('esearch', checker.services['esearch'])
+        self.assertEqual(result.status, 'up')
+        get.assert_called_once()
+
+    @patch('sys.argv', ['ncbi_health_check', '--quick', '--repeat', '3', '--json'])
+    @patch('requests.get')
+    def test_main_repeat_json(self, mock_get):
+        with patch('metapub.ncbi_health_check.QueryService', return_value=self._mock_client()):
+            captured_output = StringIO()
+            with patch('sys.stdout', captured_output), patch('sys.exit') as mock_exit:
+                main()
+
+        report = json.loads(captured_output.getvalue())
+        self.assertEqual(report['repeat'], 3)
+        self.assertEqual(report['summary']['total'], 5)
+        service = report['services'][0]
+        for key in ('p50', 'p95', 'p99', 'throughput', 'samples', 'successes'):
+            self.assertIn(key, service)
+        self.assertEqual(service['samples'], 3)
+        mock_exit.assert_called_with(0)
+
+    @patch('sys.argv', ['ncbi_health_check', '--quick', '--watch', '--interval', '0', '--window', '2',
+                        '--rounds', '3', '--json'])
+    @patch('requests.get')
+    def test_main_watch_rolling_window(self, mock_get):
+        client = self._mock_client()
+        client.efetch.side_effect = [self.MOCK_XML, Exception('Service down'), self.MOCK_XML, self.MOCK_XML]
+        with patch('metapub.ncbi_health_check.QueryService', return_value=client):
+            captured_output = StringIO()
+            with patch('sys.stdout', captured_output), patch('sys.exit') as mock_exit:
+                main()
+
+        rounds = [json.loads(line) for line in captured_output.getvalue().splitlines()]
+        self.assertEqual([r['round'] for r in rounds], [1, 2, 3])
+        efetch = [next(s for s in r['services'] if s['name'].startswith('EFetch')) for r in rounds]
+        self.assertEqual([(s['samples'], s['successes']) for s in efetch], [(1, 1), (2, 1), (2, 1)])
+        # the failure is still inside the two-probe window after round 3
+        self.assertEqual(efetch[2]['status'], 'error')
+        mock_exit.assert_called_with(1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
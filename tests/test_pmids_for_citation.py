@@ -62,3 +62,64 @@ class TestPubmedCitationMatch(unittest.TestCase):
     def test_citation_match_ambiguous(self):
         result = self.fetch.pmids_for_citation(**AMBIGUOUS_params)
         assert result[0] == u'AMBIGUOUS (5 citations)'
+
+
+class TestCitationMatchCaching(unittest.TestCase):
+    """ECitMatch goes through NCBIClient: rate limited, cached, normalized keys (no live network)."""
+
+    def setUp(self):
+        self.temp_cache = tempfile.mkdtemp(prefix='citation_cache_')
+        from metapub.eutils_common import get_eutils_client
+        from metapub.cache_utils import get_cache_path
+        self.client = get_eutils_client(get_cache_path(self.temp_cache, 'pubmedfetcher.db')).client
+        self.fetch = PubMedFetcher(cachedir=self.temp_cache)
+
+    def tearDown(self):
+        cleanup_dir(self.temp_cache)
+
+    def test_citation_lookup_is_cached_under_normalized_key(self):
+        from unittest.mock import patch, Mock
+        response = Mock(status_code=200, headers={'content-type': 'text/plain'},
+                        text='journal of neural transmission|2014|121|1077|||25023161\n')
+
+        with patch.object(self.client.session, 'get', return_value=response) as mock_get:
+            first = self.fetch.pmids_for_citation(jtitle='Journal of Neural Transmission.',
+                                                  year=2014, volume=121, first_page=1077)
+            second = self.fetch.pmids_for_citation(journal='journal of  neural transmission',
+                                                   year='2014', volume='121', spage='1077', aulast='n/a')
+
+        self.assertEqual(first, ['25023161'])
+        self.assertEqual(second, ['25023161'])
+        self.assertEqual(mock_get.call_count, 1)
+        url = mock_get.call_args[0][0]
+        self.assertTrue(url.endswith('/ecitmatch.cgi'))
+        self.assertEqual(mock_get.call_args[1]['params']['bdata'],
+                         'journal of neural transmission|2014|121|1077|||')
+
+    def test_batched_citations_map_back_by_key(self):
+        from unittest.mock import patch, Mock
+
+        def fake_ecitmatch(url, params=None, timeout=None):
+            rows = []
+            for line in params['bdata'].split('\r'):
+                journal, year, volume, page, author, key, _ = line.split('|')
+                result = {'2014': '25023161', '2008': 'AMBIGUOUS (5 citations)'}.get(year, 'NOT_FOUND')
+                rows.append('|'.join([journal, year, volume, page, author, key, result]))
+            return Mock(status_code=200, headers={'content-type': 'text/plain'}, text='\n'.join(rows) + '\n')
+
+        citations = {'a': no_authors_params, 'b': AMBIGUOUS_params, 'c': NOT_FOUND_params,
+                     'd': dict(no_authors_params, jtitle='JOURNAL OF NEURAL TRANSMISSION')}
+
+        with patch.object(self.client.session, 'get', side_effect=fake_ecitmatch) as mock_get:
+            results = self.fetch.pmids_for_citations(citations, batch_size=2)
+            # a and d normalize to the same citation: three unique lines, two requests
+            self.assertEqual(mock_get.call_count, 2)
+
+            self.assertEqual(results, {'a': ['25023161'], 'b': ['AMBIGUOUS (5 citations)'],
+                                       'c': ['NOT_FOUND'], 'd': ['25023161']})
+
+            # single and list lookups are now served from the per-citation cache
+            self.assertEqual(self.fetch.pmids_for_citation(**no_authors_params), ['25023161'])
+            self.assertEqual(self.fetch.pmids_for_citations([NOT_FOUND_params, AMBIGUOUS_params]),
+                             [['NOT_FOUND'], ['AMBIGUOUS (5 citations)']])
+            self.assertEqual(mock_get.call_count, 2)
@@ -1,5 +1,6 @@
 import unittest, os
 import tempfile
+from unittest.mock import Mock, patch
 
 from metapub import PubMedFetcher
 from metapub.cache_utils import cleanup_dir
@@ -60,6 +61,25 @@ class TestPubmedFetcher(unittest.TestCase):
             assert key in expected_keys
         assert len(resd['citedin']) == 6
 
+    def test_related_pmids_many(self):
+        """ one by-id elink request for many PMIDs; results cached per PMID """
+        with open('tests/data/sample_related_pmids_result.xml') as f:
+            linkset = f.read().split('<eLinkResult>')[1].split('</eLinkResult>')[0]
+        other = linkset.replace('<Id>14873513</Id>', '<Id>20113659</Id>', 1)
+        xmlstr = '<eLinkResult>%s%s</eLinkResult>' % (linkset, other)
+        response = Mock(status_code=200, headers={'content-type': 'text/xml'})
+        client = self.fetch.qs.client
+
+        with patch.object(client, '_send', return_value=(xmlstr, response)) as send:
+            related = self.fetch.related_pmids_many([14873513, '20113659', '1'])
+        self.assertEqual(send.call_args[0][2]['id'], ['14873513', '20113659', '1'])
+        self.assertEqual(related['14873513'], parse_related_pmids_result(xmlstr.replace(other, '')))
+        self.assertEqual(len(related['20113659']['citedin']), 6)
+        self.assertEqual(related['1'], {})
+
+        with patch.object(client, '_send', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.fetch.related_pmids('20113659'), related['20113659'])
+
     def test_invalid_pmid_raises_invalid_pmid_exception(self):
         """Test that InvalidPMID exceptions bubble up correctly instead of being wrapped."""
         # Create XML response that will cause PubMedArticle to have pmid=None
@@ -96,3 +116,25 @@ class TestPubmedFetcher(unittest.TestCase):
             # Restore the original method
             self.fetch.qs.efetch = original_efetch
 
+
+    def test_articles_by_pmids_batches_and_splits(self):
+        from unittest.mock import patch
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures', 'pmid_xml')
+
+        def fake_efetch(params):
+            # concatenate the single-article fixtures into one PubmedArticleSet
+            records = []
+            for pmid in params['id'].split(','):
+                path = os.path.join(fixtures, '%s.xml' % pmid)
+                if os.path.exists(path):
+                    xml = open(path).read()
+                    records.append(xml[xml.index('<PubmedArticle>'):xml.rindex('</PubmedArticleSet>')])
+            return '<PubmedArticleSet>%s</PubmedArticleSet>' % ''.join(records)
+
+        with patch.object(self.fetch.qs, 'efetch', side_effect=fake_efetch) as mock_efetch:
+            articles = self.fetch.articles_by_pmids(['38147649', 37822558, '99999999999', '38147649'],
+                                                    batch_size=2)
+
+        self.assertEqual(mock_efetch.call_count, 2)
+        self.assertEqual(sorted(articles), ['37822558', '38147649'])
+        self.assertEqual(articles['38147649'].doi, '10.1073/pnas.2308706120')
@@ -0,0 +1,98 @@
+"""Tests for batched PMC ID conversion (mocked idconv service)."""
+
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from metapub import pubmedcentral
+
+
+IDCONV_RESPONSE = b'''<?xml version="1.0" encoding="UTF-8"?>
+<pmcids status="ok">
+  <request idtype="%(idtype)s" dois="" versions="yes" showaiid="no">
+    <echo>ids=%(ids)s</echo>
+  </request>
+%(records)s
+</pmcids>'''
+
+KNOWN = {
+    '23193287': {'pmid': '23193287', 'pmcid': 'PMC3531190', 'doi': '10.1093/nar/gks1195'},
+    '10.1093/nar/gks1195': {'pmid': '23193287', 'pmcid': 'PMC3531190', 'doi': '10.1093/nar/gks1195'},
+    'PMC3531190': {'pmid': '23193287', 'pmcid': 'PMC3531190', 'doi': '10.1093/nar/gks1195'},
+}
+
+
+def fake_idconv(url, params=None, timeout=None):
+    records = []
+    for otherid in params['ids'].split(','):
+        # the service echoes the requested ID as submitted
+        info = KNOWN.get(otherid) or KNOWN.get(otherid.upper())
+        if info:
+            records.append('<record requested-id="%s" pmcid="%s" pmid="%s" doi="%s"/>'
+                           % (otherid, info['pmcid'], info['pmid'], info['doi']))
+        else:
+            records.append('<record requested-id="%s" status="error" errmsg="invalid article id"/>' % otherid)
+    response = Mock(status_code=200)
+    response.content = IDCONV_RESPONSE % {b'idtype': params.get('idtype', '').encode(),
+                                          b'ids': params['ids'].encode(),
+                                          b'records': '\n'.join(records).encode()}
+    return response
+
+
+class TestBatchedIdConversion(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        pubmedcentral.PMC_IDCONV_CACHE = None
+        patcher = patch('metapub.pubmedcentral._get_idconv_session')
+        self.session = patcher.start().return_value
+        self.session.get.side_effect = fake_idconv
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        pubmedcentral.PMC_IDCONV_CACHE = None
+        shutil.rmtree(self.cachedir)
+
+    def test_mixed_ids_grouped_by_type(self):
+        ids = ['PMC3531190', '10.1093/NAR/gks1195', '23193287', '99999999999', 'PMC3531190']
+        result = pubmedcentral.get_pmids_for_otherids(ids, cachedir=self.cachedir)
+
+        self.assertEqual(result, {'PMC3531190': '23193287', '10.1093/NAR/gks1195': '23193287',
+                                  '23193287': '23193287', '99999999999': None})
+        # one request per ID type, duplicates sent once
+        self.assertEqual(self.session.get.call_count, 3)
+        idtypes = sorted(call[1]['params']['idtype'] for call in self.session.get.call_args_list)
+        self.assertEqual(idtypes, ['doi', 'pmcid', 'pmid'])
+
+    def test_chunks_and_cache(self):
+        ids = [str(n) for n in range(1, 451)] + ['23193287']
+        result = pubmedcentral.get_pmcids_for_otherids(ids, cachedir=self.cachedir)
+        self.assertEqual(self.session.get.call_count, 3)
+        for call in self.session.get.call_args_list:
+            self.assertLessEqual(len(call[1]['params']['ids'].split(',')),
+                                 pubmedcentral.PMC_ID_CONVERSION_MAX_IDS)
+        self.assertEqual(result['23193287'], 'PMC3531190')
+        self.assertIsNone(result['1'])
+
+        # second run is served entirely from the cache, including misses
+        self.session.get.reset_mock()
+        dois = pubmedcentral.get_dois_for_otherids(ids, cachedir=self.cachedir)
+        self.assertEqual(self.session.get.call_count, 0)
+        self.assertEqual(dois['23193287'], '10.1093/nar/gks1195')
+
+    def test_no_cache(self):
+        pubmedcentral.get_pmids_for_otherids(['23193287'], cachedir=None)
+        pubmedcentral.get_pmids_for_otherids(['23193287'], cachedir=None)
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertIsNone(pubmedcentral.PMC_IDCONV_CACHE)
+
+    def test_single_id_functions_use_cache(self):
+        self.assertEqual(pubmedcentral.get_pmid_for_otherid('PMC3531190', cachedir=self.cachedir), '23193287')
+        self.assertEqual(pubmedcentral.get_doi_for_otherid('pmc3531190', cachedir=self.cachedir),
+                         '10.1093/nar/gks1195')
+        self.assertEqual(self.session.get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,8 @@ import os
 from unittest.mock import patch, MagicMock
 
 from metapub.urlreverse.urlreverse import UrlReverse, get_article_info_from_url
+from metapub.urlreverse import methods
+from metapub.urlreverse import urlreverse as urlreverse_module
 from metapub.urlreverse.methods import try_doi_methods, try_pmid_methods, try_vip_methods
 
 
@@ -144,5 +146,121 @@ class TestUrlReverseOffline(unittest.TestCase):
             self.assertIsInstance(json_str, str)
 
 
+class TestDoiMethodDispatch(unittest.TestCase):
+    """Hostname-first routing of DOI methods."""
+
+    def test_known_hosts_route_to_their_methods(self):
+        self.assertEqual(methods.doi_methods_for_url('http://www.cell.com/ajhg/pdf/S0002-9297(16)00050-1.pdf'),
+                         [methods.get_cell_doi_from_link])
+        # subdomains of a known domain; bmj.com also has a DOI prefix for early-release urls
+        self.assertEqual(methods.doi_methods_for_url('http://jmg.bmj.com/content/39/6/e31.full.pdf'),
+                         [methods.get_early_release_doi_from_link, methods.get_bmj_doi_from_link])
+        self.assertEqual(methods.doi_methods_for_url('http://www.jimmunol.org/content/early/2010/11/10/x.full.pdf'),
+                         [methods.get_early_release_doi_from_link])
+        # unknown host: publisher methods only if their domain appears in the url
+        self.assertEqual(methods.doi_methods_for_url('http://onlinelibrary.wiley.com/doi/10.1002/mgg3.203/full'),
+                         [methods.get_generic_doi_from_link])
+        self.assertEqual(methods.doi_methods_for_url('http://proxy.example.edu/login?url=http://www.karger.com/Article/Pdf/320652'),
+                         [methods.get_karger_doi_from_link])
+
+    def test_split_offline_and_network_methods(self):
+        offline, network = methods.split_doi_methods('http://www.karger.com/Article/Abstract/83388')
+        self.assertEqual(offline, [methods.get_early_release_doi_from_link, methods.get_karger_doi_from_link])
+        self.assertEqual(network, [])
+        offline, network = methods.split_doi_methods('http://www.sciencedirect.com/science/article/pii/S0939475311001839')
+        self.assertEqual(offline, [])
+        self.assertEqual(network, [methods.get_sciencedirect_doi_from_link])
+
+    def test_try_doi_methods_many_runs_regex_first(self):
+        urls = ['http://onlinelibrary.wiley.com/doi/10.1002/mgg3.203/full',
+                'https://www.jci.org/articles/view/118862/version/1/pdf/render',
+                'http://www.eje-online.org/content/early/2012/06/19/EJE-12-0333.full.pdf']
+        dxdoi = MagicMock()
+        with patch.object(methods, 'DXDOI', return_value=dxdoi):
+            offline_only = methods.try_doi_methods_many(urls + urls[:1], network=False)
+            dxdoi.resolve.assert_not_called()
+            results = methods.try_doi_methods_many(urls)
+
+        self.assertIsNone(offline_only[urls[0]])
+        self.assertEqual(offline_only[urls[1]]['doi'], '10.1172/JCI118862')
+        self.assertEqual(offline_only[urls[2]]['doi'], '10.1530/EJE-12-0333')
+        # only the url with no regex answer reached the network-backed method
+        dxdoi.resolve.assert_called_once_with('10.1002/mgg3.203')
+        self.assertEqual(results[urls[0]]['doi'], '10.1002/mgg3.203')
+
+
+class TestUrlReverseBatch(unittest.TestCase):
+    """UrlReverse.batch staging, with the network stages mocked."""
+
+    PUBMED_URL = 'https://www.ncbi.nlm.nih.gov/pubmed/22253870'
+    JCI_URL = 'https://www.jci.org/articles/view/118862/version/1/pdf/render'
+    SCIENCEDIRECT_URL = 'http://www.sciencedirect.com/science/article/pii/S0939475311001839'
+    UNKNOWN_URL = 'http://example.com/nothing/here'
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        urlreverse_module.URLREVERSE_CACHE = None
+
+    def tearDown(self):
+        urlreverse_module.URLREVERSE_CACHE = None
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_no_network_mode(self):
+        urls = [self.PUBMED_URL, ' %s\n' % self.PUBMED_URL, self.JCI_URL,
+                self.SCIENCEDIRECT_URL, self.UNKNOWN_URL]
+        with patch.object(methods, 'DXDOI') as dxdoi:
+            results = UrlReverse.batch(urls, network=False, cachedir=self.temp_dir)
+            dxdoi.assert_not_called()
+
+        self.assertIs(results[urls[0]], results[urls[1]])
+        self.assertEqual(results[self.PUBMED_URL].pmid, '22253870')
+        self.assertEqual(results[self.JCI_URL].doi, '10.1172/JCI118862')
+        self.assertIn('SKIPPED network stages (network=False)', results[self.JCI_URL].steps)
+        self.assertIn('SKIPPED network stages (network=False)', results[self.SCIENCEDIRECT_URL].steps)
+        self.assertIn('END OF LINE', results[self.UNKNOWN_URL].steps[-1])
+
+        # complete results were cached; partial ones were not
+        cache = urlreverse_module.URLREVERSE_CACHE
+        self.assertIn(self.PUBMED_URL, cache)
+        self.assertIn(self.UNKNOWN_URL, cache)
+        self.assertNotIn(self.JCI_URL, cache)
+        self.assertNotIn(self.SCIENCEDIRECT_URL, cache)
+
+        with patch.object(urlreverse_module, 'split_doi_methods') as split:
+            again = UrlReverse.batch([self.PUBMED_URL], network=False, cachedir=self.temp_dir)
+            split.assert_not_called()
+        self.assertEqual(again[self.PUBMED_URL].pmid, '22253870')
+
+    def test_network_stages_run_in_bulk(self):
+        method_dxdoi = MagicMock()
+        verify = {'10.1172/JCI118862': 'https://www.jci.org/articles/view/118862',
+                  '10.1016/S0939-4753(11)00183-9': None}
+        with patch.object(methods, 'DXDOI', return_value=method_dxdoi), \
+             patch.object(urlreverse_module, 'dois2pmids',
+                          return_value={'10.1172/JCI118862': '8655813',
+                                        '10.1016/S0939-4753(11)00183-9': '21742475'}) as dois2pmids, \
+             patch.object(urlreverse_module, 'dxdoi') as dxdoi:
+            dxdoi.resolve_many.side_effect = lambda dois, workers: {doi: verify[doi] for doi in dois}
+            results = UrlReverse.batch([self.JCI_URL, self.SCIENCEDIRECT_URL, self.PUBMED_URL],
+                                       cachedir=None, workers=2)
+
+        dois2pmids.assert_called_once()
+        self.assertEqual(sorted(dois2pmids.call_args[0][0]), sorted(verify))
+        dxdoi.resolve_many.assert_called_once()
+        # the sciencedirect DOI came from its network-backed method
+        method_dxdoi.resolve.assert_called_once_with('10.1016/S0939-4753(11)00183-9')
+
+        jci = results[self.JCI_URL]
+        self.assertEqual((jci.doi, jci.pmid), ('10.1172/JCI118862', '8655813'))
+        self.assertEqual(jci.steps, ['FOUND DOI via inferred doi', 'FOUND PMID via doi2pmid',
+                                     'VERIFY dx.doi.org: https://www.jci.org/articles/view/118862'])
+        sd = results[self.SCIENCEDIRECT_URL]
+        self.assertIsNone(sd.doi)
+        self.assertEqual(sd.pmid, '21742475')
+        self.assertIn('PROBLEM', sd.steps[-1])
+        self.assertEqual(results[self.PUBMED_URL].pmid, '22253870')
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
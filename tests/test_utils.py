@@ -1,6 +1,6 @@
 import unittest
 
-from metapub.utils import parameterize, hostname_of, rootdomain_of
+from metapub.utils import parameterize, hostname_of, rootdomain_of, HostLimiter
 
 
 HOSTNAME_SAMPLES = {
@@ -38,3 +38,7 @@ class TestUtils(unittest.TestCase):
         for sample, result in list(ROOTDOMAIN_SAMPLES.items()):
             assert rootdomain_of(sample) == result
 
+    def test_host_limiter_one_semaphore_per_host(self):
+        limiter = HostLimiter(2)
+        self.assertIs(limiter.slot('https://doi.org/a'), limiter.slot('https://DOI.org/b'))
+        self.assertIsNot(limiter.slot('https://doi.org/a'), limiter.slot('https://example.com/a'))